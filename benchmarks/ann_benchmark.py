@@ -0,0 +1,105 @@
+"""
+ANN vs exact search benchmark for the memory store.
+Usage: python benchmarks/ann_benchmark.py [--sizes 10000 100000 1000000] [--nprobe 4 8 16]
+
+Builds an IVF index over synthetic clustered unit vectors (the shape of
+sentence embeddings) and reports recall@k against exact search plus p50/p99
+per-query latency for both.  1M x 384 float32 needs ~1.5 GB of RAM.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from research_agent.ann import IVFIndex  # noqa: E402
+from research_agent.memory import _exact_top_k  # noqa: E402
+
+
+def synthetic_vectors(n: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.normal(size=(max(16, n // 500), dim)).astype(np.float32)
+    vecs = centers[rng.integers(len(centers), size=n)]
+    vecs += 0.5 * rng.normal(size=(n, dim)).astype(np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs
+
+
+def percentiles(samples: list[float]) -> dict:
+    ms = np.array(samples) * 1000
+    return {"p50_ms": round(float(np.percentile(ms, 50)), 3),
+            "p99_ms": round(float(np.percentile(ms, 99)), 3)}
+
+
+def bench_size(n: int, dim: int, k: int, nprobes: list[int], n_queries: int) -> dict:
+    rng = np.random.default_rng(n)
+    vectors = synthetic_vectors(n, dim, rng)
+    queries = vectors[rng.choice(n, n_queries, replace=False)]
+    queries = queries + 0.1 * rng.normal(size=queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    start = time.perf_counter()
+    index = IVFIndex.train(vectors)
+    build_s = time.perf_counter() - start
+
+    exact_ids, exact_times = [], []
+    for q in queries:
+        t = time.perf_counter()
+        _, ids = _exact_top_k(q[None, :], vectors, k)
+        exact_times.append(time.perf_counter() - t)
+        exact_ids.append(set(ids[0].tolist()))
+
+    result = {
+        "entries": n,
+        "dim": dim,
+        "n_lists": index.n_lists,
+        "build_s": round(build_s, 2),
+        "exact": percentiles(exact_times),
+        "ann": [],
+    }
+    for nprobe in nprobes:
+        hits, times = 0, []
+        for q, truth in zip(queries, exact_ids):
+            t = time.perf_counter()
+            _, ids = index.search(q[None, :], vectors, k, nprobe)
+            times.append(time.perf_counter() - t)
+            hits += len(truth & set(ids[0].tolist()))
+        result["ann"].append({
+            "nprobe": nprobe,
+            f"recall@{k}": round(hits / (k * len(queries)), 4),
+            **percentiles(times),
+        })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args()
+
+    results = [bench_size(n, args.dim, args.k, args.nprobe, args.queries) for n in args.sizes]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for r in results:
+        print(f"\n{r['entries']:,} entries (dim={r['dim']}, lists={r['n_lists']}, "
+              f"build {r['build_s']}s)")
+        print(f"  exact          p50 {r['exact']['p50_ms']:8.3f} ms  p99 {r['exact']['p99_ms']:8.3f} ms")
+        for a in r["ann"]:
+            recall = a[f"recall@{args.k}"]
+            print(f"  nprobe={a['nprobe']:<4}    p50 {a['p50_ms']:8.3f} ms  p99 {a['p99_ms']:8.3f} ms"
+                  f"  recall@{args.k} {recall:.3f}")
+
+
+if __name__ == "__main__":
+    main()
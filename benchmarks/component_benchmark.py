@@ -0,0 +1,234 @@
+"""
+Offline micro-benchmarks for the memory store, report formatting and tool parsing.
+Usage: python benchmarks/component_benchmark.py [--sizes 1000 10000 100000] [--only memory parse]
+       python benchmarks/component_benchmark.py --output baseline.json
+       python benchmarks/component_benchmark.py --compare baseline.json [--tolerance 0.25]
+
+Nothing here touches the network or loads the embedding model:
+
+* ``memory.*`` -- ``MemoryStore._load`` (re-opening the store), ``search``
+  and ``add`` over synthetic stores of each ``--sizes`` entry count, with a
+  hashing stand-in for the sentence encoder.  Query embeddings are computed
+  before timing, so numbers reflect the store, not the encoder.
+* ``format.*`` -- the synthesizer's ``_format_findings`` over large finding sets.
+* ``parse.*`` -- JSON decoding plus Citation mapping of the recorded GitHub,
+  Semantic Scholar and HuggingFace responses in ``benchmarks/fixtures``.
+* ``extract.*`` -- trafilatura extraction of the saved article HTML.
+
+Each benchmark reports p50/p99/mean milliseconds per call.  ``--output``
+saves the results as JSON; ``--compare`` re-runs the suite and diffs p50
+against such a file, exiting non-zero when anything is slower than the
+baseline by more than ``--tolerance``.
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import trafilatura  # noqa: E402
+from huggingface_hub import ModelInfo  # noqa: E402
+
+from research_agent.embeddings import EmbeddingService  # noqa: E402
+from research_agent.memory import MemoryStore  # noqa: E402
+from research_agent.nodes.synthesizer import _format_findings  # noqa: E402
+from research_agent.tools.github_search import _parse_repositories  # noqa: E402
+from research_agent.tools.huggingface_search import _parse_models  # noqa: E402
+from research_agent.tools.semantic_scholar_search import _parse_papers  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+GROUPS = ("memory", "format", "parse", "extract")
+
+
+class HashEncoder:
+    """Bag-of-words hashing encoder with the SentenceTransformer ``encode`` API."""
+
+    def __init__(self, dim: int) -> None:
+        self.dim = dim
+
+    def encode(self, texts, normalize_embeddings=True):
+        single = isinstance(texts, str)
+        out = np.zeros((1 if single else len(texts), self.dim), dtype=np.float32)
+        for row, text in zip(out, [texts] if single else texts):
+            for word in text.lower().split():
+                row[zlib.crc32(word.encode()) % self.dim] += 1.0
+        out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-12)
+        return out[0] if single else out
+
+
+def stats(samples: list[float]) -> dict:
+    ms = np.array(samples) * 1000
+    return {"p50_ms": round(float(np.percentile(ms, 50)), 4),
+            "p99_ms": round(float(np.percentile(ms, 99)), 4),
+            "mean_ms": round(float(ms.mean()), 4),
+            "n": len(samples)}
+
+
+def measure(fn, repeat: int) -> dict:
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t)
+    return stats(samples)
+
+
+# -- memory store -------------------------------------------------------------
+
+def _sentences(rng: np.random.Generator, n: int, words: int) -> list[str]:
+    vocab = np.array([f"term{i}" for i in range(5000)])
+    return [" ".join(row) for row in vocab[rng.integers(len(vocab), size=(n, words))]]
+
+
+def bench_memory(n: int, dim: int, repeat: int, adds: int) -> dict:
+    rng = np.random.default_rng(n)
+    embedder = EmbeddingService("bench-hash", model=HashEncoder(dim), memory_size=repeat + adds + 16)
+    queries = _sentences(rng, n, 8)
+    summaries = _sentences(rng, n, 40)
+    entries = [
+        {"query": q, "findings_count": 10, "report_summary": s, "timestamp": 0.0}
+        for q, s in zip(queries, summaries)
+    ]
+    vectors = HashEncoder(dim).encode([f"{q} {s}" for q, s in zip(queries, summaries)])
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "memory"
+        store = MemoryStore(path=path, embedder=embedder)
+        path.mkdir(parents=True)
+        store._write_generation(1, entries, vectors)
+
+        results[f"memory.load[n={n}]"] = measure(
+            lambda: MemoryStore(path=path, embedder=embedder), max(3, repeat // 20)
+        )
+
+        search_queries = _sentences(rng, repeat + 1, 6)
+        embedder.embed_many(search_queries)
+        pending = iter(search_queries)
+        results[f"memory.search[n={n}]"] = measure(
+            lambda: store.search(next(pending), top_k=3, threshold=0.0), repeat
+        )
+
+        new_queries = _sentences(rng, adds + 1, 8)
+        new_summaries = _sentences(rng, adds + 1, 40)
+        embedder.embed_many([f"{q} {s}" for q, s in zip(new_queries, new_summaries)])
+        new = iter([(q, [], s) for q, s in zip(new_queries, new_summaries)])
+        results[f"memory.add[n={n}]"] = measure(lambda: store.add(*next(new)), adds)
+    return results
+
+
+# -- formatting ---------------------------------------------------------------
+
+def bench_format(counts: list[int], repeat: int) -> dict:
+    rng = np.random.default_rng(0)
+    results = {}
+    for count in counts:
+        snippets = _sentences(rng, count, 60)
+        findings = [
+            {
+                "source_type": "arxiv",
+                "sources": ["arxiv", "semantic_scholar"] if i % 3 == 0 else ["arxiv"],
+                "title": f"Paper {i}",
+                "url": f"https://arxiv.org/abs/2401.{i:05d}",
+                "snippet": snippet,
+            }
+            for i, snippet in enumerate(snippets)
+        ]
+        results[f"format.findings[n={count}]"] = measure(
+            lambda: _format_findings(findings), max(5, repeat // max(1, count // 100))
+        )
+    return results
+
+
+# -- tool parsing and extraction ----------------------------------------------
+
+def bench_parse(repeat: int) -> dict:
+    github = (FIXTURES / "github_search.json").read_bytes()
+    papers = (FIXTURES / "semantic_scholar_search.json").read_bytes()
+    models = (FIXTURES / "huggingface_models.json").read_bytes()
+    return {
+        "parse.github": measure(lambda: _parse_repositories(json.loads(github)), repeat),
+        "parse.semantic_scholar": measure(lambda: _parse_papers(json.loads(papers)), repeat),
+        "parse.huggingface": measure(
+            lambda: _parse_models(ModelInfo(**m) for m in json.loads(models)), repeat
+        ),
+    }
+
+
+def bench_extract(repeat: int) -> dict:
+    html = (FIXTURES / "article.html").read_text()
+    return {"extract.trafilatura": measure(lambda: trafilatura.extract(html), max(5, repeat // 10))}
+
+
+# -- comparison -----------------------------------------------------------------
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    """Print p50 deltas against *baseline*; True if nothing regressed."""
+    ok = True
+    print(f"{'benchmark':<34} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, current in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<34} {'-':>12} {current['p50_ms']:>9.3f} ms {'new':>9}")
+            continue
+        change = current["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0.0
+        flag = ""
+        if change > tolerance:
+            flag, ok = "  REGRESSION", False
+        print(f"{name:<34} {before['p50_ms']:>9.3f} ms {current['p50_ms']:>9.3f} ms "
+              f"{change:>+8.1%}{flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                        help="memory store entry counts")
+    parser.add_argument("--findings", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--adds", type=int, default=50)
+    parser.add_argument("--only", nargs="+", choices=GROUPS, default=list(GROUPS))
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    parser.add_argument("--output", type=Path, help="also save the results as JSON")
+    parser.add_argument("--compare", type=Path, metavar="BASELINE",
+                        help="diff p50 against results saved with --output")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="relative p50 slowdown counted as a regression (default 0.25)")
+    args = parser.parse_args()
+
+    results = {}
+    if "memory" in args.only:
+        for n in args.sizes:
+            results.update(bench_memory(n, args.dim, args.repeat, args.adds))
+    if "format" in args.only:
+        results.update(bench_format(args.findings, args.repeat))
+    if "parse" in args.only:
+        results.update(bench_parse(args.repeat))
+    if "extract" in args.only:
+        results.update(bench_extract(args.repeat))
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        sys.exit(0 if compare(results, baseline, args.tolerance) else 1)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for name, r in results.items():
+        print(f"{name:<34} p50 {r['p50_ms']:9.3f} ms  p99 {r['p99_ms']:9.3f} ms  (n={r['n']})")
+
+
+if __name__ == "__main__":
+    main()
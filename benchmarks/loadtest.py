@@ -0,0 +1,361 @@
+"""
+Offline end-to-end load test of the research graph.
+Usage: python benchmarks/loadtest.py [--sessions 200] [--concurrency 16] [--mode async|thread]
+       python benchmarks/loadtest.py --tool-latency lognormal:0.4:0.6 --tool-failure 0.05 \\
+           --latency arxiv=lognormal:1.2:0.5 --latency web=uniform:0.2:0.8
+
+Runs ``build_graph()`` for real -- memory lookup, planner, researcher
+fan-out with enrichment, dedup, packing, synthesizer, memory save, plus the
+LLM slot limiter and metrics spans -- with local stand-ins at the edges:
+
+* the chat model is a stub that sleeps, then returns a plan (JSON over
+  random registry tools) or streams a report, failing at ``--llm-failure``;
+* every tool in ``TOOL_REGISTRY`` (sync and async) is replaced by a stub
+  returning synthetic findings, failing at ``--tool-failure``;
+* page enrichment returns synthetic text after ``--fetch-latency``;
+* the memory store and packer use a hashing encoder in a temp directory.
+
+Latencies are distributions: ``0.2`` / ``fixed:0.2``, ``uniform:LO:HI``,
+``lognormal:MEDIAN:SIGMA`` or ``exp:MEAN`` (seconds); ``--latency TOOL=SPEC``
+overrides one tool.  The report gives throughput, p50/p95/p99 of session
+latency and of every stage's per-session time, per-stage error counts
+(stages are the ``node/*``, ``llm/*``, ``tool/*`` and ``enrichment/*``
+metrics spans), and peak RSS.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from component_benchmark import HashEncoder  # noqa: E402
+from config.settings import settings  # noqa: E402
+from research_agent import metrics  # noqa: E402
+from research_agent.embeddings import EmbeddingService  # noqa: E402
+from research_agent.graph import build_graph  # noqa: E402
+from research_agent.memory import MemoryStore  # noqa: E402
+from research_agent.state import initial_state  # noqa: E402
+from research_agent.tools import registry  # noqa: E402
+
+_rng = random.Random(0)
+_rng_lock = threading.Lock()
+
+
+class StubFailure(RuntimeError):
+    """Injected failure from a stand-in LLM or tool."""
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """Turn a latency spec (see module docstring) into a sampler of seconds."""
+    kind, _, rest = spec.partition(":")
+    if not rest:
+        kind, rest = "fixed", kind
+    args = [float(a) for a in rest.split(":")]
+    samplers = {
+        "fixed": lambda v: v,
+        "uniform": lambda lo, hi: _rng.uniform(lo, hi),
+        "lognormal": lambda median, sigma: _rng.lognormvariate(math.log(median), sigma),
+        "exp": lambda mean: _rng.expovariate(1 / mean),
+    }
+    if kind not in samplers:
+        raise argparse.ArgumentTypeError(f"unknown latency distribution: {kind}")
+    sample = samplers[kind]
+
+    def sampler() -> float:
+        with _rng_lock:
+            return max(0.0, sample(*args))
+
+    return sampler
+
+
+def _fails(rate: float) -> bool:
+    with _rng_lock:
+        return _rng.random() < rate
+
+
+# -- stand-ins ----------------------------------------------------------------
+
+class StubChatModel(BaseChatModel):
+    """Chat model that answers planner and synthesizer prompts after a delay."""
+
+    latency: Any
+    failure_rate: float = 0.0
+    tools: list[str]
+    chunks: int = 20
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _reply(self, messages) -> str:
+        if _fails(self.failure_rate):
+            raise StubFailure("llm")
+        if "sub_tasks" in messages[0].content:
+            with _rng_lock:
+                tools = _rng.choices(self.tools, k=_rng.randint(2, 5))
+            return json.dumps({
+                "reasoning": "stub plan",
+                "sub_tasks": [{"query": f"aspect {i}", "tool": t} for i, t in enumerate(tools)],
+            })
+        return "## Summary\n" + " ".join(f"Finding [{i}] is supported." for i in range(1, 40))
+
+    def _pieces(self, text: str) -> list[str]:
+        step = max(1, len(text) // self.chunks)
+        return [text[i : i + step] for i in range(0, len(text), step)]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency())
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(self._reply(messages)))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency())
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(self._reply(messages)))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        pieces = self._pieces(self._reply(messages))
+        delay = self.latency() / len(pieces)
+        for piece in pieces:
+            time.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        pieces = self._pieces(self._reply(messages))
+        delay = self.latency() / len(pieces)
+        for piece in pieces:
+            await asyncio.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+
+def _findings(name: str, query: str, count: int) -> list[dict]:
+    return [
+        {
+            "source_type": name,
+            "title": f"{name} result {i} for {query}",
+            "url": f"https://{name}.example/{abs(hash(query)) % 10**8}/{i}",
+            "snippet": f"Synthetic {name} finding {i} about {query}. " * 8,
+        }
+        for i in range(count)
+    ]
+
+
+def stub_tools(latency: dict[str, Callable[[], float]], failure_rate: float, results: int):
+    """Sync and async stand-ins for every tool in the registry."""
+    sync_tools, async_tools = {}, {}
+    for name in registry.TOOL_REGISTRY:
+        def tool(query, name=name):
+            time.sleep(latency[name]())
+            if _fails(failure_rate):
+                raise StubFailure(name)
+            return _findings(name, query, results)
+
+        async def atool(query, name=name):
+            await asyncio.sleep(latency[name]())
+            if _fails(failure_rate):
+                raise StubFailure(name)
+            return _findings(name, query, results)
+
+        sync_tools[name], async_tools[name] = tool, atool
+    return sync_tools, async_tools
+
+
+def install_stubs(args, workdir: Path) -> None:
+    """Point the graph's LLM, tools, enrichment and memory at the stand-ins."""
+    import research_agent.nodes.memory_retriever as retriever_mod
+    import research_agent.nodes.memory_saver as saver_mod
+    import research_agent.nodes.packer as packer_mod
+    import research_agent.nodes.planner as planner_mod
+    import research_agent.nodes.researcher as researcher_mod
+    import research_agent.nodes.synthesizer as synthesizer_mod
+
+    settings.tool_cache_enabled = False
+    settings.llm_cache_enabled = False
+
+    llm = StubChatModel(
+        latency=parse_latency(args.llm_latency),
+        failure_rate=args.llm_failure,
+        tools=list(registry.TOOL_REGISTRY),
+    )
+    planner_mod.get_llm = lambda: llm
+    synthesizer_mod.get_llm = lambda: llm
+
+    default = parse_latency(args.tool_latency)
+    latency = {name: default for name in registry.TOOL_REGISTRY}
+    for override in args.latency:
+        name, _, spec = override.partition("=")
+        if name not in latency:
+            raise SystemExit(f"unknown tool in --latency: {name}")
+        latency[name] = parse_latency(spec)
+    sync_tools, async_tools = stub_tools(latency, args.tool_failure, args.results)
+    registry.TOOL_REGISTRY.update(sync_tools)
+    registry.ASYNC_TOOL_REGISTRY.update(async_tools)
+
+    fetch = parse_latency(args.fetch_latency)
+
+    def read_webpage(url, query=None):
+        time.sleep(fetch())
+        return f"Page text from {url} about {query}. " * 20
+
+    async def aread_webpage(url, query=None):
+        await asyncio.sleep(fetch())
+        return f"Page text from {url} about {query}. " * 20
+
+    researcher_mod.read_webpage = read_webpage
+    researcher_mod.aread_webpage = aread_webpage
+
+    embedder = EmbeddingService("loadtest-hash", model=HashEncoder(args.dim))
+    store = MemoryStore(path=workdir / "memory", embedder=embedder)
+    retriever_mod.get_memory_store = lambda: store
+    saver_mod.get_memory_store = lambda: store
+    packer_mod.get_embedding_service = lambda: embedder
+
+
+# -- driving ------------------------------------------------------------------
+
+def _session_stages(run: metrics.RunMetrics) -> dict[str, tuple[float, int]]:
+    """Per-stage (seconds, error count) for one session."""
+    return {
+        f"{kind}/{name}": (stats["total_s"], sum(stats["errors"].values()))
+        for kind, by_name in run.summary()["spans"].items()
+        for name, stats in by_name.items()
+    }
+
+
+def run_threads(graph, queries: list[str], concurrency: int) -> list[dict]:
+    def session(query: str) -> dict:
+        with metrics.track_run() as run:
+            try:
+                graph.invoke(initial_state(query))
+                error = None
+            except Exception as e:
+                error = type(e).__name__
+        return {"latency": run.duration, "error": error, "stages": _session_stages(run)}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(session, queries))
+
+
+def run_async(graph, queries: list[str], concurrency: int) -> list[dict]:
+    async def main() -> list[dict]:
+        gate = asyncio.Semaphore(concurrency)
+
+        async def session(query: str) -> dict:
+            async with gate:
+                with metrics.track_run() as run:
+                    try:
+                        await graph.ainvoke(initial_state(query))
+                        error = None
+                    except Exception as e:
+                        error = type(e).__name__
+            return {"latency": run.duration, "error": error, "stages": _session_stages(run)}
+
+        return await asyncio.gather(*(session(q) for q in queries))
+
+    return asyncio.run(main())
+
+
+def percentiles(samples: list[float]) -> dict:
+    ms = np.array(samples) * 1000
+    return {
+        "n": len(samples),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+    }
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(sessions: list[dict], wall: float) -> dict:
+    stages: dict[str, list[float]] = {}
+    stage_errors: dict[str, int] = {}
+    for s in sessions:
+        for stage, (seconds, failures) in s["stages"].items():
+            stages.setdefault(stage, []).append(seconds)
+            stage_errors[stage] = stage_errors.get(stage, 0) + failures
+    errors: dict[str, int] = {}
+    for s in sessions:
+        if s["error"]:
+            errors[s["error"]] = errors.get(s["error"], 0) + 1
+    return {
+        "sessions": len(sessions),
+        "failed": sum(errors.values()),
+        "errors": errors,
+        "wall_s": round(wall, 2),
+        "throughput_per_s": round(len(sessions) / wall, 2),
+        "session": percentiles([s["latency"] for s in sessions]),
+        "stages": {
+            name: {**percentiles(v), "errors": stage_errors[name]}
+            for name, v in sorted(stages.items())
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mode", choices=["async", "thread"], default="async")
+    parser.add_argument("--sequential", action="store_true",
+                        help="use the sequential researcher loop instead of fan-out")
+    parser.add_argument("--llm-latency", default="lognormal:0.5:0.4")
+    parser.add_argument("--llm-failure", type=float, default=0.0)
+    parser.add_argument("--tool-latency", default="lognormal:0.3:0.6")
+    parser.add_argument("--tool-failure", type=float, default=0.0)
+    parser.add_argument("--latency", action="append", default=[], metavar="TOOL=SPEC",
+                        help="per-tool latency override (repeatable)")
+    parser.add_argument("--fetch-latency", default="lognormal:0.2:0.5")
+    parser.add_argument("--results", type=int, default=5, help="findings per tool call")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        install_stubs(args, Path(tmp))
+        graph = build_graph(parallel=not args.sequential)
+        queries = [f"load test question {i}" for i in range(args.sessions)]
+        runner = run_async if args.mode == "async" else run_threads
+
+        started = time.perf_counter()
+        sessions = runner(graph, queries, args.concurrency)
+        result = summarize(sessions, time.perf_counter() - started)
+
+    result["config"] = {k: v for k, v in vars(args).items() if k != "json"}
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"{result['sessions']} sessions ({args.mode}, concurrency {args.concurrency}) "
+          f"in {result['wall_s']}s -- {result['throughput_per_s']} sessions/s, "
+          f"{result['failed']} failed, peak RSS {result['peak_rss_mb']} MB")
+    rows = [("session", {**result["session"], "errors": result["failed"]})]
+    rows += list(result["stages"].items())
+    print(f"  {'stage':<26} {'n':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'errors':>7}")
+    for name, p in rows:
+        print(f"  {name:<26} {p['n']:>6} {p['p50_ms']:>10.1f} {p['p95_ms']:>10.1f} "
+              f"{p['p99_ms']:>10.1f} {p['errors']:>7}")
+    if result["errors"]:
+        print(f"  errors: {result['errors']}")
+
+
+if __name__ == "__main__":
+    main()
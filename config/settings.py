@@ -1,3 +1,7 @@
+import threading
+from pathlib import Path
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -7,7 +11,19 @@ class Settings(BaseSettings):
     groq_api_key: str
     gemini_api_key: str = ""
     embedding_model: str = "all-MiniLM-L6-v2"
+    embedding_cache_enabled: bool = True
+    embedding_cache_size: int = 4096
+    embedding_cache_max_entries: int = 100_000
+    memory_vector_dtype: Literal["float32", "float16"] = "float32"
+    memory_max_entries: int = 0
+    ann_enabled: bool = True
+    ann_min_entries: int = 20_000
+    ann_nprobe: int = 16
+    ann_train_sample: int = 65_536
+    ann_train_iterations: int = 10
     max_sub_tasks: int = 5
+    parallel_research: bool = True
+    max_concurrency: int = 4
     arxiv_max_results: int = 5
     web_max_results: int = 5
     github_max_results: int = 5
@@ -18,8 +34,91 @@ class Settings(BaseSettings):
     huggingface_max_results: int = 5
     huggingface_token: str = ""
     youtube_max_results: int = 3
+    enrichment_depth: dict[str, int] = {"github": 0}
+    enrichment_default_depth: int = 2
+    enrichment_deadline: float = 8.0  # seconds of page enrichment per run, across sub-tasks
+    enrichment_per_host_limit: int = 2
+    passage_budget_chars: int = 2000
+    passage_chunk_chars: int = 500
+    transcript_budget_chars: int = 1500
+    cache_dir: Path = Path.home() / ".agentic-research-assistant" / "cache"
+    tool_cache_enabled: bool = True
+    tool_cache_max_entries: int = 5000
+    tool_cache_default_ttl: int = 3600
+    tool_cache_ttl: dict[str, int] = {
+        "arxiv": 86400,
+        "semantic_scholar": 86400,
+        "wikipedia": 604800,
+        "github": 21600,
+        "huggingface": 21600,
+        "youtube": 86400,
+        "web": 3600,
+    }
+    page_cache_enabled: bool = True
+    page_cache_max_entries: int = 2000
+    page_cache_fresh_seconds: int = 3600
+    page_cache_ttl: int = 7 * 86400
+    page_cache_negative_ttl: int = 900
+    context_packing_enabled: bool = True
+    context_token_budget: int = 6000
+    context_max_finding_tokens: int = 400
+    context_source_weights: dict[str, float] = {}  # source_type -> weight (default 1.0)
+    llm_max_concurrency: int = 4
+    llm_requests_per_second: float = 0.0  # 0 disables the shared rate limiter
+    llm_cache_enabled: bool = True
+    llm_cache_ttl: int = 7 * 86400
+    llm_cache_max_entries: int = 2000
+    llm_semantic_cache: bool = False
+    llm_semantic_cache_threshold: float = 0.92
+    cassette_path: Path | None = None  # record/replay LLM and tool traffic
+    cassette_mode: Literal["record", "replay"] = "replay"
+    profile_dir: Path | None = None
+    profile_interval: float = 0.005
+    metrics_enabled: bool = True
+    otel_enabled: bool = False
+    http2: bool = True
+    http_max_connections: int = 50
+    http_max_connections_per_host: int = 6
+    http_keepalive_expiry: float = 30.0
 
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
 
 
-settings = Settings()
+class _LazySettings:
+    """Builds :class:`Settings` on first attribute access.
+
+    Importing a module that reads configuration then costs nothing, and
+    ``main.py --help`` works without ``GROQ_API_KEY`` set.  Attribute reads
+    and writes (including ``monkeypatch.setattr``) go to the real instance.
+    """
+
+    __slots__ = ("_instance", "_lock")
+
+    def __init__(self) -> None:
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _load(self) -> Settings:
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    instance = Settings()
+                    object.__setattr__(self, "_instance", instance)
+        return instance
+
+    def __getattr__(self, name: str):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(self._load(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(self._load(), name)
+
+    def __repr__(self) -> str:
+        return repr(self._load())
+
+
+settings: Settings = _LazySettings()
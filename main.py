@@ -1,38 +1,134 @@
 """
 Agentic Research Assistant - CLI Entry Point
 Usage: python main.py "What are the latest fine-tuning techniques for LLMs?"
+       python main.py --json "..."   # one JSON event per line
+       python main.py --metrics run.json "..."   # write the run's metrics summary
+       python main.py --profile profiles/ "..."  # per-node profiles + flamegraph stacks
+       python main.py --record run.cassette "..."  # capture LLM and tool traffic
+       python main.py --replay run.cassette "..."  # rerun offline from the capture
+       python main.py --batch questions.txt --output results.jsonl --concurrency 8
 """
+import argparse
+import asyncio
+import json
 import sys
 import time
 
-from research_agent.graph import build_graph
+# The graph, LLM and tool modules are imported where they are used, so
+# ``--help`` and argument errors don't wait for LangChain and friends.
+from research_agent import metrics, runtime
+from research_agent.state import initial_state
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python main.py \"<your research question>\"")
-        sys.exit(1)
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Agentic Research Assistant")
+    parser.add_argument("query", nargs="*", help="research question")
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="print run events as JSON lines instead of rendered text",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="FILE",
+        help="write the run's per-node/tool/LLM metrics summary as JSON",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        help="profile every node; writes <node>.prof and stacks.collapsed to DIR",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="run every question in FILE (one per line, '-' for stdin) and "
+             "write one JSON line per result",
+    )
+    parser.add_argument(
+        "--output",
+        metavar="FILE",
+        help="batch results file (JSON lines); questions already answered "
+             "in it are skipped, so an interrupted batch resumes (default: stdout)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="batch sessions run at once (default: 4)",
+    )
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument(
+        "--record",
+        metavar="FILE",
+        help="record every LLM call and tool request/response to FILE",
+    )
+    cassette.add_argument(
+        "--replay",
+        metavar="FILE",
+        help="serve LLM calls and tool requests from FILE, without network access",
+    )
+    args = parser.parse_args(argv)
+    if not args.query and not args.batch:
+        parser.error("a research question or --batch FILE is required")
+    return args
+
+
+def run_json(graph, query: str) -> dict:
+    """Print every run event as one compact JSON object per line."""
+    from research_agent.events import RunFinished, stream_run, to_dict
+
+    result = {}
+    for event in stream_run(graph, initial_state(query)):
+        print(json.dumps(to_dict(event), separators=(",", ":")), flush=True)
+        if isinstance(event, RunFinished):
+            result = event.metrics
+    return result
+
+
+def run_text(graph, query: str) -> dict:
+    from research_agent.events import (
+        ContextPacked,
+        PlanReady,
+        ReportChunk,
+        RunFinished,
+        TaskDone,
+        TaskFailed,
+        stream_run,
+    )
 
-    query = " ".join(sys.argv[1:])
     print(f"\nResearch question: {query}")
     print("=" * 60)
 
-    graph = build_graph()
     start = time.time()
 
-    result = graph.invoke({
-        "original_query": query,
-        "all_findings": [],
-        "errors": [],
-        "current_task_index": 0,
-        "sub_tasks": [],
-        "final_report": "",
-        "past_context": "",
-    })
+    result = {}
+    run_metrics = {}
+    report_started = False
+    for event in stream_run(graph, initial_state(query)):
+        if isinstance(event, PlanReady):
+            print(f"Plan: {len(event.sub_tasks)} sub-task(s)")
+            for task in event.sub_tasks:
+                print(f"  {task['id']}. [{task['tool']}] {task['query']}")
+        elif isinstance(event, TaskDone):
+            print(f"  done   #{event.task_id} {event.tool}: "
+                  f"{event.findings} finding(s) in {event.latency:.1f}s")
+        elif isinstance(event, TaskFailed):
+            print(f"  failed #{event.task_id} {event.tool} after {event.latency:.1f}s")
+        elif isinstance(event, ContextPacked):
+            print(f"Context: {event.kept} finding(s) in ~{event.tokens} tokens "
+                  f"({event.dropped} dropped, {event.trimmed} trimmed)")
+        elif isinstance(event, ReportChunk):
+            if not report_started:
+                print()
+                report_started = True
+            print(event.text, end="", flush=True)
+        elif isinstance(event, RunFinished):
+            result = event.state
+            run_metrics = event.metrics
 
     elapsed = time.time() - start
 
-    print(result["final_report"])
+    print()
     print(f"\n{'=' * 60}")
     print(f"Completed in {elapsed:.1f}s")
 
@@ -41,6 +137,170 @@ def main():
         for e in result["errors"]:
             print(f"  - {e}")
 
+    return run_metrics
+
+
+def read_questions(source: str) -> list[str]:
+    """Questions from *source* ('-' for stdin): one per line, blanks and # comments skipped."""
+    f = sys.stdin if source == "-" else open(source)
+    try:
+        lines = [line.strip() for line in f]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def answered_questions(path: str) -> set[str]:
+    """Questions with a successful result in the batch output at *path*.
+
+    Failed results are retried; a line torn by an interruption is ignored.
+    """
+    done = set()
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if "error" not in record:
+                    done.add(record["query"])
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def open_results(path: str):
+    """Open the batch output for appending, ending a line torn by an interruption."""
+    out = open(path, "a+b")
+    if out.tell():
+        out.seek(-1, 2)
+        torn = out.read(1) != b"\n"
+    else:
+        torn = False
+    out.close()
+    out = open(path, "a")
+    if torn:
+        out.write("\n")
+    return out
+
+
+def batch_record(index: int, query: str, state: dict | None, run, error: Exception | None) -> dict:
+    from research_agent.nodes.synthesizer import _report_findings
+
+    record = {"index": index, "query": query}
+    if error is not None:
+        record["error"] = f"{type(error).__name__}: {error}"
+    else:
+        record["report"] = state.get("final_report", "")
+        record["findings"] = _report_findings(state)
+        record["errors"] = state.get("errors", [])
+    record["timings"] = run.summary()
+    return record
+
+
+async def run_batch(graph, questions: list[tuple[int, str]], out, concurrency: int) -> int:
+    """Run ``(index, question)`` pairs through *graph*, *concurrency* at a time.
+
+    Each result is written to *out* as one JSON line as soon as it finishes
+    (so lines are in completion order; ``index`` is the input position).
+    The loop's async clients are warmed first and closed at the end.
+    Returns the number of failed questions.
+    """
+    gate = asyncio.Semaphore(concurrency)
+    failed = 0
+    finished = 0
+
+    async def one(index: int, query: str) -> None:
+        nonlocal failed, finished
+        async with gate:
+            state, error = None, None
+            with metrics.track_run() as run:
+                try:
+                    state = await graph.ainvoke(initial_state(query))
+                except Exception as e:
+                    error = e
+            record = batch_record(index, query, state, run, error)
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            failed += error is not None
+            finished += 1
+            status = "failed" if error is not None else "done"
+            print(f"[{finished}/{len(questions)}] {status} in {run.duration:.1f}s: {query}",
+                  file=sys.stderr)
+
+    await runtime.awarm_up()
+    try:
+        await asyncio.gather(*(one(i, q) for i, q in questions))
+    finally:
+        await runtime.ashutdown()
+    return failed
+
+
+def main_batch(args, graph) -> int:
+    """Batch mode: returns the number of failed questions."""
+    questions = list(enumerate(read_questions(args.batch)))
+    if args.output:
+        done = answered_questions(args.output)
+        if done:
+            print(f"Resuming: {len(done)} question(s) already answered", file=sys.stderr)
+        questions = [(i, q) for i, q in questions if q not in done]
+
+    runtime.warm_up()
+    out = open_results(args.output) if args.output else sys.stdout
+    try:
+        return asyncio.run(run_batch(graph, questions, out, max(1, args.concurrency)))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        runtime.shutdown()
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python main.py \"<your research question>\"")
+        sys.exit(1)
+
+    args = parse_args()
+    from research_agent.cassette import Cassette, set_cassette
+    from research_agent.graph import build_graph
+    from research_agent.profiling import NodeProfiler
+
+    query = " ".join(args.query)
+    cassette = None
+    if args.record or args.replay:
+        cassette = Cassette(args.record or args.replay, "record" if args.record else "replay")
+        set_cassette(cassette)
+
+    profiler = NodeProfiler(args.profile) if args.profile else None
+    graph = build_graph(profiler=profiler)
+    failed = 0
+    run_metrics = None
+    if args.batch:
+        failed = main_batch(args, graph)
+    elif args.json:
+        run_metrics = run_json(graph, query)
+    else:
+        run_metrics = run_text(graph, query)
+
+    if profiler is not None:
+        paths = profiler.stop()
+        print(f"Profiles written to {args.profile} ({len(paths)} files)", file=sys.stderr)
+
+    if cassette is not None and cassette.recording:
+        cassette.save()
+        print(f"Recorded {len(cassette)} response(s) to {args.record}", file=sys.stderr)
+    elif cassette is not None and cassette.misses:
+        print(f"{cassette.misses} request(s) missing from {args.replay}", file=sys.stderr)
+
+    if args.metrics:
+        with open(args.metrics, "w") as f:
+            json.dump(run_metrics if run_metrics is not None else metrics.snapshot(), f, indent=2)
+
+    if failed:
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
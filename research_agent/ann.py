@@ -0,0 +1,160 @@
+"""Approximate nearest-neighbour search for the memory store (pure NumPy).
+
+:class:`IVFIndex` is an inverted-file index over unit vectors: spherical
+k-means partitions the vectors into ``n_lists`` cells, and a query scans
+only the ``nprobe`` cells whose centroids are closest to it.  ``nprobe`` is
+the recall/latency knob: higher probes more cells, approaching exact search.
+The index stores row ids only; vectors stay in the caller's matrix.
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import numpy as np
+
+_ASSIGN_CHUNK = 4096
+
+
+def _nearest_centroid(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the highest-similarity centroid for each row, in chunks."""
+    out = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), _ASSIGN_CHUNK):
+        chunk = vectors[start : start + _ASSIGN_CHUNK]
+        out[start : start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return out
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class IVFIndex:
+    """Inverted-file (IVF-Flat) index with incremental adds."""
+
+    def __init__(self, centroids: np.ndarray, assignments: np.ndarray | None = None) -> None:
+        self.centroids = centroids.astype(np.float32)
+        self._lists: list[list[int]] = [[] for _ in range(len(centroids))]
+        self._arrays: dict[int, np.ndarray] = {}
+        self.size = 0
+        if assignments is not None and len(assignments):
+            self._add_assignments(np.arange(len(assignments)), assignments)
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    # -- building -----------------------------------------------------------
+
+    @classmethod
+    def train(
+        cls,
+        vectors: np.ndarray,
+        n_lists: int | None = None,
+        iterations: int = 10,
+        seed: int = 0,
+        max_sample: int | None = None,
+    ) -> IVFIndex:
+        """Fit centroids with spherical k-means and index every row.
+
+        k-means runs on at most ``n_lists * 64`` rows (and at most
+        *max_sample*); only the final assignment pass touches every row.
+        """
+        n = len(vectors)
+        if n_lists is None:
+            n_lists = max(16, int(4 * np.sqrt(n)))
+        n_lists = min(n_lists, n)
+
+        rng = np.random.default_rng(seed)
+        sample_size = min(n, n_lists * 64, max_sample or n)
+        n_lists = min(n_lists, sample_size)
+        sample = vectors[rng.choice(n, sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            labels = _nearest_centroid(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = np.bincount(labels, minlength=n_lists) == 0
+            # Re-seed empty cells with random sample points.
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            centroids = _normalize(sums).astype(np.float32)
+
+        index = cls(centroids)
+        index.add(vectors)
+        return index
+
+    def add(self, vectors: np.ndarray) -> None:
+        """Index *vectors* as the next ``len(vectors)`` row ids."""
+        if not len(vectors):
+            return
+        ids = np.arange(self.size, self.size + len(vectors))
+        self._add_assignments(ids, _nearest_centroid(vectors, self.centroids))
+
+    def _add_assignments(self, ids: np.ndarray, labels: np.ndarray) -> None:
+        order = np.argsort(labels, kind="stable")
+        sorted_labels = labels[order]
+        cells, starts = np.unique(sorted_labels, return_index=True)
+        for cell, rows in zip(cells.tolist(), np.split(ids[order], starts[1:])):
+            self._lists[cell].extend(rows.tolist())
+            self._arrays.pop(cell, None)
+        self.size = max(self.size, int(ids[-1]) + 1)
+
+    def _ids(self, label: int) -> np.ndarray:
+        arr = self._arrays.get(label)
+        if arr is None:
+            arr = np.asarray(self._lists[label], dtype=np.int64)
+            self._arrays[label] = arr
+        return arr
+
+    # -- search -------------------------------------------------------------
+
+    def search(
+        self,
+        queries: np.ndarray,
+        vectors: np.ndarray,
+        k: int,
+        nprobe: int,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Approximate top-*k* for each query.
+
+        Returns ``(scores, ids)`` arrays of shape ``(len(queries), k)``,
+        sorted by descending score and padded with ``-inf`` / ``-1``.
+        """
+        nprobe = min(nprobe, self.n_lists)
+        probes = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for qi, (query, cells) in enumerate(zip(queries, probes)):
+            candidates = np.concatenate([self._ids(c) for c in cells])
+            if not len(candidates):
+                continue
+            cand_scores = vectors[candidates] @ query
+            top = min(k, len(candidates))
+            best = np.argpartition(-cand_scores, top - 1)[:top]
+            best = best[np.argsort(-cand_scores[best])]
+            scores[qi, :top] = cand_scores[best]
+            ids[qi, :top] = candidates[best]
+        return scores, ids
+
+    # -- persistence --------------------------------------------------------
+
+    def assignments(self) -> np.ndarray:
+        out = np.empty(self.size, dtype=np.int32)
+        for label, rows in enumerate(self._lists):
+            out[rows] = label
+        return out
+
+    def save(self, path: Path) -> None:
+        """Atomically write the index to *path* (``.npz``)."""
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp.npz")
+        np.savez(tmp, centroids=self.centroids, assignments=self.assignments())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> IVFIndex:
+        with np.load(path) as data:
+            return cls(data["centroids"], data["assignments"])
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+# ``totals`` holds the entry count and byte size, kept exact by triggers in
+# the writing transaction, so eviction never has to scan the table.
+_SCHEMA = """
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at);
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    count INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totals SELECT 1, COUNT(*), COALESCE(SUM(size), 0) FROM entries;
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE totals SET count = count + 1, size = size + new.size WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE totals SET count = count - 1, size = size - old.size WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_resize AFTER UPDATE OF size ON entries BEGIN
+    UPDATE totals SET size = size + new.size - old.size WHERE id = 1;
+END;
+COMMIT;
+"""
+
+# Writes go through an upsert: ``INSERT OR REPLACE`` deletes the old row
+# without firing the delete trigger.
+_UPSERT = """
+INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    value = excluded.value, kind = excluded.kind, size = excluded.size,
+    expires_at = excluded.expires_at, accessed_at = excluded.accessed_at
+"""
+
+
+def _prefix_range(prefix: str) -> tuple[str, tuple]:
+    """A key-range predicate for *prefix* that can use the primary-key index."""
+    if not prefix:
+        return "1", ()
+    return "key >= ? AND key < ?", (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1))
+
+
+class DiskCache:
+    """Persistent key/value cache with TTLs, LRU eviction and hit counters.
+
+    Backed by a single SQLite file in WAL mode, so several worker processes
+    can share one cache directory safely: SQLite serialises writers and
+    readers never block.  Values are JSON-encoded unless they are ``bytes``,
+    which are stored as-is.  When the cache grows past *max_entries* or
+    *max_bytes*, the least recently read entries are evicted in one batch,
+    down to 90% of the limit, so a full cache doesn't evict on every write.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_entries: int = 10_000,
+        max_bytes: int | None = None,
+    ) -> None:
+        self._path = path
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._connect().executescript(_SCHEMA)
+
+    # -- connection handling ------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection (sqlite3 objects are per-thread)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # -- public API ---------------------------------------------------------
+
+    def get(self, key: str) -> Any | None:
+        """Return the cached value for *key*, or None if missing or expired."""
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT value, kind, expires_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None or (row[2] is not None and row[2] <= now):
+            if row is not None:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._count(hit=False)
+            return None
+
+        conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        self._count(hit=True)
+        value, kind, _ = row
+        if kind == "bytes":
+            return bytes(value)
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        """Store *value* under *key*, expiring after *ttl* seconds if given."""
+        self.set_many([(key, value)], ttl)
+
+    def set_many(self, items: list[tuple[str, Any]], ttl: float | None = None) -> None:
+        """Store ``(key, value)`` pairs in one transaction (see :meth:`set`)."""
+        if not items:
+            return
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        rows = []
+        for key, value in items:
+            if isinstance(value, (bytes, bytearray)):
+                blob, kind = bytes(value), "bytes"
+            else:
+                blob, kind = json.dumps(value).encode(), "json"
+            rows.append((key, blob, kind, len(blob), expires_at, now))
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(_UPSERT, rows)
+            self._evict(conn, now)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, key: str) -> None:
+        self._connect().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        self._connect().execute("DELETE FROM entries")
+
+    def items(self, prefix: str = "") -> list[tuple[str, Any]]:
+        """Return unexpired ``(key, value)`` pairs whose key starts with *prefix*.
+
+        Does not count as a lookup and does not touch LRU order.
+        """
+        where, params = _prefix_range(prefix)
+        rows = self._connect().execute(
+            f"SELECT key, value, kind FROM entries WHERE {where} "
+            "AND (expires_at IS NULL OR expires_at > ?)",
+            (*params, time.time()),
+        ).fetchall()
+        return [
+            (key, bytes(value) if kind == "bytes" else json.loads(value))
+            for key, value, kind in rows
+        ]
+
+    def count(self, prefix: str = "") -> int:
+        """Number of unexpired entries whose key starts with *prefix*."""
+        where, params = _prefix_range(prefix)
+        return self._connect().execute(
+            f"SELECT COUNT(*) FROM entries WHERE {where} "
+            "AND (expires_at IS NULL OR expires_at > ?)",
+            (*params, time.time()),
+        ).fetchone()[0]
+
+    def stats(self) -> dict:
+        """Return hit/miss counters for this process plus on-disk totals."""
+        count, size = self._totals(self._connect())
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "entries": count,
+            "bytes": size,
+        }
+
+    def __len__(self) -> int:
+        return self._totals(self._connect())[0]
+
+    # -- internals ----------------------------------------------------------
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @staticmethod
+    def _totals(conn: sqlite3.Connection) -> tuple[int, int]:
+        return conn.execute("SELECT count, size FROM totals WHERE id = 1").fetchone()
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute(
+            "DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+        )
+        count, size = self._totals(conn)
+
+        evict = 0
+        if count > self._max_entries:
+            evict = count - (self._max_entries - self._max_entries // 10)
+        if self._max_bytes is not None and size > self._max_bytes:
+            # Walk the LRU order until enough bytes are freed.
+            over = size - (self._max_bytes - self._max_bytes // 10)
+            lru_count = 0
+            for (entry_size,) in conn.execute(
+                "SELECT size FROM entries ORDER BY accessed_at"
+            ):
+                if over <= 0:
+                    break
+                over -= entry_size
+                lru_count += 1
+            evict = max(evict, lru_count)
+
+        if evict:
+            conn.execute(
+                "DELETE FROM entries WHERE key IN "
+                "(SELECT key FROM entries ORDER BY accessed_at LIMIT ?)",
+                (evict,),
+            )
@@ -0,0 +1,308 @@
+"""Record/replay of LLM calls and outbound tool traffic.
+
+A :class:`Cassette` in ``"record"`` mode lets every external call through
+and stores its response under a request fingerprint; in ``"replay"`` mode
+it serves the stored responses instantly and never touches the network,
+so reruns are deterministic and CPU-side costs (parsing, extraction,
+embedding, prompt formatting) can be profiled without network noise.
+
+Calls are captured at the lowest level the code controls:
+
+* ``http_client`` traffic -- GitHub, Semantic Scholar and ``read_webpage``
+  -- at the httpx transport (method, URL with sorted query parameters and
+  body; headers are ignored, so tokens and cache validators don't matter);
+* library-backed tools -- arXiv, DDGS web search, MediaWiki, HF Hub and
+  YouTube transcripts, which bring their own HTTP stacks -- per tool call,
+  keyed by tool name and normalised query;
+* chat model calls (``invoke`` and ``stream``, sync and async), keyed like
+  the LLM cache by model identity and the rendered prompt messages.
+
+Repeated fingerprints replay in recorded order.  A fingerprint with no
+recording raises :class:`CassetteMiss`; for HTTP requests that surfaces as
+a tool error, for LLM calls it fails the run.  The tool, page and LLM
+caches are bypassed while a cassette is installed so every call reaches it.
+
+The file is gzip-compressed JSON.  Install a cassette with
+:func:`set_cassette` (``main.py --record/--replay``) or the
+``CASSETTE_PATH`` / ``CASSETTE_MODE`` settings, before the first request:
+HTTP clients pick it up when they are created.
+"""
+from __future__ import annotations
+
+import atexit
+import base64
+import copy
+import functools
+import gzip
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Literal
+
+import httpx
+
+from config.settings import settings
+from research_agent.tools.tool_cache import normalize_query
+
+_FORMAT_VERSION = 1
+# Set by httpx from the actual body; the recorded body is stored decoded.
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+Mode = Literal["record", "replay"]
+
+
+class CassetteMiss(LookupError):
+    """Replay found no recording for a request."""
+
+
+def fingerprint(kind: str, *parts: Any) -> str:
+    raw = json.dumps([kind, *parts], sort_keys=True, default=str)
+    return f"{kind}:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+
+def _request_fingerprint(request: httpx.Request) -> str:
+    url = request.url
+    params = sorted(url.params.multi_items())
+    base = str(url.copy_with(query=None))
+    body = hashlib.sha256(request.content).hexdigest() if request.content else ""
+    return fingerprint("http", request.method, base, params, body)
+
+
+class Cassette:
+    """Recorded responses keyed by request fingerprint (see module docstring)."""
+
+    def __init__(self, path: Path, mode: Mode = "replay") -> None:
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: dict[str, list[Any]] = {}
+        self._cursors: dict[str, int] = {}
+        if mode == "replay":
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+            self._entries = data["entries"]
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(v) for v in self._entries.values())
+
+    # -- storage ------------------------------------------------------------
+
+    def put(self, key: str, value: Any) -> None:
+        value = copy.deepcopy(value)  # callers go on to mutate results
+        with self._lock:
+            self._entries.setdefault(key, []).append(value)
+
+    def take(self, key: str, default: Any = CassetteMiss) -> Any:
+        """Next recorded value for *key* (the last one repeats once exhausted).
+
+        Without a recording, returns *default* if given, else raises
+        :class:`CassetteMiss`.
+        """
+        with self._lock:
+            values = self._entries.get(key)
+            if not values:
+                if default is not CassetteMiss:
+                    return default
+                self.misses += 1
+                raise CassetteMiss(f"No recording for {key}")
+            i = self._cursors.get(key, 0)
+            self._cursors[key] = i + 1
+            value = values[min(i, len(values) - 1)]
+        return copy.deepcopy(value)
+
+    def save(self) -> None:
+        """Write the recordings to :attr:`path` (record mode only)."""
+        if not self.recording:
+            return
+        with self._lock:
+            data = {"version": _FORMAT_VERSION, "entries": self._entries}
+            raw = json.dumps(data, separators=(",", ":")).encode()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with gzip.open(tmp, "wb") as f:
+            f.write(raw)
+        os.replace(tmp, self.path)
+
+    def stable(self, kind: str, key: str, value: Any) -> Any:
+        """Pin local state that feeds later fingerprints.
+
+        Records *value* when recording; when replaying, returns the recorded
+        value (or *value* if there is none).  Used for memory lookups, whose
+        results end up in the planner prompt but change after every run.
+        """
+        fp = fingerprint(kind, key)
+        if self.recording:
+            self.put(fp, value)
+            return value
+        return self.take(fp, default=value)
+
+    # -- tools --------------------------------------------------------------
+
+    def wrap_tool(self, name: str, fn):
+        """Record or replay a sync tool call by name and normalised query."""
+
+        @functools.wraps(fn)
+        def wrapper(query: str) -> list[dict]:
+            key = fingerprint("tool", name, normalize_query(query))
+            if not self.recording:
+                return self.take(key)
+            results = fn(query)
+            self.put(key, results)
+            return results
+
+        return wrapper
+
+    def wrap_async_tool(self, name: str, fn):
+        """Async counterpart of :meth:`wrap_tool` (shares its recordings)."""
+
+        @functools.wraps(fn)
+        async def wrapper(query: str) -> list[dict]:
+            key = fingerprint("tool", name, normalize_query(query))
+            if not self.recording:
+                return self.take(key)
+            results = await fn(query)
+            self.put(key, results)
+            return results
+
+        return wrapper
+
+    # -- HTTP ---------------------------------------------------------------
+
+    def transport(self, inner: httpx.BaseTransport | None) -> httpx.BaseTransport:
+        return _Transport(self, inner)
+
+    def async_transport(self, inner: httpx.AsyncBaseTransport | None) -> httpx.AsyncBaseTransport:
+        return _AsyncTransport(self, inner)
+
+    def _store_response(
+        self, key: str, request: httpx.Request, response: httpx.Response
+    ) -> httpx.Response:
+        headers = [(k, v) for k, v in response.headers.multi_items()
+                   if k.lower() not in _DROPPED_HEADERS]
+        self.put(key, {
+            "status": response.status_code,
+            "headers": headers,
+            "body": base64.b64encode(response.content).decode("ascii"),
+        })
+        return httpx.Response(
+            response.status_code,
+            headers=headers,
+            content=response.content,
+            request=request,
+        )
+
+    def _store_error(self, key: str, error: httpx.TransportError) -> None:
+        self.put(key, {"error": type(error).__name__, "message": str(error)})
+
+    def _replay_response(self, request: httpx.Request) -> httpx.Response:
+        entry = self.take(_request_fingerprint(request))
+        if "error" in entry:
+            error = getattr(httpx, entry["error"], httpx.TransportError)
+            raise error(entry["message"], request=request)
+        return httpx.Response(
+            entry["status"],
+            headers=entry["headers"],
+            content=base64.b64decode(entry["body"]),
+            request=request,
+        )
+
+    # -- LLM ----------------------------------------------------------------
+
+    def chat_model(self, inner, model: str):
+        """Wrap chat model *inner* (unused when replaying); *model* names it in keys.
+
+        The wrapper lives in :mod:`research_agent.cassette_llm`, so importing
+        this module doesn't load the LangChain model stack.
+        """
+        from research_agent.cassette_llm import CassetteChatModel
+
+        return CassetteChatModel(inner=inner, cassette=self, model=model)
+
+
+class _Transport(httpx.BaseTransport):
+    def __init__(self, cassette: Cassette, inner: httpx.BaseTransport | None) -> None:
+        self._cassette = cassette
+        self._inner = inner
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if not self._cassette.recording:
+            return self._cassette._replay_response(request)
+        key = _request_fingerprint(request)
+        try:
+            response = self._inner.handle_request(request)
+        except httpx.TransportError as e:
+            self._cassette._store_error(key, e)
+            raise
+        try:
+            response.read()
+        finally:
+            response.close()
+        return self._cassette._store_response(key, request, response)
+
+    def close(self) -> None:
+        if self._inner is not None:
+            self._inner.close()
+
+
+class _AsyncTransport(httpx.AsyncBaseTransport):
+    def __init__(self, cassette: Cassette, inner: httpx.AsyncBaseTransport | None) -> None:
+        self._cassette = cassette
+        self._inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not self._cassette.recording:
+            return self._cassette._replay_response(request)
+        key = _request_fingerprint(request)
+        try:
+            response = await self._inner.handle_async_request(request)
+        except httpx.TransportError as e:
+            self._cassette._store_error(key, e)
+            raise
+        try:
+            await response.aread()
+        finally:
+            await response.aclose()
+        return self._cassette._store_response(key, request, response)
+
+    async def aclose(self) -> None:
+        if self._inner is not None:
+            await self._inner.aclose()
+
+
+_lock = threading.Lock()
+_cassette: Cassette | None = None
+_configured = False
+
+
+def get_cassette() -> Cassette | None:
+    """The installed cassette, or one built from ``settings.cassette_path``.
+
+    A recording cassette built from settings is saved at interpreter exit.
+    """
+    global _cassette, _configured
+    with _lock:
+        if not _configured:
+            if settings.cassette_path is not None:
+                _cassette = Cassette(settings.cassette_path, settings.cassette_mode)
+                if _cassette.recording:
+                    atexit.register(_cassette.save)
+            _configured = True
+        return _cassette
+
+
+def set_cassette(cassette: Cassette | None) -> None:
+    """Install *cassette* process-wide (None to stop recording/replaying)."""
+    global _cassette, _configured
+    with _lock:
+        _cassette = cassette
+        _configured = True
@@ -0,0 +1,73 @@
+"""Chat model wrapper that records or replays LLM calls on a cassette.
+
+Kept apart from :mod:`research_agent.cassette` so that tools and HTTP
+clients can check for a cassette without importing LangChain; see
+:meth:`research_agent.cassette.Cassette.chat_model`.
+"""
+from __future__ import annotations
+
+from typing import Any
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from research_agent.cassette import fingerprint
+from research_agent.llm_cache import render_messages
+
+
+class CassetteChatModel(BaseChatModel):
+    """Chat model that records or replays another model's responses."""
+
+    inner: Any = None
+    cassette: Any
+    model: str
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+
+    def _key(self, messages) -> str:
+        return fingerprint("llm", self.model, render_messages(messages))
+
+    def _replayed(self, messages) -> str:
+        return self.cassette.take(self._key(messages))
+
+    def _result(self, content: str) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.cassette.recording:
+            content = self.inner.invoke(messages).content
+            self.cassette.put(self._key(messages), content)
+        else:
+            content = self._replayed(messages)
+        return self._result(content)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.cassette.recording:
+            content = (await self.inner.ainvoke(messages)).content
+            self.cassette.put(self._key(messages), content)
+        else:
+            content = self._replayed(messages)
+        return self._result(content)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        if not self.cassette.recording:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=self._replayed(messages)))
+            return
+        parts = []
+        for chunk in self.inner.stream(messages):
+            parts.append(chunk.content)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk.content))
+        self.cassette.put(self._key(messages), "".join(parts))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        if not self.cassette.recording:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=self._replayed(messages)))
+            return
+        parts = []
+        async for chunk in self.inner.astream(messages):
+            parts.append(chunk.content)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk.content))
+        self.cassette.put(self._key(messages), "".join(parts))
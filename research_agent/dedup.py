@@ -0,0 +1,180 @@
+"""Cross-source deduplication of research findings.
+
+The same paper or repository often comes back from several tools (arXiv,
+Semantic Scholar and a web result for one paper; GitHub and web for one
+repo).  :func:`deduplicate` groups findings that share an identity key --
+canonical URL, arXiv id, DOI or a normalised title -- or whose snippets are
+near-duplicates by 64-bit SimHash, and merges each group into a single
+citation that records every source it came from.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+
+from research_agent.state import Citation
+
+_TRACKING_PARAMS = {"fbclid", "gclid", "ref", "ref_src", "source", "mc_cid", "mc_eid"}
+_ARXIV_URL = re.compile(
+    r"arxiv\.org/(?:abs|pdf|html)/((?:\d{4}\.\d{4,5})|(?:[a-z\-]+(?:\.[A-Z]{2})?/\d{7}))(?:v\d+)?",
+    re.IGNORECASE,
+)
+_DOI = re.compile(r"\b(10\.\d{4,9}/[^\s\"<>]+)", re.IGNORECASE)
+_WORD = re.compile(r"\w+")
+
+# Titles shorter than this are too generic ("Introduction") to identify a work.
+_MIN_TITLE_WORDS = 4
+# Snippets need this many words before SimHash is a meaningful signal.
+_MIN_SIMHASH_WORDS = 12
+# Max differing bits for two snippets to count as near-duplicates.  Looser
+# than the classic k=3 for whole web pages: snippets are a few dozen
+# trigrams, so small edits flip more bits, while unrelated snippets sit
+# around 20-32 bits apart.
+SIMHASH_DISTANCE = 7
+
+
+def canonical_url(url: str) -> str:
+    """Normalise *url* so trivially different links to one page compare equal.
+
+    Lower-cases scheme and host, drops ``www.``, fragments, tracking query
+    parameters and trailing slashes; GitHub links are cut to the repository.
+    """
+    parts = urlsplit(url.strip())
+    if not parts.netloc:
+        return url.strip()
+    host = parts.netloc.lower().removeprefix("www.")
+    path = parts.path.rstrip("/")
+    if host == "github.com":
+        path = "/".join(path.split("/")[:3]).lower()
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    ))
+    return urlunsplit(("https", host, path, query, ""))
+
+
+def arxiv_id(url: str) -> str | None:
+    """The version-less arXiv identifier in an abs/pdf/html URL, if any."""
+    match = _ARXIV_URL.search(url)
+    return match.group(1).lower() if match else None
+
+
+def doi(text: str) -> str | None:
+    match = _DOI.search(text)
+    return match.group(1).rstrip(".,;)").lower() if match else None
+
+
+def _normalize_title(title: str) -> str | None:
+    words = _WORD.findall(title.lower())
+    return " ".join(words) if len(words) >= _MIN_TITLE_WORDS else None
+
+
+def identity_keys(finding: Citation) -> set[str]:
+    """Keys that identify the work *finding* refers to."""
+    url = finding.get("url", "")
+    ids = finding.get("ids", {})
+    keys = set()
+    if url:
+        keys.add("url:" + canonical_url(url))
+    arxiv = ids.get("arxiv") or arxiv_id(url)
+    if arxiv:
+        keys.add("arxiv:" + arxiv.lower())
+    found_doi = ids.get("doi") or doi(url)
+    if found_doi:
+        keys.add("doi:" + found_doi.lower())
+    title = _normalize_title(finding.get("title", ""))
+    if title:
+        keys.add("title:" + title)
+    return keys
+
+
+def simhash(text: str) -> int | None:
+    """64-bit SimHash over word trigrams, or None for very short texts."""
+    words = _WORD.findall(text.lower())
+    if len(words) < _MIN_SIMHASH_WORDS:
+        return None
+    shingles = {" ".join(words[i : i + 3]) for i in range(len(words) - 2)}
+    digests = b"".join(
+        hashlib.blake2b(s.encode(), digest_size=8).digest() for s in shingles
+    )
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8)).reshape(-1, 64)
+    weights = bits.sum(axis=0, dtype=np.int64) * 2 - len(bits)
+    return int.from_bytes(np.packbits(weights > 0).tobytes(), "big")
+
+
+def _hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class _DisjointSet:
+    def __init__(self, n: int) -> None:
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            # Keep the earliest finding as the group's root.
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def _merge(group: list[Citation]) -> Citation:
+    first = group[0]
+    merged = Citation(
+        source_type=first["source_type"],
+        title=first["title"],
+        url=first["url"],
+        # Prefer the richest excerpt, e.g. an enriched web page over an abstract.
+        snippet=max((f["snippet"] for f in group), key=len),
+    )
+    if len(group) == 1:
+        if "ids" in first:
+            merged["ids"] = first["ids"]
+        return merged
+
+    sources = list(dict.fromkeys(f["source_type"] for f in group))
+    urls = list(dict.fromkeys(f["url"] for f in group if f.get("url")))
+    ids: dict[str, str] = {}
+    for f in group:
+        for name, value in f.get("ids", {}).items():
+            ids.setdefault(name, value)
+    merged["sources"] = sources
+    merged["alternate_urls"] = [u for u in urls if u != first["url"]]
+    if ids:
+        merged["ids"] = ids
+    return merged
+
+
+def deduplicate(findings: list[Citation]) -> list[Citation]:
+    """Merge findings that refer to the same work, keeping first-seen order."""
+    groups = _DisjointSet(len(findings))
+
+    owner: dict[str, int] = {}
+    for i, finding in enumerate(findings):
+        for key in identity_keys(finding):
+            if key in owner:
+                groups.union(owner[key], i)
+            else:
+                owner[key] = i
+
+    hashes = [simhash(f.get("snippet", "")) for f in findings]
+    for i, a in enumerate(hashes):
+        if a is None:
+            continue
+        for j in range(i + 1, len(hashes)):
+            b = hashes[j]
+            if b is not None and _hamming(a, b) <= SIMHASH_DISTANCE:
+                groups.union(i, j)
+
+    members: dict[int, list[Citation]] = {}
+    for i, finding in enumerate(findings):
+        members.setdefault(groups.find(i), []).append(finding)
+    return [_merge(group) for _, group in sorted(members.items())]
@@ -0,0 +1,161 @@
+"""Process-wide embedding models and a memoising embedding service.
+
+Loading a SentenceTransformer takes seconds, so every component that needs
+vectors pulls the model from here instead of loading its own copy.
+:class:`EmbeddingService` adds a content-hash-keyed cache (in-memory LRU in
+front of a persistent :class:`DiskCache`) so each unique text is encoded
+once per model, and batches all cache misses into a single ``encode`` call.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from config.settings import settings
+from research_agent.cache import DiskCache
+
+_lock = threading.Lock()
+_models: dict[str, object] = {}
+_services: dict[str, "EmbeddingService"] = {}
+
+
+def get_embedding_model(name: str | None = None):
+    """Return the SentenceTransformer *name*, loading it once per process."""
+    name = name or settings.embedding_model
+    with _lock:
+        model = _models.get(name)
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(name)
+            _models[name] = model
+        return model
+
+
+class EmbeddingService:
+    """Normalised float32 embeddings, computed at most once per text.
+
+    Lookups go in-memory LRU -> disk cache -> model.  *model* may be passed
+    directly (tests, custom encoders); otherwise the registry model named
+    *model_name* is loaded on first miss.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        model=None,
+        disk_cache: DiskCache | None = None,
+        memory_size: int = 4096,
+    ) -> None:
+        self.model_name = model_name
+        self._model = model
+        self._disk = disk_cache
+        self._memory: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._memory_size = memory_size
+        self._lock = threading.Lock()
+        self.encoded = 0
+
+    def _get_model(self):
+        if self._model is None:
+            self._model = get_embedding_model(self.model_name)
+        return self._model
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode()).hexdigest()
+
+    def _remember(self, key: str, vec: np.ndarray) -> None:
+        with self._lock:
+            self._memory[key] = vec
+            self._memory.move_to_end(key)
+            while len(self._memory) > self._memory_size:
+                self._memory.popitem(last=False)
+
+    def _lookup(self, key: str) -> np.ndarray | None:
+        with self._lock:
+            vec = self._memory.get(key)
+            if vec is not None:
+                self._memory.move_to_end(key)
+                return vec
+        if self._disk is not None:
+            raw = self._disk.get(key)
+            if raw is not None:
+                vec = np.frombuffer(raw, dtype=np.float32)
+                self._remember(key, vec)
+                return vec
+        return None
+
+    def _peek(self, key: str) -> np.ndarray | None:
+        """In-memory lookup that leaves the LRU order alone."""
+        with self._lock:
+            return self._memory.get(key)
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed a single text."""
+        return self.embed_many([text])[0]
+
+    def embed_many(
+        self, texts: list[str], persist: bool = True, cache: bool = True
+    ) -> np.ndarray:
+        """Embed *texts* as an ``(n, dim)`` float32 matrix.
+
+        Cached vectors are reused; all remaining unique texts are encoded
+        together in one ``model.encode`` call and written to the disk cache
+        in one transaction.  With ``persist=False`` new vectors are kept in
+        the in-memory LRU only, for one-off texts not worth a disk write.
+        With ``cache=False`` only vectors already in memory are reused and
+        nothing is stored, so bulk throwaway texts cannot evict the LRU.
+        """
+        keys = [self._key(t) for t in texts]
+        found: dict[str, np.ndarray] = {}
+        pending: dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key in found or key in pending:
+                continue
+            vec = self._lookup(key) if cache else self._peek(key)
+            if vec is None:
+                pending[key] = text
+            else:
+                found[key] = vec
+
+        if pending:
+            vecs = self._get_model().encode(list(pending.values()), normalize_embeddings=True)
+            vecs = np.asarray(vecs, dtype=np.float32)
+            self.encoded += len(pending)
+            found.update(zip(pending, vecs))
+            if cache:
+                for key, vec in zip(pending, vecs):
+                    self._remember(key, vec)
+            if self._disk is not None and persist and cache:
+                self._disk.set_many([(key, vec.tobytes()) for key, vec in zip(pending, vecs)])
+
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([found[k] for k in keys])
+
+
+def get_embedding_service(name: str | None = None) -> EmbeddingService:
+    """Return the process-wide :class:`EmbeddingService` for model *name*."""
+    name = name or settings.embedding_model
+    with _lock:
+        service = _services.get(name)
+        if service is None:
+            disk = None
+            if settings.embedding_cache_enabled:
+                disk = DiskCache(
+                    settings.cache_dir / "embeddings.sqlite",
+                    max_entries=settings.embedding_cache_max_entries,
+                )
+            service = EmbeddingService(
+                name, disk_cache=disk, memory_size=settings.embedding_cache_size
+            )
+            _services[name] = service
+        return service
+
+
+def release_embedding_models() -> None:
+    """Drop all loaded models and services so their memory can be reclaimed."""
+    with _lock:
+        _models.clear()
+        _services.clear()
@@ -0,0 +1,197 @@
+"""Typed event stream over a research run, for the CLI and API consumers.
+
+:func:`stream_run` / :func:`astream_run` drive a graph from
+:func:`research_agent.graph.build_graph` and yield events as the run
+progresses instead of returning only the final state:
+
+* :class:`PlanReady` -- the planner's sub-tasks;
+* :class:`TaskStarted`, :class:`EnrichmentDone`, :class:`TaskDone`,
+  :class:`TaskFailed` -- per-sub-task progress, emitted by the researcher
+  through LangGraph's custom stream (see :func:`emit`);
+* :class:`ContextPacked` -- how many findings fit the synthesizer's token
+  budget, and how many were trimmed or dropped;
+* :class:`ReportChunk` -- a piece of the final report, relayed from the
+  synthesizer's streamed LLM call as tokens arrive (a report served from
+  the LLM cache arrives as one chunk);
+* :class:`RunFinished` -- the final graph state and the run's metrics
+  summary (see :mod:`research_agent.metrics`), always the last event.
+
+Consumers may stop iterating at any point to abandon a slow run.
+"""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from typing import AsyncIterator, Iterator, Union, get_args
+
+from langgraph.config import get_stream_writer
+
+from research_agent import metrics
+
+_REPORT_NODE = "synthesizer"
+_PLAN_NODE = "planner"
+_STREAM_MODES = ["values", "updates", "messages", "custom"]
+
+
+@dataclass
+class PlanReady:
+    sub_tasks: list[dict]
+    type: str = field(default="plan_ready", init=False)
+
+
+@dataclass
+class TaskStarted:
+    task_id: int
+    tool: str
+    query: str
+    type: str = field(default="task_started", init=False)
+
+
+@dataclass
+class EnrichmentDone:
+    task_id: int
+    enriched: int
+    latency: float
+    type: str = field(default="enrichment_done", init=False)
+
+
+@dataclass
+class TaskDone:
+    task_id: int
+    tool: str
+    findings: int
+    latency: float
+    type: str = field(default="task_done", init=False)
+
+
+@dataclass
+class TaskFailed:
+    task_id: int
+    tool: str
+    error: str
+    latency: float
+    type: str = field(default="task_failed", init=False)
+
+
+@dataclass
+class ContextPacked:
+    kept: int
+    dropped: int
+    trimmed: int
+    tokens: int
+    type: str = field(default="context_packed", init=False)
+
+
+@dataclass
+class ReportChunk:
+    text: str
+    type: str = field(default="report_chunk", init=False)
+
+
+@dataclass
+class RunFinished:
+    state: dict
+    metrics: dict = field(default_factory=dict)
+    type: str = field(default="run_finished", init=False)
+
+
+Event = Union[
+    PlanReady,
+    TaskStarted,
+    EnrichmentDone,
+    TaskDone,
+    TaskFailed,
+    ContextPacked,
+    ReportChunk,
+    RunFinished,
+]
+_EVENT_TYPES = get_args(Event)
+
+
+def emit(event: Event) -> None:
+    """Send *event* to the run's event stream, if there is one.
+
+    A no-op when called outside a graph run (e.g. a node invoked directly).
+    """
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        return
+    writer(event)
+
+
+def to_dict(event: Event) -> dict:
+    """Compact JSON-serialisable form of *event*, with its ``type`` tag.
+
+    :class:`RunFinished` carries the report, errors, per-task status and
+    metrics rather than the full state (findings can be large).
+    """
+    if isinstance(event, RunFinished):
+        state = event.state
+        return {
+            "type": event.type,
+            "final_report": state.get("final_report", ""),
+            "errors": state.get("errors", []),
+            "sub_tasks": [
+                {"id": t["id"], "status": t["status"], "findings": len(t["findings"])}
+                for t in state.get("sub_tasks", [])
+            ],
+            "metrics": event.metrics,
+        }
+    return asdict(event)
+
+
+class _RunTranslator:
+    """Turns LangGraph ``(mode, payload)`` stream items into events."""
+
+    def __init__(self) -> None:
+        self.state: dict = {}
+        self._streamed_report = False
+
+    def feed(self, mode: str, payload) -> list[Event]:
+        if mode == "values":
+            self.state = payload
+        elif mode == "updates":
+            update = payload.get(_PLAN_NODE) if isinstance(payload, dict) else None
+            if update and "sub_tasks" in update:
+                return [PlanReady([
+                    {"id": t["id"], "query": t["query"], "tool": t["tool"]}
+                    for t in update["sub_tasks"]
+                ])]
+        elif mode == "custom":
+            if isinstance(payload, _EVENT_TYPES):
+                return [payload]
+        elif mode == "messages":
+            chunk, metadata = payload
+            text = chunk.content if isinstance(chunk.content, str) else ""
+            if metadata.get("langgraph_node") == _REPORT_NODE and text:
+                self._streamed_report = True
+                return [ReportChunk(text)]
+        return []
+
+    def finish(self, run: metrics.RunMetrics) -> list[Event]:
+        events: list[Event] = []
+        report = self.state.get("final_report")
+        if report and not self._streamed_report:
+            events.append(ReportChunk(report))
+        events.append(RunFinished(self.state, run.summary()))
+        return events
+
+
+def stream_run(graph, inputs: dict, config: dict | None = None) -> Iterator[Event]:
+    """Run *graph* on *inputs*, yielding events as the run progresses."""
+    translator = _RunTranslator()
+    with metrics.track_run() as run:
+        for mode, payload in graph.stream(inputs, config, stream_mode=_STREAM_MODES):
+            yield from translator.feed(mode, payload)
+    yield from translator.finish(run)
+
+
+async def astream_run(graph, inputs: dict, config: dict | None = None) -> AsyncIterator[Event]:
+    """Async variant of :func:`stream_run` (uses the graph's async node paths)."""
+    translator = _RunTranslator()
+    with metrics.track_run() as run:
+        async for mode, payload in graph.astream(inputs, config, stream_mode=_STREAM_MODES):
+            for event in translator.feed(mode, payload):
+                yield event
+    for event in translator.finish(run):
+        yield event
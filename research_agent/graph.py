@@ -1,39 +1,128 @@
+import functools
+
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, START, END
+from langgraph.types import Send
 
+from config.settings import settings
+from research_agent.metrics import instrument
+from research_agent.nodes.deduplicator import deduplicator_node
 from research_agent.nodes.memory_retriever import memory_retriever_node
-from research_agent.nodes.planner import planner_node
-from research_agent.nodes.researcher import researcher_node
-from research_agent.nodes.synthesizer import synthesizer_node
+from research_agent.nodes.planner import aplanner_node, planner_node
+from research_agent.nodes.researcher import (
+    aresearch_task_node,
+    aresearcher_node,
+    collect_results_node,
+    new_enrichment_deadline,
+    research_task_node,
+    researcher_node,
+)
+from research_agent.nodes.synthesizer import asynthesizer_node, synthesizer_node
 from research_agent.nodes.memory_saver import memory_saver_node
+from research_agent.nodes.packer import packer_node
+from research_agent.profiling import NodeProfiler, get_profiler
 from research_agent.state import AgentState
 
 
 def should_continue(state: AgentState) -> str:
-    """Route back to researcher if tasks remain, otherwise synthesize."""
+    """Route back to researcher if tasks remain, otherwise deduplicate."""
     if state["current_task_index"] < len(state["sub_tasks"]):
         return "researcher"
-    return "synthesizer"
+    return "deduplicator"
+
+
+def fan_out_tasks(state: AgentState) -> list[Send] | str:
+    """Send every sub-task to its own researcher branch, sharing one enrichment deadline."""
+    if not state["sub_tasks"]:
+        return "collector"
+    deadline = new_enrichment_deadline()
+    return [
+        Send("researcher", {"task": task, "enrichment_deadline": deadline})
+        for task in state["sub_tasks"]
+    ]
+
+
+def _node(name: str, func, afunc=None, profiler: NodeProfiler | None = None):
+    """Instrumented node runnable (sync, or sync+async when *afunc* is given)."""
+    def wrap(fn):
+        if profiler is not None:
+            fn = profiler.wrap(name, fn)
+        return instrument("node", name, fn)
+
+    if afunc is None:
+        return wrap(func)
+    return RunnableLambda(wrap(func), afunc=wrap(afunc))
 
 
-def build_graph():
-    """Construct and compile the research agent LangGraph."""
+def build_graph(
+    parallel: bool | None = None,
+    max_concurrency: int | None = None,
+    profiler: NodeProfiler | None = None,
+):
+    """Construct and compile the research agent LangGraph.
+
+    In parallel mode (the default, see ``settings.parallel_research``) the
+    planner fans out one researcher branch per sub-task and a collector node
+    merges the results, so wall time tracks the slowest source.  At most
+    *max_concurrency* branches run at once.  Sequential mode keeps the
+    original one-task-per-step researcher loop.  Either way, findings are
+    deduplicated across sources and packed into the synthesizer's token
+    budget before synthesis.
+
+    Planner, researcher and synthesizer nodes carry both sync and async
+    implementations: ``invoke`` uses the blocking tools and LLM calls,
+    ``ainvoke``/``astream`` use the async tool layer backed by the shared
+    pooled ``httpx.AsyncClient`` and the models' ``ainvoke``.
+
+    With a *profiler* (or ``settings.profile_dir`` set), every node is
+    profiled; see :mod:`research_agent.profiling`.
+    """
+    if parallel is None:
+        parallel = settings.parallel_research
+    if max_concurrency is None:
+        max_concurrency = settings.max_concurrency
+    if profiler is None:
+        profiler = get_profiler()
+
     graph = StateGraph(AgentState)
+    node = functools.partial(_node, profiler=profiler)
 
-    graph.add_node("memory_retriever", memory_retriever_node)
-    graph.add_node("planner", planner_node)
-    graph.add_node("researcher", researcher_node)
-    graph.add_node("synthesizer", synthesizer_node)
-    graph.add_node("memory_saver", memory_saver_node)
+    graph.add_node("memory_retriever", node("memory_retriever", memory_retriever_node))
+    graph.add_node("planner", node("planner", planner_node, aplanner_node))
+    graph.add_node("deduplicator", node("deduplicator", deduplicator_node))
+    graph.add_node("packer", node("packer", packer_node))
+    graph.add_node("synthesizer", node("synthesizer", synthesizer_node, asynthesizer_node))
+    graph.add_node("memory_saver", node("memory_saver", memory_saver_node))
 
     graph.add_edge(START, "memory_retriever")
     graph.add_edge("memory_retriever", "planner")
-    graph.add_edge("planner", "researcher")
-    graph.add_conditional_edges(
-        "researcher",
-        should_continue,
-        {"researcher": "researcher", "synthesizer": "synthesizer"},
-    )
+
+    if parallel:
+        graph.add_node(
+            "researcher",
+            node("researcher", research_task_node, aresearch_task_node),
+        )
+        graph.add_node("collector", node("collector", collect_results_node))
+        graph.add_conditional_edges(
+            "planner", fan_out_tasks, ["researcher", "collector"]
+        )
+        graph.add_edge("researcher", "collector")
+        graph.add_edge("collector", "deduplicator")
+    else:
+        graph.add_node(
+            "researcher",
+            node("researcher", researcher_node, aresearcher_node),
+        )
+        graph.add_edge("planner", "researcher")
+        graph.add_conditional_edges(
+            "researcher",
+            should_continue,
+            {"researcher": "researcher", "deduplicator": "deduplicator"},
+        )
+
+    graph.add_edge("deduplicator", "packer")
+    graph.add_edge("packer", "synthesizer")
     graph.add_edge("synthesizer", "memory_saver")
     graph.add_edge("memory_saver", END)
 
-    return graph.compile()
+    return graph.compile().with_config(max_concurrency=max_concurrency)
@@ -1,30 +1,151 @@
+"""Pooled, rate-limited chat model clients.
+
+Constructing ``ChatGroq`` (and the optional Gemini fallback) builds a new
+SDK client with its own connection pool, so :func:`get_llm` caches one
+configured client per model chain and parameter set and hands the same
+object to every node.  Async callers get a separate client per event loop,
+because the SDK's async connection pool is bound to the loop it was
+created on.
+
+:func:`llm_slot` / :func:`allm_slot` cap concurrent provider calls across
+all sessions in the process (``settings.llm_max_concurrency``), and
+``settings.llm_requests_per_second`` adds a shared token-bucket limiter.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import weakref
+
 from langchain_groq import ChatGroq
 
 from config.settings import settings
+from research_agent.cassette import get_cassette
+from research_agent.tools.http_client import HostLimiter
 
+PRIMARY_MODEL = "llama-3.3-70b-versatile"
+FALLBACK_MODEL = "gemini-2.0-flash"
+TEMPERATURE = 0.2
 
-def get_llm():
+# Concurrency is limited per provider; the key is the primary's API host.
+_PROVIDER_URL = "https://api.groq.com"
+
+_lock = threading.Lock()
+_clients: dict[tuple, object] = {}
+_async_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[tuple, object]
+] = weakref.WeakKeyDictionary()
+_limiter: HostLimiter | None = None
+_rate_limiter = None
+
+
+def _build_llm(temperature: float):
     """
     Returns a ChatModel with automatic fallback.
     Primary: Groq (Llama 3.3 70B) — fast, free.
     Fallback: Google Gemini Flash — free tier (optional).
     """
     primary = ChatGroq(
-        model="llama-3.3-70b-versatile",
+        model=PRIMARY_MODEL,
         api_key=settings.groq_api_key,
-        temperature=0.2,
+        temperature=temperature,
         max_retries=2,
         request_timeout=30,
+        rate_limiter=_rate_limiter,
     )
 
     if settings.gemini_api_key:
         from langchain_google_genai import ChatGoogleGenerativeAI
 
         fallback = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash",
+            model=FALLBACK_MODEL,
             google_api_key=settings.gemini_api_key,
-            temperature=0.2,
+            temperature=temperature,
+            rate_limiter=_rate_limiter,
         )
         return primary.with_fallbacks([fallback])
 
     return primary
+
+
+def _init_rate_limiter() -> None:
+    global _rate_limiter
+    if _rate_limiter is None and settings.llm_requests_per_second > 0:
+        from langchain_core.rate_limiters import InMemoryRateLimiter
+
+        _rate_limiter = InMemoryRateLimiter(
+            requests_per_second=settings.llm_requests_per_second,
+            max_bucket_size=max(1, settings.llm_max_concurrency),
+        )
+
+
+def _running_loop() -> asyncio.AbstractEventLoop | None:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def get_llm(temperature: float = TEMPERATURE):
+    """Return the shared chat model (with fallback) for *temperature*.
+
+    Called from inside an event loop, the client is specific to that loop.
+    With a cassette installed (see :mod:`research_agent.cassette`), calls
+    are recorded or replayed.
+    """
+    key = (llm_identity(temperature), settings.groq_api_key, settings.gemini_api_key)
+    loop = _running_loop()
+    with _lock:
+        _init_rate_limiter()
+        clients = _clients if loop is None else _async_clients.setdefault(loop, {})
+        llm = clients.get(key)
+        if llm is None:
+            llm = _build_llm(temperature)
+            cassette = get_cassette()
+            if cassette is not None:
+                llm = cassette.chat_model(llm, llm_identity(temperature))
+            clients[key] = llm
+        return llm
+
+
+def release_loop_llm_clients() -> None:
+    """Drop the running event loop's clients (call before the loop closes)."""
+    loop = _running_loop()
+    with _lock:
+        _async_clients.pop(loop, None)
+
+
+def release_llm_clients() -> None:
+    """Drop cached clients so their connection pools can be closed."""
+    global _rate_limiter, _limiter
+    with _lock:
+        _clients.clear()
+        _async_clients.clear()
+        _rate_limiter = None
+        _limiter = None
+
+
+def _llm_limiter() -> HostLimiter:
+    global _limiter
+    with _lock:
+        if _limiter is None:
+            _limiter = HostLimiter(settings.llm_max_concurrency)
+        return _limiter
+
+
+def llm_slot() -> threading.BoundedSemaphore:
+    """Context manager holding one of the process's concurrent LLM call slots."""
+    return _llm_limiter().slot(_PROVIDER_URL)
+
+
+def allm_slot() -> asyncio.Semaphore:
+    """Async counterpart of :func:`llm_slot` (``async with allm_slot(): ...``)."""
+    return _llm_limiter().aslot(_PROVIDER_URL)
+
+
+def llm_identity(temperature: float = TEMPERATURE) -> str:
+    """Identify the model chain returned by :func:`get_llm` (for cache keys)."""
+    models = [PRIMARY_MODEL]
+    if settings.gemini_api_key:
+        models.append(FALLBACK_MODEL)
+    return f"{'>'.join(models)}@{temperature}"
@@ -0,0 +1,219 @@
+"""Response cache for the planner and synthesizer LLM calls.
+
+Exact entries are keyed by the call kind, the model identity
+(:func:`research_agent.llm.llm_identity`) and the fully rendered prompt
+messages, so any change to the prompt template, the findings or the model
+chain is a miss.  Optionally, planner calls can also reuse a plan made for
+a *similar* question: questions are embedded with the shared
+:class:`~research_agent.embeddings.EmbeddingService` and a stored plan is
+returned when cosine similarity reaches the configured threshold.  Each
+semantic entry stores its question's vector; the vectors are kept in
+memory as one matrix per call kind and model, and reloaded from disk only
+when the number of stored questions changes (e.g. another process added
+one).
+
+The cache is pluggable: :func:`set_llm_cache` installs any object with the
+same ``lookup`` / ``update`` methods (or ``None`` to disable caching).
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import threading
+from typing import Any
+
+import numpy as np
+from langchain_core.messages import BaseMessage
+
+from config.settings import settings
+from research_agent.cache import DiskCache
+
+_EXACT = "exact:"
+_SEMANTIC = "semantic:"
+
+
+def render_messages(messages: list[BaseMessage]) -> list[list[str]]:
+    """JSON-friendly form of rendered prompt messages, used for cache keys."""
+    return [[m.type, m.content if isinstance(m.content, str) else json.dumps(m.content)]
+            for m in messages]
+
+
+def cache_key(kind: str, model: str, messages: list[BaseMessage]) -> str:
+    raw = json.dumps([kind, model, render_messages(messages)], sort_keys=True)
+    return _EXACT + hashlib.sha256(raw.encode()).hexdigest()
+
+
+class LLMCache:
+    """Exact (and optionally semantic) LLM response cache on a :class:`DiskCache`.
+
+    *embedder* is an :class:`EmbeddingService`-like object; semantic lookups
+    are enabled only when it is given and *semantic_threshold* is set.
+    """
+
+    def __init__(
+        self,
+        disk: DiskCache,
+        ttl: float | None = None,
+        embedder=None,
+        semantic_threshold: float | None = None,
+    ) -> None:
+        self._disk = disk
+        self._ttl = ttl
+        self._embedder = embedder
+        self._threshold = semantic_threshold
+        self._lock = threading.Lock()
+        self._counts: dict[str, int] = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+        # semantic prefix -> (entry keys, question vectors as rows)
+        self._questions: dict[str, tuple[list[str], np.ndarray]] = {}
+
+    @property
+    def semantic(self) -> bool:
+        return self._embedder is not None and self._threshold is not None
+
+    def lookup(
+        self,
+        kind: str,
+        model: str,
+        messages: list[BaseMessage],
+        question: str | None = None,
+    ) -> Any | None:
+        """Return a cached response for this call, or None on a miss."""
+        value = self._disk.get(cache_key(kind, model, messages))
+        if value is not None:
+            self._count("exact_hits")
+            return value
+
+        if question is not None and self.semantic:
+            value = self._lookup_similar(kind, model, question)
+            if value is not None:
+                self._count("semantic_hits")
+                return value
+
+        self._count("misses")
+        return None
+
+    def update(
+        self,
+        kind: str,
+        model: str,
+        messages: list[BaseMessage],
+        value: Any,
+        question: str | None = None,
+    ) -> None:
+        """Store *value* as the response for this call."""
+        self._disk.set(cache_key(kind, model, messages), value, ttl=self._ttl)
+        if question is not None and self.semantic:
+            prefix = _semantic_prefix(kind, model)
+            key = prefix + hashlib.sha256(question.encode()).hexdigest()
+            vec = self._embedder.embed(question)
+            entry = {
+                "question": question,
+                "value": value,
+                "vector": base64.b64encode(vec.astype(np.float32).tobytes()).decode("ascii"),
+            }
+            self._disk.set(key, entry, ttl=self._ttl)
+            with self._lock:
+                loaded = self._questions.get(prefix)
+                if loaded is not None and key not in loaded[0]:
+                    keys, matrix = loaded
+                    self._questions[prefix] = (keys + [key], np.vstack([matrix, vec]))
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process, split by lookup kind."""
+        with self._lock:
+            counts = dict(self._counts)
+        lookups = sum(counts.values())
+        hits = counts["exact_hits"] + counts["semantic_hits"]
+        counts["hit_rate"] = round(hits / lookups, 3) if lookups else 0.0
+        counts["entries"] = len(self._disk)
+        return counts
+
+    # -- internals ----------------------------------------------------------
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def _lookup_similar(self, kind: str, model: str, question: str) -> Any | None:
+        keys, matrix = self._question_matrix(_semantic_prefix(kind, model))
+        if not keys:
+            return None
+        scores = matrix @ self._embedder.embed(question)
+        best = int(np.argmax(scores))
+        if scores[best] < self._threshold:
+            return None
+        entry = self._disk.get(keys[best])
+        return entry["value"] if entry is not None else None
+
+    def _question_matrix(self, prefix: str) -> tuple[list[str], np.ndarray]:
+        """Keys and question vectors of the semantic entries under *prefix*."""
+        count = self._disk.count(prefix)
+        with self._lock:
+            loaded = self._questions.get(prefix)
+        if loaded is not None and len(loaded[0]) == count:
+            return loaded
+
+        keys, vecs, unembedded = [], [], []
+        for key, entry in self._disk.items(prefix):
+            keys.append(key)
+            if "vector" in entry:
+                vecs.append(np.frombuffer(base64.b64decode(entry["vector"]), dtype=np.float32))
+            else:  # written before vectors were stored
+                vecs.append(None)
+                unembedded.append((len(vecs) - 1, entry["question"]))
+        if unembedded:
+            embedded = self._embedder.embed_many([q for _, q in unembedded])
+            for (i, _), vec in zip(unembedded, embedded):
+                vecs[i] = vec
+        matrix = np.stack(vecs) if vecs else np.empty((0, 0), dtype=np.float32)
+        with self._lock:
+            self._questions[prefix] = (keys, matrix)
+        return keys, matrix
+
+
+def _semantic_prefix(kind: str, model: str) -> str:
+    return f"{_SEMANTIC}{kind}:{hashlib.sha256(model.encode()).hexdigest()[:16]}:"
+
+
+_lock = threading.Lock()
+_cache: LLMCache | None = None
+_configured = False
+
+
+def get_llm_cache():
+    """Return the process-wide LLM cache, or None when caching is disabled.
+
+    The cache is also bypassed while a cassette is installed.
+    """
+    global _cache, _configured
+    from research_agent.cassette import get_cassette
+
+    if get_cassette() is not None:
+        return None
+    with _lock:
+        if not _configured:
+            if settings.llm_cache_enabled:
+                embedder = None
+                if settings.llm_semantic_cache:
+                    from research_agent.embeddings import get_embedding_service
+                    embedder = get_embedding_service()
+                _cache = LLMCache(
+                    DiskCache(
+                        settings.cache_dir / "llm.sqlite",
+                        max_entries=settings.llm_cache_max_entries,
+                    ),
+                    ttl=settings.llm_cache_ttl,
+                    embedder=embedder,
+                    semantic_threshold=settings.llm_semantic_cache_threshold,
+                )
+            _configured = True
+        return _cache
+
+
+def set_llm_cache(cache) -> None:
+    """Install *cache* (an :class:`LLMCache`-compatible object, or None)."""
+    global _cache, _configured
+    with _lock:
+        _cache = cache
+        _configured = True
@@ -1,56 +1,436 @@
 from __future__ import annotations
 
 import json
+import os
+import threading
 import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
 import numpy as np
 
 from config.settings import settings
+from research_agent.ann import IVFIndex
+from research_agent.embeddings import EmbeddingService, get_embedding_service
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
 
 _MEMORY_DIR = Path.home() / ".agentic-research-assistant"
-_MEMORY_FILE = _MEMORY_DIR / "memory.json"
+_MEMORY_PATH = _MEMORY_DIR / "memory"
+
+_FORMAT_VERSION = 1
+
+
+@contextmanager
+def _locked(path: Path, exclusive: bool) -> Iterator[None]:
+    """Hold an advisory ``flock`` on *path* (a no-op without fcntl)."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write *data* to *path* via fsync'd temp file + rename."""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _exact_top_k(queries: np.ndarray, vectors: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Brute-force top-*k* by inner product, sorted by descending score."""
+    scores = queries @ vectors.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    ids = np.take_along_axis(top, order, axis=1)
+    return np.take_along_axis(scores, ids, axis=1), ids
 
 
 class MemoryStore:
     """Persistent memory with semantic search over past research sessions.
 
     Stores query, findings summary, report excerpt, and embedding vectors.
-    Uses sentence-transformers for encoding and numpy cosine similarity for
-    retrieval.  The embedding model is loaded lazily on first write/search.
+    Encoding goes through the shared :class:`EmbeddingService` (pass
+    *embedder* to override); all embeddings are kept in one contiguous
+    float32 matrix, so a search is a single matrix-vector product followed
+    by an ``argpartition`` top-k.  The embedding model is loaded lazily on
+    first write/search.
+    Public methods are thread-safe; use :func:`get_memory_store` to share
+    one instance across graph nodes.
+
+    On disk, *path* is a directory holding one generation of:
+
+    - ``journal-N.jsonl``: append-only JSON lines of session metadata;
+    - ``vectors-N.bin``: raw float32/float16 rows, memory-mappable;
+    - ``manifest.json``: current generation, dimension and dtype.
+
+    ``add`` appends one vector row and then one journal line under an
+    exclusive ``flock``, so concurrent processes never clobber each other
+    and a crash leaves at most a torn tail, which the next writer truncates.
+    Compaction writes a new generation and switches to it with an atomic
+    manifest replace.  A legacy ``memory.json`` next to *path* is migrated
+    on first open.
+
+    Once the store holds ``settings.ann_min_entries`` sessions, searches go
+    through an :class:`~research_agent.ann.IVFIndex` saved as ``ann-N.npz``
+    next to the generation files; ``settings.ann_nprobe`` trades recall for
+    latency.  ``add`` only assigns new rows to existing cells; training runs
+    in :meth:`rebuild_ann` on a background thread, outside both locks, and
+    searches stay exact until a trained index is available.
     """
 
-    def __init__(self, path: Path = _MEMORY_FILE) -> None:
+    def __init__(
+        self,
+        path: Path = _MEMORY_PATH,
+        embedder: EmbeddingService | None = None,
+    ) -> None:
         self._path = path
         self._entries: list[dict[str, Any]] = []
-        self._model = None
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._embedder = embedder
+        self._manifest: dict[str, Any] | None = None
+        self._journal_offset = 0
+        self._ann: IVFIndex | None = None
+        self._ann_saved = 0
+        self._ann_mtime = 0.0
+        self._ann_thread: threading.Thread | None = None
+        self._ann_build_lock = threading.Lock()
+        self._lock = threading.RLock()
         self._load()
 
+    # -- file layout --------------------------------------------------------
+
+    @property
+    def _lock_path(self) -> Path:
+        return self._path / "lock"
+
+    @property
+    def _manifest_path(self) -> Path:
+        return self._path / "manifest.json"
+
+    def _journal_path(self, generation: int) -> Path:
+        return self._path / f"journal-{generation}.jsonl"
+
+    def _vectors_path(self, generation: int) -> Path:
+        return self._path / f"vectors-{generation}.bin"
+
+    def _ann_path(self) -> Path:
+        return self._path / f"ann-{self._manifest['generation']}.npz"
+
+    def _row_bytes(self) -> int:
+        return self._manifest["dim"] * np.dtype(self._manifest["dtype"]).itemsize
+
     # -- persistence --------------------------------------------------------
 
     def _load(self) -> None:
-        if self._path.exists():
-            with open(self._path, "r") as f:
-                self._entries = json.load(f)
+        legacy = self._path.with_suffix(".json")
+        if not self._manifest_path.exists() and legacy.exists():
+            self._path.mkdir(parents=True, exist_ok=True)
+            with _locked(self._lock_path, exclusive=True):
+                if not self._manifest_path.exists():
+                    self._migrate(legacy)
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Pick up sessions appended by other processes since the last read.
+
+        Costs a single ``stat`` when nothing changed.
+        """
+        if not self._manifest_path.exists():
+            return
+        with self._lock:
+            if self._manifest is not None:
+                try:
+                    journal = self._journal_path(self._manifest["generation"])
+                    if journal.stat().st_size == self._journal_offset:
+                        return
+                except FileNotFoundError:
+                    pass  # compacted away by another process
+            with _locked(self._lock_path, exclusive=False):
+                self._sync_locked()
+
+    def _sync_locked(self) -> bool:
+        """Bring the in-memory view up to date with disk (lock held)."""
+        if not self._manifest_path.exists():
+            return False
+        manifest = json.loads(self._manifest_path.read_bytes())
+        if self._manifest is None or manifest["generation"] != self._manifest["generation"]:
+            self._manifest = manifest
+            self._entries = []
+            self._matrix = np.empty((0, manifest["dim"]), dtype=np.float32)
+            self._journal_offset = 0
+            self._ann = None
+        self._read_tail()
+        self._update_ann(schedule=False)
+        return True
 
-    def _save(self) -> None:
-        self._path.parent.mkdir(parents=True, exist_ok=True)
-        with open(self._path, "w") as f:
-            json.dump(self._entries, f, indent=2)
+    def _read_tail(self) -> None:
+        """Read journal lines (and their vector rows) past our offset."""
+        generation = self._manifest["generation"]
+        records: list[tuple[dict, int]] = []
+        with open(self._journal_path(generation), "rb") as f:
+            f.seek(self._journal_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn final write
+                try:
+                    records.append((json.loads(line), len(line)))
+                except json.JSONDecodeError:
+                    break
+        if not records:
+            return
 
-    # -- lazy model loading -------------------------------------------------
+        start = len(self._entries)
+        vectors_path = self._vectors_path(generation)
+        rows_on_disk = vectors_path.stat().st_size // self._row_bytes()
+        records = records[: max(0, rows_on_disk - start)]
+        if not records:
+            return
 
-    def _get_model(self):
-        if self._model is None:
-            from sentence_transformers import SentenceTransformer
-            self._model = SentenceTransformer(settings.embedding_model)
-        return self._model
+        rows = np.memmap(
+            vectors_path,
+            dtype=self._manifest["dtype"],
+            mode="r",
+            offset=start * self._row_bytes(),
+            shape=(len(records), self._manifest["dim"]),
+        )
+        self._append_vectors(np.asarray(rows, dtype=np.float32))
+        for entry, size in records:
+            self._entries.append(entry)
+            self._journal_offset += size
+
+    def _repair_tail_locked(self) -> None:
+        """Truncate torn writes so the next append lands on a record boundary."""
+        generation = self._manifest["generation"]
+        os.truncate(self._journal_path(generation), self._journal_offset)
+        os.truncate(self._vectors_path(generation), len(self._entries) * self._row_bytes())
+
+    def _init_manifest_locked(self, dim: int) -> None:
+        self._write_generation(1, [], np.empty((0, dim), dtype=np.float32))
+
+    def _append_locked(self, entry: dict, vec: np.ndarray) -> None:
+        if vec.shape[0] != self._manifest["dim"]:
+            raise ValueError(
+                f"Embedding dimension {vec.shape[0]} does not match store "
+                f"dimension {self._manifest['dim']}; was the embedding model changed?"
+            )
+        generation = self._manifest["generation"]
+        stored = vec.astype(self._manifest["dtype"])
+        # Vector first, journal line second: the journal line commits the row.
+        with open(self._vectors_path(generation), "ab") as f:
+            f.write(stored.tobytes())
+        line = (json.dumps(entry) + "\n").encode()
+        with open(self._journal_path(generation), "ab") as f:
+            f.write(line)
+
+        self._append_vectors(stored.astype(np.float32)[None, :])
+        self._entries.append(entry)
+        self._journal_offset += len(line)
+        self._update_ann()
+
+    def _write_generation(
+        self, generation: int, entries: list[dict], vectors: np.ndarray
+    ) -> None:
+        """Write a full generation and atomically make it current."""
+        dtype = settings.memory_vector_dtype
+        journal = b"".join((json.dumps(e) + "\n").encode() for e in entries)
+        _write_atomic(self._journal_path(generation), journal)
+        _write_atomic(self._vectors_path(generation), vectors.astype(dtype).tobytes())
+
+        manifest = {
+            "version": _FORMAT_VERSION,
+            "generation": generation,
+            "dim": int(vectors.shape[1]),
+            "dtype": dtype,
+        }
+        _write_atomic(self._manifest_path, json.dumps(manifest).encode())
+
+        for stale in [
+            *self._path.glob("journal-*.jsonl"),
+            *self._path.glob("vectors-*.bin"),
+            *self._path.glob("ann-*.npz"),
+        ]:
+            if stale.stem.split("-")[-1] != str(generation):
+                stale.unlink(missing_ok=True)
+
+        self._manifest = manifest
+        self._entries = []
+        self._matrix = np.empty((0, manifest["dim"]), dtype=np.float32)
+        self._append_vectors(vectors.astype(dtype).astype(np.float32))
+        self._entries = list(entries)
+        self._journal_offset = len(journal)
+        self._ann = None
+        self._update_ann()
+
+    def _update_ann(self, schedule: bool = True) -> None:
+        """Keep the ANN index in step with the stored rows (lock held).
+
+        Never trains: picks up a persisted index when one is newer than
+        ours, indexes only the new rows, and re-saves every ~5% of growth.
+        With *schedule*, a missing or outgrown index is handed to
+        :meth:`rebuild_ann` on a background thread; readers pass
+        ``schedule=False`` and keep using exact search until a writer has
+        saved one.
+        """
+        n = len(self._entries)
+        if not settings.ann_enabled or n < settings.ann_min_entries:
+            self._ann = None
+            return
 
-    def _embed(self, text: str) -> list[float]:
-        model = self._get_model()
-        vec = model.encode(text, normalize_embeddings=True)
-        return vec.tolist()
+        self._load_ann()
+        if self._ann is not None:
+            self._ann.add(self._vectors[self._ann.size :])
+            if n - self._ann_saved >= max(1000, n // 20):
+                self._save_ann()
+        if schedule and self._ann_outgrown():
+            self._schedule_ann_rebuild()
+
+    def _load_ann(self) -> None:
+        try:
+            mtime = self._ann_path().stat().st_mtime
+        except FileNotFoundError:
+            return
+        if self._ann is not None and mtime == self._ann_mtime:
+            return
+        try:
+            index = IVFIndex.load(self._ann_path())
+        except (OSError, ValueError, KeyError):
+            return
+        if index.size <= len(self._entries):
+            self._ann, self._ann_saved, self._ann_mtime = index, index.size, mtime
+
+    def _save_ann(self) -> None:
+        self._ann.save(self._ann_path())
+        self._ann_saved = self._ann.size
+        self._ann_mtime = self._ann_path().stat().st_mtime
+
+    def _ann_outgrown(self) -> bool:
+        target_lists = max(16, int(4 * np.sqrt(len(self._entries))))
+        return self._ann is None or self._ann.n_lists < target_lists // 2
+
+    def _schedule_ann_rebuild(self) -> None:
+        if self._ann_thread is not None and self._ann_thread.is_alive():
+            return
+        self._ann_thread = threading.Thread(
+            target=self.rebuild_ann, name="memory-ann-rebuild", daemon=True
+        )
+        self._ann_thread.start()
+
+    def rebuild_ann(self) -> None:
+        """Train a fresh ANN index if the store lacks one or has outgrown it.
+
+        k-means runs on a snapshot of the vectors without holding the store
+        lock or the file lock, capped by ``settings.ann_train_sample`` rows
+        and ``settings.ann_train_iterations`` rounds; rows added meanwhile
+        are indexed before the new index is swapped in and saved.  Runs in
+        the background after ``add``; call it directly to build eagerly.
+        """
+        with self._ann_build_lock:
+            with self._lock:
+                n = len(self._entries)
+                if (
+                    self._manifest is None
+                    or not settings.ann_enabled
+                    or n < settings.ann_min_entries
+                    or not self._ann_outgrown()
+                ):
+                    return
+                generation = self._manifest["generation"]
+                # Rows below n are never rewritten in place, so the slice
+                # stays valid while other threads append.
+                snapshot = self._matrix[:n]
+
+            index = IVFIndex.train(
+                snapshot,
+                iterations=settings.ann_train_iterations,
+                max_sample=settings.ann_train_sample,
+            )
+
+            with self._lock:
+                if self._manifest is None or self._manifest["generation"] != generation:
+                    return  # compacted meanwhile; the new generation rebuilds
+                index.add(self._vectors[index.size :])
+                self._ann = index
+                self._save_ann()
+
+    def _needs_compaction(self) -> bool:
+        cap = settings.memory_max_entries
+        if cap and len(self._entries) > cap * 1.1:
+            return True
+        return self._manifest["dtype"] != settings.memory_vector_dtype
+
+    def _compact_locked(self) -> None:
+        cap = settings.memory_max_entries
+        keep = slice(-cap, None) if cap and len(self._entries) > cap else slice(None)
+        self._write_generation(
+            self._manifest["generation"] + 1,
+            self._entries[keep],
+            self._vectors[keep],
+        )
+
+    def compact(self) -> None:
+        """Rewrite the store into a fresh generation.
+
+        Drops torn tails, applies ``settings.memory_max_entries`` retention
+        and converts to ``settings.memory_vector_dtype``.  ``add`` calls this
+        automatically when retention or dtype require it.
+        """
+        if not self._manifest_path.exists():
+            return
+        with self._lock, _locked(self._lock_path, exclusive=True):
+            self._sync_locked()
+            self._compact_locked()
+
+    def _migrate(self, legacy: Path) -> None:
+        """One-shot import of the legacy whole-file ``memory.json`` format."""
+        with open(legacy, "r") as f:
+            entries = json.load(f)
+        if entries:
+            vectors = np.array([e.pop("embedding") for e in entries], dtype=np.float32)
+            self._write_generation(1, entries, vectors)
+        legacy.rename(legacy.with_name(legacy.name + ".migrated"))
+
+    # -- embedding matrix ---------------------------------------------------
+
+    @property
+    def _vectors(self) -> np.ndarray:
+        """View of the filled rows of the embedding matrix."""
+        return self._matrix[: len(self._entries)]
+
+    def _append_vectors(self, vecs: np.ndarray) -> None:
+        n = len(self._entries)
+        if n == 0 and self._matrix.shape[1] != vecs.shape[1]:
+            self._matrix = np.empty((0, vecs.shape[1]), dtype=np.float32)
+        if n + len(vecs) > self._matrix.shape[0]:
+            # Grow geometrically so repeated adds stay amortised O(1).
+            grown = np.empty((max(16, 2 * n, n + len(vecs)), vecs.shape[1]), dtype=np.float32)
+            grown[:n] = self._matrix[:n]
+            self._matrix = grown
+        self._matrix[n : n + len(vecs)] = vecs
+
+    # -- embedding ----------------------------------------------------------
+
+    def _get_embedder(self) -> EmbeddingService:
+        if self._embedder is None:
+            self._embedder = get_embedding_service(settings.embedding_model)
+        return self._embedder
+
+    def _embed(self, text: str) -> np.ndarray:
+        return self._get_embedder().embed(text)
+
+    def _embed_many(self, texts: list[str]) -> np.ndarray:
+        return self._get_embedder().embed_many(texts)
 
     # -- public API ---------------------------------------------------------
 
@@ -68,11 +448,17 @@ class MemoryStore:
             "query": query,
             "findings_count": len(findings),
             "report_summary": report_summary[:1000],
-            "embedding": embedding,
             "timestamp": time.time(),
         }
-        self._entries.append(entry)
-        self._save()
+
+        self._path.mkdir(parents=True, exist_ok=True)
+        with self._lock, _locked(self._lock_path, exclusive=True):
+            if not self._sync_locked():
+                self._init_manifest_locked(embedding.shape[0])
+            self._repair_tail_locked()
+            self._append_locked(entry, embedding)
+            if self._needs_compaction():
+                self._compact_locked()
 
     def search(self, query: str, top_k: int = 3, threshold: float = 0.35) -> list[dict]:
         """Find past sessions semantically similar to *query*.
@@ -80,28 +466,74 @@ class MemoryStore:
         Returns up to *top_k* entries whose cosine similarity to the query
         exceeds *threshold*, sorted by descending similarity.
         """
-        if not self._entries:
-            return []
+        return self.search_many([query], top_k=top_k, threshold=threshold)[0]
 
-        query_vec = np.array(self._embed(query))
+    def search_many(
+        self,
+        queries: list[str],
+        top_k: int = 3,
+        threshold: float = 0.35,
+    ) -> list[list[dict]]:
+        """Batch version of :meth:`search`: one result list per query.
 
-        scored: list[tuple[float, dict]] = []
-        for entry in self._entries:
-            entry_vec = np.array(entry["embedding"])
-            similarity = float(np.dot(query_vec, entry_vec))
-            if similarity >= threshold:
-                scored.append((similarity, entry))
+        All queries are embedded in a single ``encode`` call and scored
+        against the store with one matrix product.
+        """
+        self.refresh()
+        if not queries:
+            return []
+        if not self._entries:
+            return [[] for _ in queries]
 
-        scored.sort(key=lambda x: x[0], reverse=True)
+        query_vecs = self._embed_many(queries)
+        with self._lock:
+            # Entries are append-only, so a reference plus the current row
+            # count is a consistent snapshot without copying.
+            entries = self._entries
+            vectors = self._matrix[: len(entries)]
+            k = min(top_k, len(entries))
+            ann = self._ann
+            if ann is not None:
+                scores, ids = ann.search(query_vecs, vectors, k, settings.ann_nprobe)
+        if ann is None:
+            scores, ids = _exact_top_k(query_vecs, vectors, k)
 
         results = []
-        for sim, entry in scored[:top_k]:
-            results.append({
-                "query": entry["query"],
-                "report_summary": entry["report_summary"],
-                "similarity": round(sim, 3),
-            })
+        for row_scores, row_ids in zip(scores, ids):
+            results.append([
+                {
+                    "query": entries[i]["query"],
+                    "report_summary": entries[i]["report_summary"],
+                    "similarity": round(float(score), 3),
+                }
+                for score, i in zip(row_scores.tolist(), row_ids.tolist())
+                if i >= 0 and score >= threshold
+            ])
         return results
 
     def __len__(self) -> int:
         return len(self._entries)
+
+
+_stores_lock = threading.Lock()
+_stores: dict[Path, MemoryStore] = {}
+
+
+def get_memory_store(path: Path = _MEMORY_PATH) -> MemoryStore:
+    """Return the process-wide :class:`MemoryStore` for *path*.
+
+    Graph nodes share this instance, so the store is read from disk once
+    per process and the embedding model stays warm between nodes and runs.
+    """
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = MemoryStore(path)
+            _stores[path] = store
+        return store
+
+
+def release_memory_stores() -> None:
+    """Forget shared stores; the next :func:`get_memory_store` reloads."""
+    with _stores_lock:
+        _stores.clear()
@@ -0,0 +1,332 @@
+"""Latency and outcome instrumentation for nodes, tools, fetches and LLM calls.
+
+Code under measurement runs inside :func:`span`, which records duration
+and, on exit, the exception class if one escaped.  Work done inside a span
+annotates it through the ``note_*`` helpers, which act on the innermost
+open span of the current context (a no-op when there is none):
+
+* :func:`note_results` -- result count (set automatically by
+  :func:`instrument` for functions returning a list);
+* :func:`note_bytes` -- response bytes, from :mod:`http_client`;
+* :func:`note_cache_hit` -- served from a cache;
+* :func:`note_error` -- an exception a tool swallowed, so "failed" and
+  "returned nothing" stay distinguishable.
+
+Every span feeds the process-wide registry (exported as Prometheus text by
+:func:`render_prometheus`) and, inside :func:`track_run`, a per-run
+summary.  With ``settings.otel_enabled`` and ``opentelemetry-api``
+installed, spans are also emitted as OpenTelemetry spans.
+"""
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterator
+
+from config.settings import settings
+
+# Histogram bucket upper bounds, in seconds.
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    "research_agent_span", default=None
+)
+_current_run: contextvars.ContextVar[RunMetrics | None] = contextvars.ContextVar(
+    "research_agent_run", default=None
+)
+
+
+@dataclass
+class Span:
+    kind: str  # "node" | "tool" | "enrichment" | "llm"
+    name: str
+    duration: float = 0.0
+    results: int | None = None
+    bytes: int = 0
+    cache_hit: bool = False
+    error: str | None = None
+
+
+class _Stats:
+    """Aggregate of all spans for one (kind, name)."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.results = 0
+        self.empty = 0
+        self.bytes = 0
+        self.cache_hits = 0
+        self.errors: Counter[str] = Counter()
+        self.buckets = [0] * len(_BUCKETS)
+
+    def add(self, span: Span) -> None:
+        self.count += 1
+        self.total += span.duration
+        self.max = max(self.max, span.duration)
+        if span.results is not None:
+            self.results += span.results
+            self.empty += span.results == 0
+        self.bytes += span.bytes
+        self.cache_hits += span.cache_hit
+        if span.error:
+            self.errors[span.error] += 1
+        for i, bound in enumerate(_BUCKETS):
+            if span.duration <= bound:
+                self.buckets[i] += 1
+                break
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "total_s": round(self.total, 4),
+            "mean_s": round(self.total / self.count, 4) if self.count else 0.0,
+            "max_s": round(self.max, 4),
+            "results": self.results,
+            "empty": self.empty,
+            "bytes": self.bytes,
+            "cache_hits": self.cache_hits,
+            "errors": dict(self.errors),
+        }
+
+
+class _Aggregate:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats: dict[tuple[str, str], _Stats] = {}
+
+    def record(self, span: Span) -> None:
+        with self._lock:
+            stats = self._stats.get((span.kind, span.name))
+            if stats is None:
+                stats = self._stats[(span.kind, span.name)] = _Stats()
+            stats.add(span)
+
+    def summaries(self) -> dict[str, dict[str, dict]]:
+        out: dict[str, dict[str, dict]] = {}
+        with self._lock:
+            for (kind, name), stats in sorted(self._stats.items()):
+                out.setdefault(kind, {})[name] = stats.summary()
+        return out
+
+
+class RunMetrics(_Aggregate):
+    """Spans recorded during one research run (see :func:`track_run`)."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._started = time.perf_counter()
+        self.duration: float | None = None
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self._started
+
+    def summary(self) -> dict:
+        """JSON-serialisable per-run summary, grouped by span kind and name."""
+        duration = self.duration
+        if duration is None:
+            duration = time.perf_counter() - self._started
+        return {"duration_s": round(duration, 4), "spans": self.summaries()}
+
+
+_registry = _Aggregate()
+
+
+# -- recording ----------------------------------------------------------------
+
+@contextlib.contextmanager
+def span(kind: str, name: str) -> Iterator[Span]:
+    """Time the enclosed block as a *kind*/*name* span."""
+    current = Span(kind, name)
+    if not settings.metrics_enabled:
+        yield current
+        return
+
+    token = _current_span.set(current)
+    with contextlib.ExitStack() as stack:
+        otel = _otel_span(stack, current)
+        started = time.perf_counter()
+        try:
+            yield current
+        except BaseException as e:
+            current.error = type(e).__name__
+            raise
+        finally:
+            current.duration = time.perf_counter() - started
+            _current_span.reset(token)
+            _registry.record(current)
+            run = _current_run.get()
+            if run is not None:
+                run.record(current)
+            if otel is not None:
+                _set_otel_attributes(otel, current)
+
+
+def instrument(kind: str, name: str, fn):
+    """Wrap a sync or async callable so every call runs in a span."""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            with span(kind, name) as s:
+                result = await fn(*args, **kwargs)
+                if isinstance(result, list):
+                    s.results = len(result)
+                return result
+
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with span(kind, name) as s:
+            result = fn(*args, **kwargs)
+            if isinstance(result, list):
+                s.results = len(result)
+            return result
+
+    return wrapper
+
+
+def note_results(count: int) -> None:
+    current = _current_span.get()
+    if current is not None:
+        current.results = count
+
+
+def note_bytes(count: int) -> None:
+    current = _current_span.get()
+    if current is not None:
+        current.bytes += count
+
+
+def note_cache_hit() -> None:
+    current = _current_span.get()
+    if current is not None:
+        current.cache_hit = True
+
+
+def note_error(error: BaseException) -> None:
+    """Record an exception that was handled (not re-raised) inside a span."""
+    current = _current_span.get()
+    if current is not None:
+        current.error = type(error).__name__
+
+
+@contextlib.contextmanager
+def track_run() -> Iterator[RunMetrics]:
+    """Collect the spans recorded in this context into a :class:`RunMetrics`."""
+    run = RunMetrics()
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        run.finish()
+        _current_run.reset(token)
+
+
+# -- export -------------------------------------------------------------------
+
+def snapshot() -> dict[str, dict[str, dict]]:
+    """Process-wide aggregates, grouped by span kind and name."""
+    return _registry.summaries()
+
+
+def reset() -> None:
+    global _registry
+    _registry = _Aggregate()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(kind: str, name: str, **extra: str) -> str:
+    pairs = {"kind": kind, "name": name, **extra}
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs.items()) + "}"
+
+
+def render_prometheus() -> str:
+    """Process-wide metrics in the Prometheus text exposition format."""
+    with _registry._lock:
+        items = sorted(_registry._stats.items())
+        lines = [
+            "# HELP research_agent_span_duration_seconds Duration of instrumented operations.",
+            "# TYPE research_agent_span_duration_seconds histogram",
+        ]
+        for (kind, name), stats in items:
+            cumulative = 0
+            for bound, n in zip(_BUCKETS, stats.buckets):
+                cumulative += n
+                lines.append(
+                    f"research_agent_span_duration_seconds_bucket"
+                    f"{_labels(kind, name, le=repr(bound))} {cumulative}"
+                )
+            lines.append(
+                f"research_agent_span_duration_seconds_bucket"
+                f"{_labels(kind, name, le='+Inf')} {stats.count}"
+            )
+            lines.append(f"research_agent_span_duration_seconds_sum{_labels(kind, name)} {stats.total}")
+            lines.append(f"research_agent_span_duration_seconds_count{_labels(kind, name)} {stats.count}")
+
+        for metric, help_text, attr in (
+            ("results", "Results returned by instrumented operations.", "results"),
+            ("empty", "Operations that returned no results.", "empty"),
+            ("bytes", "Response bytes fetched.", "bytes"),
+            ("cache_hits", "Operations served from a cache.", "cache_hits"),
+        ):
+            lines.append(f"# HELP research_agent_{metric}_total {help_text}")
+            lines.append(f"# TYPE research_agent_{metric}_total counter")
+            for (kind, name), stats in items:
+                lines.append(f"research_agent_{metric}_total{_labels(kind, name)} {getattr(stats, attr)}")
+
+        lines.append("# HELP research_agent_errors_total Operations that failed, by error class.")
+        lines.append("# TYPE research_agent_errors_total counter")
+        for (kind, name), stats in items:
+            for error, n in sorted(stats.errors.items()):
+                lines.append(f"research_agent_errors_total{_labels(kind, name, error=error)} {n}")
+    return "\n".join(lines) + "\n"
+
+
+# -- OpenTelemetry (optional) -------------------------------------------------
+
+_tracer = None
+_tracer_checked = False
+
+
+def _get_tracer():
+    global _tracer, _tracer_checked
+    if not _tracer_checked:
+        _tracer_checked = True
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            return None
+        _tracer = trace.get_tracer("research_agent")
+    return _tracer
+
+
+def _otel_span(stack: contextlib.ExitStack, current: Span):
+    """Open an OpenTelemetry span (nested under the current one), if enabled."""
+    if not settings.otel_enabled:
+        return None
+    tracer = _get_tracer()
+    if tracer is None:
+        return None
+    return stack.enter_context(tracer.start_as_current_span(f"{current.kind}.{current.name}"))
+
+
+def _set_otel_attributes(otel, current: Span) -> None:
+    otel.set_attribute("research_agent.kind", current.kind)
+    otel.set_attribute("research_agent.name", current.name)
+    if current.results is not None:
+        otel.set_attribute("research_agent.results", current.results)
+    otel.set_attribute("research_agent.bytes", current.bytes)
+    otel.set_attribute("research_agent.cache_hit", current.cache_hit)
+    if current.error:
+        otel.set_attribute("error.type", current.error)
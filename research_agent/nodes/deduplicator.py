@@ -0,0 +1,7 @@
+from research_agent.dedup import deduplicate
+from research_agent.state import AgentState
+
+
+def deduplicator_node(state: AgentState) -> dict:
+    """Merges findings that refer to the same paper, repo or page."""
+    return {"unique_findings": deduplicate(state["all_findings"])}
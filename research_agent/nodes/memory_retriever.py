@@ -1,11 +1,16 @@
-from research_agent.memory import MemoryStore
+from research_agent.cassette import get_cassette
+from research_agent.memory import get_memory_store
 from research_agent.state import AgentState
 
 
 def memory_retriever_node(state: AgentState) -> dict:
     """Look up past research sessions relevant to the current query."""
-    store = MemoryStore()
+    store = get_memory_store()
     results = store.search(state["original_query"])
+    cassette = get_cassette()
+    if cassette is not None:
+        # Past sessions feed the planner prompt; pin them so replays match.
+        results = cassette.stable("memory", state["original_query"], results)
 
     if not results:
         return {"past_context": ""}
@@ -1,4 +1,4 @@
-from research_agent.memory import MemoryStore
+from research_agent.memory import get_memory_store
 from research_agent.state import AgentState
 
 
@@ -8,7 +8,7 @@ def memory_saver_node(state: AgentState) -> dict:
     if not report:
         return {}
 
-    store = MemoryStore()
+    store = get_memory_store()
     store.add(
         query=state["original_query"],
         findings=state.get("all_findings", []),
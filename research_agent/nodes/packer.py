@@ -0,0 +1,23 @@
+from config.settings import settings
+from research_agent.embeddings import get_embedding_service
+from research_agent.events import ContextPacked, emit
+from research_agent.packing import pack_findings
+from research_agent.state import AgentState
+
+
+def packer_node(state: AgentState) -> dict:
+    """Fits the findings into the synthesizer's token budget."""
+    findings = state.get("unique_findings", state["all_findings"])
+    if not settings.context_packing_enabled:
+        return {"packed_findings": findings, "dropped_findings": []}
+
+    result = pack_findings(
+        state["original_query"],
+        findings,
+        budget=settings.context_token_budget,
+        max_finding_tokens=settings.context_max_finding_tokens,
+        source_weights=settings.context_source_weights,
+        embedder=get_embedding_service(),
+    )
+    emit(ContextPacked(len(result.findings), len(result.dropped), result.trimmed, result.tokens))
+    return {"packed_findings": result.findings, "dropped_findings": result.dropped}
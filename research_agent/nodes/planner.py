@@ -1,15 +1,14 @@
 from langchain_core.output_parsers import JsonOutputParser
 
 from config.settings import settings
-from research_agent.llm import get_llm
+from research_agent import metrics
+from research_agent.llm import allm_slot, get_llm, llm_identity, llm_slot
+from research_agent.llm_cache import get_llm_cache
 from research_agent.prompts import PLANNER_PROMPT
 from research_agent.state import AgentState, SubTask
 
 
-def planner_node(state: AgentState) -> dict:
-    """Decomposes the user's query into 2-5 actionable sub-tasks."""
-    llm = get_llm()
-    chain = PLANNER_PROMPT | llm | JsonOutputParser()
+def _planner_messages(state: AgentState):
     past_context = state.get("past_context", "")
     if past_context:
         past_context_block = (
@@ -18,11 +17,13 @@ def planner_node(state: AgentState) -> dict:
     else:
         past_context_block = ""
 
-    result = chain.invoke({
-        "query": state["original_query"],
-        "past_context_block": past_context_block,
-    })
+    return PLANNER_PROMPT.format_messages(
+        query=state["original_query"],
+        past_context_block=past_context_block,
+    )
+
 
+def _plan_update(result: dict) -> dict:
     sub_tasks: list[SubTask] = []
     for i, task in enumerate(result["sub_tasks"][:settings.max_sub_tasks]):
         sub_tasks.append(
@@ -36,3 +37,45 @@ def planner_node(state: AgentState) -> dict:
         )
 
     return {"sub_tasks": sub_tasks, "current_task_index": 0}
+
+
+def planner_node(state: AgentState) -> dict:
+    """Decomposes the user's query into 2-5 actionable sub-tasks."""
+    messages = _planner_messages(state)
+    question = state["original_query"]
+    cache = get_llm_cache()
+    model = llm_identity()
+    with metrics.span("llm", "planner"):
+        result = None
+        if cache is not None:
+            result = cache.lookup("planner", model, messages, question=question)
+        if result is not None:
+            metrics.note_cache_hit()
+        else:
+            with llm_slot():
+                result = (get_llm() | JsonOutputParser()).invoke(messages)
+            if cache is not None:
+                cache.update("planner", model, messages, result, question=question)
+
+    return _plan_update(result)
+
+
+async def aplanner_node(state: AgentState) -> dict:
+    """Async variant of :func:`planner_node`."""
+    messages = _planner_messages(state)
+    question = state["original_query"]
+    cache = get_llm_cache()
+    model = llm_identity()
+    with metrics.span("llm", "planner"):
+        result = None
+        if cache is not None:
+            result = cache.lookup("planner", model, messages, question=question)
+        if result is not None:
+            metrics.note_cache_hit()
+        else:
+            async with allm_slot():
+                result = await (get_llm() | JsonOutputParser()).ainvoke(messages)
+            if cache is not None:
+                cache.update("planner", model, messages, result, question=question)
+
+    return _plan_update(result)
@@ -1,57 +1,287 @@
-from research_agent.state import AgentState
-from research_agent.tools.registry import get_tool
-from research_agent.tools.web_reader import read_webpage
+import asyncio
+import contextvars
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
 
-_SKIP_ENRICHMENT = {"github"}
+from config.settings import settings
+from research_agent import metrics
+from research_agent.events import EnrichmentDone, TaskDone, TaskFailed, TaskStarted, emit
+from research_agent.state import AgentState, SubTask, TaskResult, TaskState
+from research_agent.tools.http_client import HostLimiter
+from research_agent.tools.registry import get_async_tool, get_tool
+from research_agent.tools.web_reader import aread_webpage, read_webpage
 
+_enrich_lock = threading.Lock()
+_enrich_limiter: HostLimiter | None = None
 
-def _enrich_findings(results: list[dict]) -> None:
-    """Enrich top 2 findings with full web page content."""
-    for finding in results[:2]:
-        if finding.get("source_type") in _SKIP_ENRICHMENT:
+
+def _limiter() -> HostLimiter:
+    global _enrich_limiter
+    with _enrich_lock:
+        if _enrich_limiter is None:
+            _enrich_limiter = HostLimiter(settings.enrichment_per_host_limit)
+        return _enrich_limiter
+
+
+def _enrichment_candidates(results: list[dict]) -> list[dict]:
+    """Pick the findings to enrich: the top N of each source type.
+
+    N comes from ``settings.enrichment_depth`` keyed by ``source_type``,
+    falling back to ``settings.enrichment_default_depth``.
+    """
+    taken: Counter[str] = Counter()
+    candidates = []
+    for finding in results:
+        source_type = finding.get("source_type", "")
+        depth = settings.enrichment_depth.get(source_type, settings.enrichment_default_depth)
+        if taken[source_type] < depth and finding.get("url"):
+            taken[source_type] += 1
+            candidates.append(finding)
+    return candidates
+
+
+def new_enrichment_deadline() -> float:
+    """Wall-clock time at which a run starting now must stop enriching.
+
+    Taken once per run, when research starts, and carried in the graph
+    state so ``settings.enrichment_deadline`` bounds the whole run's
+    enrichment rather than each sub-task's.
+    """
+    return time.time() + settings.enrichment_deadline
+
+
+def _remaining(deadline: float | None) -> float:
+    if deadline is None:
+        return settings.enrichment_deadline
+    return max(0.0, deadline - time.time())
+
+
+def _read_limited(url: str, query: str | None, deadline: float) -> str | None:
+    """Fetch *url* under its host slot, giving up at *deadline*.
+
+    Waiting for the slot and each phase of the request are bounded by the
+    time left, so a fetch abandoned by :func:`_enrich_findings` frees its
+    slot and connection around the deadline rather than after the full
+    request timeout.
+    """
+    with metrics.span("enrichment", "webpage") as span:
+        slot = _limiter().slot(url)
+        if not slot.acquire(timeout=_remaining(deadline)):
+            return None
+        try:
+            content = read_webpage(url, query, timeout=_remaining(deadline))
+        finally:
+            slot.release()
+        span.results = int(bool(content))
+        return content
+
+
+async def _aread_limited(url: str, query: str | None, deadline: float) -> str | None:
+    with metrics.span("enrichment", "webpage") as span:
+        async with _limiter().aslot(url):
+            content = await aread_webpage(url, query, timeout=_remaining(deadline))
+        span.results = int(bool(content))
+        return content
+
+
+def _enrich_findings(
+    results: list[dict], query: str | None = None, deadline: float | None = None
+) -> int:
+    """Enrich the top findings with the page passages most relevant to *query*.
+
+    All candidate pages are fetched concurrently.  Fetches still running
+    at the run's *deadline* (see :func:`new_enrichment_deadline`; without
+    one, ``settings.enrichment_deadline`` from now) are abandoned and their
+    findings keep the original snippet.  Returns the number enriched.
+    """
+    candidates = _enrichment_candidates(results)
+    timeout = _remaining(deadline)
+    if not candidates or not timeout:
+        return 0
+    deadline = time.time() + timeout
+
+    pool = ThreadPoolExecutor(max_workers=len(candidates))
+    # Each fetch runs in a copy of this context so its metrics span reaches
+    # the current run.
+    futures = {
+        pool.submit(contextvars.copy_context().run, _read_limited, f["url"], query, deadline): f
+        for f in candidates
+    }
+    done, _ = wait(futures, timeout=timeout)
+    pool.shutdown(wait=False, cancel_futures=True)
+
+    enriched = 0
+    for future in done:
+        try:
+            content = future.result()
+        except Exception:
             continue
+        if content:
+            futures[future]["snippet"] = content
+            enriched += 1
+    return enriched
+
+
+async def _aenrich_findings(
+    results: list[dict], query: str | None = None, deadline: float | None = None
+) -> int:
+    """Async variant of :func:`_enrich_findings`."""
+    candidates = _enrichment_candidates(results)
+    timeout = _remaining(deadline)
+    if not candidates or not timeout:
+        return 0
+    deadline = time.time() + timeout
+
+    tasks = {
+        asyncio.ensure_future(_aread_limited(f["url"], query, deadline)): f
+        for f in candidates
+    }
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        task.cancel()
+
+    enriched = 0
+    for task in done:
         try:
-            content = read_webpage(finding["url"])
-            if content:
-                finding["snippet"] = content[:2000]
+            content = task.result()
         except Exception:
-            pass
+            continue
+        if content:
+            tasks[task]["snippet"] = content
+            enriched += 1
+    return enriched
 
 
-def researcher_node(state: AgentState) -> dict:
-    """Executes the current sub-task by calling the appropriate tool."""
-    idx = state["current_task_index"]
-    sub_tasks = state["sub_tasks"]
+def _failed(task: SubTask, error: Exception, started: float) -> TaskResult:
+    message = f"Task {task['id']} ({task['tool']}:{task['query']}): {error}"
+    emit(TaskFailed(task["id"], task["tool"], message, time.perf_counter() - started))
+    return TaskResult(id=task["id"], status="failed", findings=[], error=message)
+
+
+def _done(task: SubTask, results: list[dict], started: float) -> TaskResult:
+    emit(TaskDone(task["id"], task["tool"], len(results), time.perf_counter() - started))
+    return TaskResult(id=task["id"], status="done", findings=results, error="")
 
-    if idx >= len(sub_tasks):
-        return {"current_task_index": idx}
 
-    task = sub_tasks[idx]
-    new_findings = []
-    new_errors = []
+def run_sub_task(task: SubTask, deadline: float | None = None) -> TaskResult:
+    """Run a single sub-task: call its tool and enrich the top results.
 
+    Enrichment stops at *deadline* (see :func:`new_enrichment_deadline`).
+    """
+    started = time.perf_counter()
+    emit(TaskStarted(task["id"], task["tool"], task["query"]))
     try:
         tool_fn = get_tool(task["tool"])
         results = tool_fn(task["query"])
 
+        enrich_started = time.perf_counter()
         try:
-            _enrich_findings(results)
+            enriched = _enrich_findings(results, task["query"], deadline)
         except Exception:
-            pass
+            enriched = 0
+        emit(EnrichmentDone(task["id"], enriched, time.perf_counter() - enrich_started))
+
+        return _done(task, results, started)
+    except Exception as e:
+        return _failed(task, e, started)
 
-        new_findings = results
 
-        sub_tasks = [dict(t) for t in sub_tasks]
-        sub_tasks[idx]["status"] = "done"
-        sub_tasks[idx]["findings"] = results
+async def arun_sub_task(task: SubTask, deadline: float | None = None) -> TaskResult:
+    """Async variant of :func:`run_sub_task` using the async tool registry."""
+    started = time.perf_counter()
+    emit(TaskStarted(task["id"], task["tool"], task["query"]))
+    try:
+        tool_fn = get_async_tool(task["tool"])
+        results = await tool_fn(task["query"])
+
+        enrich_started = time.perf_counter()
+        try:
+            enriched = await _aenrich_findings(results, task["query"], deadline)
+        except Exception:
+            enriched = 0
+        emit(EnrichmentDone(task["id"], enriched, time.perf_counter() - enrich_started))
+
+        return _done(task, results, started)
     except Exception as e:
-        sub_tasks = [dict(t) for t in sub_tasks]
-        sub_tasks[idx]["status"] = "failed"
-        new_errors = [f"Task {idx} ({task['tool']}:{task['query']}): {e}"]
+        return _failed(task, e, started)
+
+
+def _run_deadline(state: AgentState) -> float:
+    # The first sequential step starts the run's enrichment clock.
+    return state.get("enrichment_deadline") or new_enrichment_deadline()
+
+
+def _apply_result(state: AgentState, result: TaskResult, deadline: float) -> dict:
+    idx = state["current_task_index"]
+    sub_tasks = [dict(t) for t in state["sub_tasks"]]
+    sub_tasks[idx]["status"] = result["status"]
+    sub_tasks[idx]["findings"] = result["findings"]
 
     return {
         "sub_tasks": sub_tasks,
         "current_task_index": idx + 1,
-        "all_findings": new_findings,
-        "errors": new_errors,
+        "all_findings": result["findings"],
+        "errors": [result["error"]] if result["error"] else [],
+        "enrichment_deadline": deadline,
+    }
+
+
+def researcher_node(state: AgentState) -> dict:
+    """Executes the current sub-task by calling the appropriate tool."""
+    idx = state["current_task_index"]
+    if idx >= len(state["sub_tasks"]):
+        return {"current_task_index": idx}
+    deadline = _run_deadline(state)
+    return _apply_result(state, run_sub_task(state["sub_tasks"][idx], deadline), deadline)
+
+
+async def aresearcher_node(state: AgentState) -> dict:
+    """Async entry point for :func:`researcher_node`."""
+    idx = state["current_task_index"]
+    if idx >= len(state["sub_tasks"]):
+        return {"current_task_index": idx}
+    deadline = _run_deadline(state)
+    return _apply_result(state, await arun_sub_task(state["sub_tasks"][idx], deadline), deadline)
+
+
+def research_task_node(state: TaskState) -> dict:
+    """Parallel researcher branch: runs the single sub-task it was sent."""
+    return {"task_results": [run_sub_task(state["task"], state.get("enrichment_deadline"))]}
+
+
+async def aresearch_task_node(state: TaskState) -> dict:
+    """Async entry point for :func:`research_task_node`."""
+    return {"task_results": [await arun_sub_task(state["task"], state.get("enrichment_deadline"))]}
+
+
+def collect_results_node(state: AgentState) -> dict:
+    """Fan-in: merge parallel task results back in sub-task order.
+
+    Branches finish in arbitrary order, so findings and errors are rebuilt
+    from ``task_results`` sorted by task id to keep the synthesizer's
+    citation numbering deterministic.
+    """
+    results = {r["id"]: r for r in state.get("task_results", [])}
+
+    sub_tasks = []
+    findings = []
+    errors = []
+    for task in state["sub_tasks"]:
+        task = dict(task)
+        result = results.get(task["id"])
+        if result is not None:
+            task["status"] = result["status"]
+            task["findings"] = result["findings"]
+            findings.extend(result["findings"])
+            if result["error"]:
+                errors.append(result["error"])
+        sub_tasks.append(task)
+
+    return {
+        "sub_tasks": sub_tasks,
+        "current_task_index": len(sub_tasks),
+        "all_findings": findings,
+        "errors": errors,
     }
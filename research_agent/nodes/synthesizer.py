@@ -1,23 +1,65 @@
-from research_agent.llm import get_llm
+from research_agent import metrics
+from research_agent.llm import allm_slot, get_llm, llm_identity, llm_slot
+from research_agent.llm_cache import get_llm_cache
 from research_agent.prompts import SYNTHESIZER_PROMPT
 from research_agent.state import AgentState
 
 
+def _report_findings(state: AgentState) -> list[dict]:
+    """The most processed findings available: packed, deduplicated or raw."""
+    for key in ("packed_findings", "unique_findings"):
+        if key in state:
+            return state[key]
+    return state["all_findings"]
+
+
+def _synthesizer_messages(state: AgentState):
+    findings_text = _format_findings(_report_findings(state))
+    errors_text = "\n".join(state.get("errors", [])) or "None"
+
+    return SYNTHESIZER_PROMPT.format_messages(
+        query=state["original_query"],
+        findings=findings_text,
+        errors=errors_text,
+    )
+
+
 def synthesizer_node(state: AgentState) -> dict:
     """Combines all findings into a cited markdown report."""
-    llm = get_llm()
+    messages = _synthesizer_messages(state)
+    cache = get_llm_cache()
+    model = llm_identity()
+    with metrics.span("llm", "synthesizer"):
+        report = cache.lookup("synthesizer", model, messages) if cache is not None else None
+        if report is not None:
+            metrics.note_cache_hit()
+        else:
+            # Streamed so LangGraph's "messages" mode can relay tokens as they
+            # arrive (see research_agent.events).
+            with llm_slot():
+                report = "".join(chunk.content for chunk in get_llm().stream(messages))
+            if cache is not None:
+                cache.update("synthesizer", model, messages, report)
+
+    return {"final_report": report}
 
-    findings_text = _format_findings(state["all_findings"])
-    errors_text = "\n".join(state.get("errors", [])) or "None"
 
-    chain = SYNTHESIZER_PROMPT | llm
-    result = chain.invoke({
-        "query": state["original_query"],
-        "findings": findings_text,
-        "errors": errors_text,
-    })
+async def asynthesizer_node(state: AgentState) -> dict:
+    """Async variant of :func:`synthesizer_node`."""
+    messages = _synthesizer_messages(state)
+    cache = get_llm_cache()
+    model = llm_identity()
+    with metrics.span("llm", "synthesizer"):
+        report = cache.lookup("synthesizer", model, messages) if cache is not None else None
+        if report is not None:
+            metrics.note_cache_hit()
+        else:
+            async with allm_slot():
+                report = "".join([chunk.content async for chunk in get_llm().astream(messages)])
+            if cache is not None:
+                cache.update("synthesizer", model, messages, report)
 
-    return {"final_report": result.content}
+    return {"final_report": report}
 
 
 def _format_findings(findings: list[dict]) -> str:
@@ -27,8 +69,9 @@ def _format_findings(findings: list[dict]) -> str:
 
     parts = []
     for i, f in enumerate(findings, 1):
+        sources = ", ".join(f.get("sources", [f["source_type"]]))
         parts.append(
-            f"[{i}] ({f['source_type']}) {f['title']}\n"
+            f"[{i}] ({sources}) {f['title']}\n"
             f"    URL: {f['url']}\n"
             f"    Excerpt: {f['snippet']}\n"
         )
@@ -0,0 +1,152 @@
+"""Token-budget packing of findings for the synthesizer prompt.
+
+:func:`pack_findings` keeps the synthesizer prompt within a fixed token
+budget however many findings come back:
+
+1. findings are ranked by embedding similarity to the research question;
+2. each finding's snippet is trimmed to its most relevant sentences (kept
+   in their original order) up to a per-finding cap;
+3. the budget is split across source types by weight, each source filling
+   its share with its best findings; unused share then goes to the best
+   remaining findings overall.
+
+Kept findings stay in their original order so citation numbers are stable.
+Token counts are estimated (about four characters per token), which is
+close enough for budgeting without depending on a provider tokenizer.
+"""
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from research_agent.state import Citation
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+# Fixed per-finding cost of the "[N] (source) ... URL: ... Excerpt:" frame.
+_FRAME_TOKENS = 8
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / 4)
+
+
+def split_sentences(text: str) -> list[str]:
+    return [s for s in _SENTENCE_END.split(text.strip()) if s]
+
+
+@dataclass
+class PackResult:
+    findings: list[Citation]
+    dropped: list[Citation] = field(default_factory=list)
+    trimmed: int = 0
+    tokens: int = 0
+
+
+def _header_tokens(finding: Citation) -> int:
+    return _FRAME_TOKENS + estimate_tokens(finding["title"]) + estimate_tokens(finding["url"])
+
+
+def _trim(sentences: list[str], scores: np.ndarray, max_tokens: int) -> str:
+    """Keep the highest-scoring sentences that fit in *max_tokens*."""
+    keep = []
+    used = 0
+    for i in np.argsort(-scores, kind="stable"):
+        cost = estimate_tokens(sentences[i]) + 1
+        if used + cost > max_tokens:
+            continue
+        keep.append(i)
+        used += cost
+    if not keep and sentences:
+        # Even the best sentence is over the cap: cut it.
+        return sentences[int(np.argmax(scores))][: max_tokens * 4]
+    return " ".join(sentences[i] for i in sorted(keep))
+
+
+def _relevance(query: str, findings: list[Citation], sentences: list[list[str]], embedder):
+    """Per-finding and per-sentence similarity to *query*.
+
+    Everything is embedded in one batch.  The texts are specific to this
+    run, so their vectors are not cached, in memory or on disk.
+    Without an embedder (or if it fails) all scores are zero, which keeps
+    the original order.
+    """
+    finding_scores = np.zeros(len(findings), dtype=np.float32)
+    sentence_scores = [np.zeros(len(s), dtype=np.float32) for s in sentences]
+    if embedder is None or not findings:
+        return finding_scores, sentence_scores
+
+    texts = [query] + [f"{f['title']}. {f['snippet']}" for f in findings]
+    for group in sentences:
+        texts.extend(group)
+    try:
+        vecs = embedder.embed_many(texts, cache=False)
+    except Exception:
+        return finding_scores, sentence_scores
+
+    scores = vecs[1:] @ vecs[0]
+    finding_scores = scores[: len(findings)]
+    offset = len(findings)
+    for i, group in enumerate(sentences):
+        sentence_scores[i] = scores[offset : offset + len(group)]
+        offset += len(group)
+    return finding_scores, sentence_scores
+
+
+def pack_findings(
+    query: str,
+    findings: list[Citation],
+    budget: int,
+    max_finding_tokens: int,
+    source_weights: dict[str, float] | None = None,
+    embedder=None,
+) -> PackResult:
+    """Select and trim *findings* so their prompt text fits in *budget* tokens."""
+    source_weights = source_weights or {}
+    sentences = [split_sentences(f["snippet"]) for f in findings]
+    relevance, sentence_scores = _relevance(query, findings, sentences, embedder)
+
+    packed: list[Citation] = []
+    costs: list[int] = []
+    trimmed = 0
+    for finding, group, scores in zip(findings, sentences, sentence_scores):
+        snippet = finding["snippet"]
+        if estimate_tokens(snippet) > max_finding_tokens:
+            snippet = _trim(group, scores, max_finding_tokens)
+            trimmed += 1
+        packed.append(dict(finding, snippet=snippet))
+        costs.append(_header_tokens(finding) + estimate_tokens(snippet))
+
+    order = sorted(range(len(findings)), key=lambda i: -relevance[i])
+    by_source: dict[str, list[int]] = {}
+    for i in order:
+        by_source.setdefault(findings[i]["source_type"], []).append(i)
+
+    weights = {s: source_weights.get(s, 1.0) for s in by_source}
+    total_weight = sum(weights.values()) or 1.0
+
+    selected: set[int] = set()
+    used = 0
+    for source, indices in by_source.items():
+        share = budget * weights[source] / total_weight
+        spent = 0
+        for i in indices:
+            if spent + costs[i] <= share:
+                selected.add(i)
+                spent += costs[i]
+        used += spent
+
+    # Second pass: hand the unused share to the best remaining findings.
+    for i in order:
+        if i not in selected and used + costs[i] <= budget:
+            selected.add(i)
+            used += costs[i]
+
+    return PackResult(
+        findings=[packed[i] for i in sorted(selected)],
+        dropped=[findings[i] for i in range(len(findings)) if i not in selected],
+        trimmed=trimmed,
+        tokens=used,
+    )
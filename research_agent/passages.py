@@ -0,0 +1,150 @@
+"""Query-relevant passage selection for long pages and transcripts.
+
+Enriched pages and video transcripts used to be cut to their first couple
+of thousand characters, which rarely contains the part a sub-task asked
+about.  :func:`select_passages` instead chunks the document, scores every
+chunk against the query with BM25, and returns the best chunks (in
+document order) within a character budget.
+
+The input is an iterable of text pieces (page lines, transcript segments),
+consumed in one streaming pass: pieces are grouped into chunks with a
+single ``join`` per chunk, only query-term counts are kept per chunk, and
+the text of chunks that match no query term is discarded immediately, so
+multi-megabyte transcripts are never re-sliced or held in full.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Iterable, Iterator
+
+_WORD = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from how in is it of on or the this to vs what "
+    "when where which who why with".split()
+)
+_SEPARATOR = " … "
+
+# BM25 parameters (standard defaults).
+_K1 = 1.2
+_B = 0.75
+# Matching chunks kept as candidates; bounds memory on huge documents.
+_MAX_CANDIDATES = 256
+
+
+def query_terms(query: str) -> set[str]:
+    return {w for w in _WORD.findall(query.lower()) if w not in _STOPWORDS}
+
+
+def text_pieces(text: str) -> Iterator[str]:
+    """Lazily split *text* into stripped, non-empty lines.
+
+    Each line is sliced out as it is reached, so only one line is copied
+    at a time.
+    """
+    start = 0
+    while start < len(text):
+        end = text.find("\n", start)
+        if end < 0:
+            end = len(text)
+        line = text[start:end].strip()
+        if line:
+            yield line
+        start = end + 1
+
+
+def iter_chunks(pieces: Iterable[str], chunk_chars: int) -> Iterator[str]:
+    """Group *pieces* into chunks of about *chunk_chars* characters.
+
+    Pieces longer than a chunk are split at word boundaries.
+    """
+    buffer: list[str] = []
+    size = 0
+    for piece in pieces:
+        while len(piece) > chunk_chars:
+            cut = piece.rfind(" ", 0, chunk_chars)
+            cut = cut if cut > 0 else chunk_chars
+            if buffer:
+                yield " ".join(buffer)
+                buffer, size = [], 0
+            yield piece[:cut]
+            piece = piece[cut:].lstrip()
+        if size + len(piece) > chunk_chars and buffer:
+            yield " ".join(buffer)
+            buffer, size = [], 0
+        if piece:
+            buffer.append(piece)
+            size += len(piece) + 1
+    if buffer:
+        yield " ".join(buffer)
+
+
+def _head(chunks: list[str], budget: int) -> str:
+    return " ".join(chunks)[:budget]
+
+
+def select_passages(
+    pieces: Iterable[str],
+    query: str,
+    budget: int,
+    chunk_chars: int = 500,
+) -> str:
+    """Return the chunks of *pieces* most relevant to *query*, up to *budget* chars.
+
+    Falls back to the start of the document when no chunk mentions any
+    query term.
+    """
+    terms = query_terms(query)
+    head: list[str] = []
+    head_size = 0
+    candidates: list[tuple[int, str, Counter, int]] = []
+    doc_freq: Counter[str] = Counter()
+    n_chunks = 0
+    total_len = 0
+
+    for position, chunk in enumerate(iter_chunks(pieces, chunk_chars)):
+        words = _WORD.findall(chunk.lower())
+        n_chunks += 1
+        total_len += len(words)
+        if head_size < budget:
+            head.append(chunk)
+            head_size += len(chunk) + 1
+
+        tf = Counter(w for w in words if w in terms)
+        if not tf:
+            continue
+        doc_freq.update(tf.keys())
+        candidates.append((position, chunk, tf, len(words)))
+        if len(candidates) > 2 * _MAX_CANDIDATES:
+            # Keep the candidates with the most distinct query terms, then hits.
+            candidates = heapq.nlargest(
+                _MAX_CANDIDATES, candidates, key=lambda c: (len(c[2]), sum(c[2].values()))
+            )
+
+    if not candidates:
+        return _head(head, budget)
+
+    avg_len = total_len / n_chunks
+    idf = {
+        t: math.log(1 + (n_chunks - df + 0.5) / (df + 0.5)) for t, df in doc_freq.items()
+    }
+
+    def score(candidate) -> float:
+        _, _, tf, length = candidate
+        norm = _K1 * (1 - _B + _B * length / avg_len)
+        return sum(idf[t] * f * (_K1 + 1) / (f + norm) for t, f in tf.items())
+
+    chosen = []
+    used = 0
+    for candidate in sorted(candidates, key=score, reverse=True):
+        cost = len(candidate[1]) + len(_SEPARATOR)
+        if used + cost > budget:
+            continue
+        chosen.append(candidate)
+        used += cost
+    if not chosen:
+        return max(candidates, key=score)[1][:budget]
+
+    return _SEPARATOR.join(c[1] for c in sorted(chosen, key=lambda c: c[0]))
@@ -0,0 +1,200 @@
+"""Opt-in per-node profiling with flamegraph-ready output.
+
+Enabled with ``main.py --profile DIR`` or the ``PROFILE_DIR`` setting;
+when off, nodes are not wrapped at all, so there is no overhead.
+
+:class:`NodeProfiler` wraps each graph node and produces, in its output
+directory:
+
+* ``<node>.prof`` -- cProfile statistics for every call of a sync node,
+  merged across calls (open with ``pstats`` or snakeviz);
+* ``stacks.collapsed`` -- wall-clock stack samples from all nodes in the
+  collapsed format read by ``flamegraph.pl`` and speedscope, rooted at the
+  node name, so network waits show up alongside CPU time.
+
+Since Python 3.12 cProfile hooks the process-wide ``sys.monitoring``, so
+only one profile can be enabled at a time.  A sync node call runs under
+cProfile only if it gets the process-wide profiling slot; calls that
+overlap it (parallel researcher branches, server workers) are covered by
+the sampler only.  Async nodes interleave on one thread and are always
+sampler-only (samples go to the innermost node active on the loop's thread).
+"""
+from __future__ import annotations
+
+import atexit
+import cProfile
+import functools
+import inspect
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+
+from config.settings import settings
+
+# Held while a cProfile.Profile is enabled, across all profilers.
+_cprofile_slot = threading.Lock()
+
+
+class NodeProfiler:
+    """Profiles graph nodes; call :meth:`write` to flush the artifacts."""
+
+    def __init__(self, output_dir: Path, interval: float = 0.005) -> None:
+        self.output_dir = Path(output_dir)
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stats: dict[str, pstats.Stats] = {}
+        self._active: dict[int, list[str]] = {}
+        self._stacks: Counter[str] = Counter()
+        self._wrapper_codes: set = set()
+        self._stop = threading.Event()
+        self._sampler: threading.Thread | None = None
+
+    # -- wrapping -----------------------------------------------------------
+
+    def wrap(self, name: str, fn):
+        """Return *fn* (sync or async) profiled as node *name*."""
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                self._enter(name)
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    self._exit()
+
+            self._wrapper_codes.add(async_wrapper.__code__)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            self._enter(name)
+            try:
+                profile = self._start_cprofile()
+                if profile is None:
+                    return fn(*args, **kwargs)
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    profile.disable()
+                    _cprofile_slot.release()
+                    self._add_stats(name, profile)
+            finally:
+                self._exit()
+
+        self._wrapper_codes.add(wrapper.__code__)
+        return wrapper
+
+    @staticmethod
+    def _start_cprofile() -> cProfile.Profile | None:
+        """An enabled profile, or None if another one is active in the process."""
+        if not _cprofile_slot.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # a profiler outside this module (Python 3.12+)
+            _cprofile_slot.release()
+            return None
+        return profile
+
+    def _enter(self, name: str) -> None:
+        self._ensure_sampler()
+        with self._lock:
+            self._active.setdefault(threading.get_ident(), []).append(name)
+
+    def _exit(self) -> None:
+        tid = threading.get_ident()
+        with self._lock:
+            names = self._active.get(tid)
+            if names:
+                names.pop()
+                if not names:
+                    del self._active[tid]
+
+    def _add_stats(self, name: str, profile: cProfile.Profile) -> None:
+        profile.create_stats()
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                self._stats[name] = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+
+    # -- sampling -----------------------------------------------------------
+
+    def _ensure_sampler(self) -> None:
+        with self._lock:
+            if self._sampler is None:
+                self._sampler = threading.Thread(
+                    target=self._sample_loop, name="node-profiler", daemon=True
+                )
+                self._sampler.start()
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                active = {tid: names[-1] for tid, names in self._active.items()}
+            for tid, node in active.items():
+                frame = frames.get(tid)
+                if frame is None:
+                    continue
+                stack = []
+                # Walk up to (not past) the profiler's wrapper frame.
+                while frame is not None and frame.f_code not in self._wrapper_codes:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+                    frame = frame.f_back
+                stack.append(node)
+                with self._lock:
+                    self._stacks[";".join(reversed(stack))] += 1
+
+    # -- output -------------------------------------------------------------
+
+    def write(self) -> list[Path]:
+        """Write per-node ``.prof`` files and ``stacks.collapsed``; returns paths."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        written = []
+        with self._lock:
+            stats = dict(self._stats)
+            stacks = dict(self._stacks)
+        for name, node_stats in stats.items():
+            path = self.output_dir / f"{name}.prof"
+            node_stats.dump_stats(path)
+            written.append(path)
+
+        path = self.output_dir / "stacks.collapsed"
+        with open(path, "w") as f:
+            for stack, count in sorted(stacks.items()):
+                f.write(f"{stack} {count}\n")
+        written.append(path)
+        return written
+
+    def stop(self) -> list[Path]:
+        """Stop sampling and write the artifacts."""
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        return self.write()
+
+
+_lock = threading.Lock()
+_profiler: NodeProfiler | None = None
+
+
+def get_profiler() -> NodeProfiler | None:
+    """The process-wide profiler when ``settings.profile_dir`` is set.
+
+    Its artifacts are written at interpreter exit.
+    """
+    global _profiler
+    if settings.profile_dir is None:
+        return None
+    with _lock:
+        if _profiler is None:
+            _profiler = NodeProfiler(settings.profile_dir, settings.profile_interval)
+            atexit.register(_profiler.stop)
+        return _profiler
@@ -0,0 +1,57 @@
+"""Warm-up and shutdown hooks for long-lived processes.
+
+A one-shot CLI run can rely on lazy loading, but a server or batch worker
+should call :func:`warm_up` before accepting work, so the first request
+doesn't pay for model loading, and :func:`shutdown` on exit.  Async LLM
+and HTTP clients are bound to their event loop, so code running graphs on
+a loop also calls :func:`awarm_up` once the loop is running and
+:func:`ashutdown` before it ends.
+
+The hooks import what they touch when called, so importing this module
+(as ``main.py`` does) stays cheap.
+"""
+from __future__ import annotations
+
+
+def warm_up() -> None:
+    """Load the embedding model, open the memory store, LLM client and HTTP pool."""
+    from research_agent.embeddings import get_embedding_model
+    from research_agent.llm import get_llm
+    from research_agent.memory import get_memory_store
+    from research_agent.tools import http_client
+
+    get_embedding_model()
+    get_llm()
+    get_memory_store()
+    http_client.get_client()
+
+
+def shutdown() -> None:
+    """Release shared resources created by :func:`warm_up` or lazily."""
+    from research_agent.embeddings import release_embedding_models
+    from research_agent.llm import release_llm_clients
+    from research_agent.memory import release_memory_stores
+    from research_agent.tools import http_client
+
+    http_client.close_client()
+    release_llm_clients()
+    release_memory_stores()
+    release_embedding_models()
+
+
+async def awarm_up() -> None:
+    """Create the running event loop's LLM client and HTTP pool."""
+    from research_agent.llm import get_llm
+    from research_agent.tools import http_client
+
+    get_llm()
+    http_client.get_async_client()
+
+
+async def ashutdown() -> None:
+    """Close the running event loop's HTTP pool and drop its LLM clients."""
+    from research_agent.llm import release_loop_llm_clients
+    from research_agent.tools import http_client
+
+    await http_client.aclose_client()
+    release_loop_llm_clients()
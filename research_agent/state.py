@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import operator
-from typing import Annotated, TypedDict
+from typing import Annotated, NotRequired, TypedDict
 
 
 class Citation(TypedDict):
@@ -10,6 +10,9 @@ class Citation(TypedDict):
     title: str
     url: str
     snippet: str
+    ids: NotRequired[dict[str, str]]  # e.g. {"arxiv": "2106.09685", "doi": "10.48550/..."}
+    sources: NotRequired[list[str]]  # source types merged into this citation by dedup
+    alternate_urls: NotRequired[list[str]]
 
 
 class SubTask(TypedDict):
@@ -21,12 +24,45 @@ class SubTask(TypedDict):
     findings: list[Citation]
 
 
+class TaskResult(TypedDict):
+    """Outcome of one sub-task, produced by a parallel researcher branch."""
+    id: int
+    status: str  # "done" | "failed"
+    findings: list[Citation]
+    error: str
+
+
+class TaskState(TypedDict):
+    """Input sent to a parallel researcher branch (one per sub-task)."""
+    task: SubTask
+    enrichment_deadline: NotRequired[float]  # time.time() at which the run stops enriching
+
+
 class AgentState(TypedDict):
     """Central state for the research agent graph."""
     original_query: str
     sub_tasks: list[SubTask]
     current_task_index: int
     all_findings: Annotated[list[Citation], operator.add]
+    unique_findings: list[Citation]
+    packed_findings: list[Citation]
+    dropped_findings: list[Citation]
+    task_results: Annotated[list[TaskResult], operator.add]
     final_report: str
     errors: Annotated[list[str], operator.add]
     past_context: str
+    enrichment_deadline: NotRequired[float]  # set when research starts; see TaskState
+
+
+def initial_state(query: str) -> AgentState:
+    """Empty graph input for a new research run on *query*."""
+    return AgentState(
+        original_query=query,
+        all_findings=[],
+        task_results=[],
+        errors=[],
+        current_task_index=0,
+        sub_tasks=[],
+        final_report="",
+        past_context="",
+    )
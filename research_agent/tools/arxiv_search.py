@@ -1,6 +1,10 @@
+import asyncio
+import re
+
 import arxiv
 
 from config.settings import settings
+from research_agent import metrics
 
 
 def search_arxiv(query: str) -> list[dict]:
@@ -21,13 +25,26 @@ def search_arxiv(query: str) -> list[dict]:
     citations = []
     try:
         for result in client.results(search):
+            ids = {"arxiv": re.sub(r"v\d+$", "", result.get_short_id())}
+            if result.doi:
+                ids["doi"] = result.doi
             citations.append({
                 "source_type": "arxiv",
                 "title": result.title,
                 "url": result.entry_id,
                 "snippet": result.summary[:500],
+                "ids": ids,
             })
-    except Exception:
-        pass
+    except Exception as e:
+        metrics.note_error(e)
 
     return citations
+
+
+async def asearch_arxiv(query: str) -> list[dict]:
+    """Async variant of :func:`search_arxiv`.
+
+    The arxiv client is synchronous (and sleeps between pages), so the call
+    runs in a worker thread.
+    """
+    return await asyncio.to_thread(search_arxiv, query)
@@ -1,14 +1,11 @@
-import httpx
-
 from config.settings import settings
+from research_agent import metrics
+from research_agent.tools import http_client
 
+_SEARCH_URL = "https://api.github.com/search/repositories"
 
-def search_github(query: str) -> list[dict]:
-    """Search GitHub repositories matching the query.
 
-    Returns a list of Citation dicts with source_type="github".
-    Uses GITHUB_TOKEN env var for higher rate limits when available.
-    """
+def _request_args(query: str) -> dict:
     headers = {"Accept": "application/vnd.github+json"}
     if settings.github_token:
         headers["Authorization"] = f"Bearer {settings.github_token}"
@@ -19,33 +16,54 @@ def search_github(query: str) -> list[dict]:
         "order": "desc",
         "per_page": settings.github_max_results,
     }
+    return {"headers": headers, "params": params, "timeout": 15}
+
+
+def _parse_repositories(data: dict) -> list[dict]:
+    """Convert a GitHub repository search response into Citation dicts."""
+    citations = []
+    for repo in data.get("items", []):
+        language = repo.get("language") or "Unknown"
+        stars = repo.get("stargazers_count", 0)
+        description = repo.get("description") or "No description"
+
+        citations.append({
+            "source_type": "github",
+            "title": repo["full_name"],
+            "url": repo["html_url"],
+            "snippet": (
+                f"{description} "
+                f"[{language}, {stars:,} stars]"
+            )[:500],
+        })
+    return citations
+
+
+def search_github(query: str) -> list[dict]:
+    """Search GitHub repositories matching the query.
+
+    Returns a list of Citation dicts with source_type="github".
+    Uses GITHUB_TOKEN env var for higher rate limits when available.
+    """
+    citations = []
+    try:
+        resp = http_client.get(_SEARCH_URL, **_request_args(query))
+        resp.raise_for_status()
+        citations = _parse_repositories(resp.json())
+    except Exception as e:
+        metrics.note_error(e)
+
+    return citations
+
 
+async def asearch_github(query: str) -> list[dict]:
+    """Async variant of :func:`search_github` using the shared AsyncClient."""
     citations = []
     try:
-        resp = httpx.get(
-            "https://api.github.com/search/repositories",
-            headers=headers,
-            params=params,
-            timeout=15,
-        )
+        resp = await http_client.aget(_SEARCH_URL, **_request_args(query))
         resp.raise_for_status()
-        data = resp.json()
-
-        for repo in data.get("items", []):
-            language = repo.get("language") or "Unknown"
-            stars = repo.get("stargazers_count", 0)
-            description = repo.get("description") or "No description"
-
-            citations.append({
-                "source_type": "github",
-                "title": repo["full_name"],
-                "url": repo["html_url"],
-                "snippet": (
-                    f"{description} "
-                    f"[{language}, {stars:,} stars]"
-                )[:500],
-            })
-    except Exception:
-        pass
+        citations = _parse_repositories(resp.json())
+    except Exception as e:
+        metrics.note_error(e)
 
     return citations
@@ -0,0 +1,165 @@
+"""Process-wide pooled HTTP clients shared by every tool.
+
+One ``httpx.Client`` serves synchronous callers and one ``httpx.AsyncClient``
+per event loop serves async callers, so repeated calls to the same API reuse
+keep-alive (and, when ``h2`` is installed, HTTP/2) connections instead of
+paying a fresh TCP+TLS handshake each time.  Requests to a single host are
+additionally capped at ``settings.http_max_connections_per_host``.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import weakref
+from urllib.parse import urlsplit
+
+import httpx
+
+from config.settings import settings
+from research_agent import metrics
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+class HostLimiter:
+    """Caps concurrent requests per host for threads and event loops alike.
+
+    Thread callers share one ``BoundedSemaphore`` per host; async callers get
+    one ``asyncio.Semaphore`` per host per event loop (asyncio primitives
+    cannot be shared across loops).
+    """
+
+    def __init__(self, limit: int) -> None:
+        self._limit = limit
+        self._lock = threading.Lock()
+        self._slots: dict[str, threading.BoundedSemaphore] = {}
+        self._async_slots: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]
+        ] = weakref.WeakKeyDictionary()
+
+    def slot(self, url: str) -> threading.BoundedSemaphore:
+        host = _host(url)
+        with self._lock:
+            slot = self._slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self._limit)
+                self._slots[host] = slot
+            return slot
+
+    def aslot(self, url: str) -> asyncio.Semaphore:
+        host = _host(url)
+        slots = self._async_slots.setdefault(asyncio.get_running_loop(), {})
+        slot = slots.get(host)
+        if slot is None:
+            slot = asyncio.Semaphore(self._limit)
+            slots[host] = slot
+        return slot
+
+
+_lock = threading.Lock()
+_client: httpx.Client | None = None
+_async_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, httpx.AsyncClient
+] = weakref.WeakKeyDictionary()
+_limiter: HostLimiter | None = None
+
+
+def _host_limiter() -> HostLimiter:
+    global _limiter
+    with _lock:
+        if _limiter is None:
+            _limiter = HostLimiter(settings.http_max_connections_per_host)
+        return _limiter
+
+
+def _http2_enabled() -> bool:
+    if not settings.http2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _client_kwargs(async_: bool = False) -> dict:
+    kwargs = {
+        "http2": _http2_enabled(),
+        "limits": httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+        "timeout": 15,
+    }
+    from research_agent.cassette import get_cassette
+
+    cassette = get_cassette()
+    if cassette is not None:
+        # An explicit transport replaces the one httpx would build from
+        # http2/limits, so build that one as the cassette's inner transport.
+        inner = None
+        if cassette.recording:
+            transport_cls = httpx.AsyncHTTPTransport if async_ else httpx.HTTPTransport
+            inner = transport_cls(http2=kwargs["http2"], limits=kwargs["limits"])
+        kwargs["transport"] = (
+            cassette.async_transport(inner) if async_ else cassette.transport(inner)
+        )
+    return kwargs
+
+
+# -- sync ---------------------------------------------------------------------
+
+def get_client() -> httpx.Client:
+    """Return the shared synchronous client, creating it on first use."""
+    global _client
+    with _lock:
+        if _client is None or _client.is_closed:
+            _client = httpx.Client(**_client_kwargs())
+        return _client
+
+
+def get(url: str, **kwargs) -> httpx.Response:
+    """GET *url* through the shared client, respecting the per-host cap."""
+    with _host_limiter().slot(url):
+        resp = get_client().get(url, **kwargs)
+    metrics.note_bytes(len(resp.content))
+    return resp
+
+
+def close_client() -> None:
+    """Close the shared synchronous client (it is recreated on next use)."""
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+# -- async --------------------------------------------------------------------
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the shared async client bound to the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(**_client_kwargs(async_=True))
+        _async_clients[loop] = client
+    return client
+
+
+async def aget(url: str, **kwargs) -> httpx.Response:
+    """Async GET *url* through the shared client, respecting the per-host cap."""
+    async with _host_limiter().aslot(url):
+        resp = await get_async_client().get(url, **kwargs)
+    metrics.note_bytes(len(resp.content))
+    return resp
+
+
+async def aclose_client() -> None:
+    """Close the async client bound to the running event loop."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -1,6 +1,34 @@
+import asyncio
+
 from huggingface_hub import HfApi
 
 from config.settings import settings
+from research_agent import metrics
+
+
+def _parse_models(models) -> list[dict]:
+    """Convert HfApi ``ModelInfo`` results into Citation dicts."""
+    citations = []
+    for model in models:
+        model_id = model.id
+        pipeline_tag = model.pipeline_tag or "unknown"
+        downloads = model.downloads or 0
+        likes = model.likes or 0
+        tags = model.tags or []
+
+        tag_str = ", ".join(tags[:5])
+        snippet = (
+            f"{pipeline_tag} model — {downloads:,} downloads, {likes} likes. "
+            f"Tags: {tag_str}"
+        )
+
+        citations.append({
+            "source_type": "huggingface",
+            "title": model_id,
+            "url": f"https://huggingface.co/{model_id}",
+            "snippet": snippet,
+        })
+    return citations
 
 
 def search_huggingface(query: str) -> list[dict]:
@@ -18,26 +46,16 @@ def search_huggingface(query: str) -> list[dict]:
             sort="downloads",
             limit=settings.huggingface_max_results,
         )
-        for model in models:
-            model_id = model.id
-            pipeline_tag = model.pipeline_tag or "unknown"
-            downloads = model.downloads or 0
-            likes = model.likes or 0
-            tags = model.tags or []
-
-            tag_str = ", ".join(tags[:5])
-            snippet = (
-                f"{pipeline_tag} model — {downloads:,} downloads, {likes} likes. "
-                f"Tags: {tag_str}"
-            )
-
-            citations.append({
-                "source_type": "huggingface",
-                "title": model_id,
-                "url": f"https://huggingface.co/{model_id}",
-                "snippet": snippet,
-            })
-    except Exception:
-        pass
+        citations = _parse_models(models)
+    except Exception as e:
+        metrics.note_error(e)
 
     return citations
+
+
+async def asearch_huggingface(query: str) -> list[dict]:
+    """Async variant of :func:`search_huggingface`.
+
+    HfApi is synchronous, so the call runs in a worker thread.
+    """
+    return await asyncio.to_thread(search_huggingface, query)
@@ -1,24 +1,85 @@
-from research_agent.tools.arxiv_search import search_arxiv
-from research_agent.tools.web_search import search_web
-from research_agent.tools.github_search import search_github
-from research_agent.tools.wikipedia_search import search_wikipedia
-from research_agent.tools.semantic_scholar_search import search_semantic_scholar
-from research_agent.tools.huggingface_search import search_huggingface
-from research_agent.tools.youtube_search import search_youtube
-
-TOOL_REGISTRY: dict[str, callable] = {
-    "arxiv": search_arxiv,
-    "web": search_web,
-    "github": search_github,
-    "wikipedia": search_wikipedia,
-    "semantic_scholar": search_semantic_scholar,
-    "huggingface": search_huggingface,
-    "youtube": search_youtube,
+"""Tool lookup by name.
+
+Registry entries are ``"module:function"`` import paths, resolved when a
+tool is first looked up, so a run only imports the client libraries
+(arxiv, ddgs, mediawiki, huggingface_hub, youtube_transcript_api) of the
+sources its plan uses.  Entries may also be plain callables.
+"""
+from __future__ import annotations
+
+import importlib
+
+from config.settings import settings
+from research_agent.metrics import instrument
+from research_agent.tools.tool_cache import acached_tool, cached_tool
+
+TOOL_REGISTRY: dict[str, str | callable] = {
+    "arxiv": "research_agent.tools.arxiv_search:search_arxiv",
+    "web": "research_agent.tools.web_search:search_web",
+    "github": "research_agent.tools.github_search:search_github",
+    "wikipedia": "research_agent.tools.wikipedia_search:search_wikipedia",
+    "semantic_scholar": "research_agent.tools.semantic_scholar_search:search_semantic_scholar",
+    "huggingface": "research_agent.tools.huggingface_search:search_huggingface",
+    "youtube": "research_agent.tools.youtube_search:search_youtube",
+}
+
+# Tools whose requests go through http_client; a cassette records those at
+# the transport level, so only the other (library-backed) tools are
+# recorded per call.
+_HTTP_TOOLS = frozenset({"github", "semantic_scholar"})
+
+ASYNC_TOOL_REGISTRY: dict[str, str | callable] = {
+    "arxiv": "research_agent.tools.arxiv_search:asearch_arxiv",
+    "web": "research_agent.tools.web_search:asearch_web",
+    "github": "research_agent.tools.github_search:asearch_github",
+    "wikipedia": "research_agent.tools.wikipedia_search:asearch_wikipedia",
+    "semantic_scholar": "research_agent.tools.semantic_scholar_search:asearch_semantic_scholar",
+    "huggingface": "research_agent.tools.huggingface_search:asearch_huggingface",
+    "youtube": "research_agent.tools.youtube_search:asearch_youtube",
 }
 
 
+def _resolve(entry):
+    """Import a ``"module:function"`` registry entry; callables are returned as is."""
+    if not isinstance(entry, str):
+        return entry
+    module, _, attr = entry.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+
 def get_tool(name: str):
-    """Look up a tool by name. Raises KeyError if not found."""
+    """Look up a tool by name. Raises KeyError if not found.
+
+    When ``settings.tool_cache_enabled`` is set, the tool is wrapped with the
+    persistent result cache; an installed cassette takes its place (see
+    :mod:`research_agent.cassette`).  Every call is recorded as a ``tool``
+    metrics span.
+    """
     if name not in TOOL_REGISTRY:
         raise KeyError(f"Unknown tool: {name}. Available: {list(TOOL_REGISTRY.keys())}")
-    return TOOL_REGISTRY[name]
+    from research_agent.cassette import get_cassette
+
+    tool = _resolve(TOOL_REGISTRY[name])
+    cassette = get_cassette()
+    if cassette is not None:
+        if name not in _HTTP_TOOLS:
+            tool = cassette.wrap_tool(name, tool)
+    elif settings.tool_cache_enabled:
+        tool = cached_tool(name, tool)
+    return instrument("tool", name, tool)
+
+
+def get_async_tool(name: str):
+    """Look up the async variant of a tool by name. Raises KeyError if not found."""
+    if name not in ASYNC_TOOL_REGISTRY:
+        raise KeyError(f"Unknown tool: {name}. Available: {list(ASYNC_TOOL_REGISTRY.keys())}")
+    from research_agent.cassette import get_cassette
+
+    tool = _resolve(ASYNC_TOOL_REGISTRY[name])
+    cassette = get_cassette()
+    if cassette is not None:
+        if name not in _HTTP_TOOLS:
+            tool = cassette.wrap_async_tool(name, tool)
+    elif settings.tool_cache_enabled:
+        tool = acached_tool(name, tool)
+    return instrument("tool", name, tool)
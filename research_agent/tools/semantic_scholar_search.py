@@ -1,13 +1,11 @@
-import httpx
-
 from config.settings import settings
+from research_agent import metrics
+from research_agent.tools import http_client
 
+_SEARCH_URL = "https://api.semanticscholar.org/graph/v1/paper/search/bulk"
 
-def search_semantic_scholar(query: str) -> list[dict]:
-    """Search Semantic Scholar for academic papers matching the query.
 
-    Returns a list of Citation dicts with source_type="semantic_scholar".
-    """
+def _request_args(query: str) -> dict:
     headers = {}
     if settings.semantic_scholar_api_key:
         headers["x-api-key"] = settings.semantic_scholar_api_key
@@ -15,37 +13,63 @@ def search_semantic_scholar(query: str) -> list[dict]:
     params = {
         "query": query,
         "limit": settings.semantic_scholar_max_results,
-        "fields": "title,abstract,citationCount,url,year",
+        "fields": "title,abstract,citationCount,url,year,externalIds",
     }
+    return {"headers": headers, "params": params, "timeout": 15}
+
+
+def _parse_papers(data: dict) -> list[dict]:
+    """Convert a Semantic Scholar search response into Citation dicts."""
+    citations = []
+    for paper in data.get("data", []):
+        title = paper.get("title", "Untitled")
+        abstract = paper.get("abstract") or ""
+        year = paper.get("year") or "N/A"
+        citation_count = paper.get("citationCount") or 0
+        url = paper.get("url") or ""
+
+        snippet = abstract[:400]
+        snippet += f" [Year: {year}, Citations: {citation_count}]"
+
+        citation = {
+            "source_type": "semantic_scholar",
+            "title": title,
+            "url": url,
+            "snippet": snippet,
+        }
+        external = paper.get("externalIds") or {}
+        ids = {name: external[key] for name, key in (("arxiv", "ArXiv"), ("doi", "DOI"))
+               if external.get(key)}
+        if ids:
+            citation["ids"] = ids
+        citations.append(citation)
+    return citations
+
+
+def search_semantic_scholar(query: str) -> list[dict]:
+    """Search Semantic Scholar for academic papers matching the query.
+
+    Returns a list of Citation dicts with source_type="semantic_scholar".
+    """
+    citations = []
+    try:
+        resp = http_client.get(_SEARCH_URL, **_request_args(query))
+        resp.raise_for_status()
+        citations = _parse_papers(resp.json())
+    except Exception as e:
+        metrics.note_error(e)
+
+    return citations
+
 
+async def asearch_semantic_scholar(query: str) -> list[dict]:
+    """Async variant of :func:`search_semantic_scholar` using the shared AsyncClient."""
     citations = []
     try:
-        resp = httpx.get(
-            "https://api.semanticscholar.org/graph/v1/paper/search/bulk",
-            headers=headers,
-            params=params,
-            timeout=15,
-        )
+        resp = await http_client.aget(_SEARCH_URL, **_request_args(query))
         resp.raise_for_status()
-        data = resp.json()
-
-        for paper in data.get("data", []):
-            title = paper.get("title", "Untitled")
-            abstract = paper.get("abstract") or ""
-            year = paper.get("year") or "N/A"
-            citation_count = paper.get("citationCount") or 0
-            url = paper.get("url") or ""
-
-            snippet = abstract[:400]
-            snippet += f" [Year: {year}, Citations: {citation_count}]"
-
-            citations.append({
-                "source_type": "semantic_scholar",
-                "title": title,
-                "url": url,
-                "snippet": snippet,
-            })
-    except Exception:
-        pass
+        citations = _parse_papers(resp.json())
+    except Exception as e:
+        metrics.note_error(e)
 
     return citations
@@ -0,0 +1,97 @@
+"""Persistent cache of search tool results.
+
+Entries are keyed by tool name, the normalised query and the ``Settings``
+fields that change what a tool returns (result limits), so changing
+``ARXIV_MAX_RESULTS`` never serves a stale, differently-sized result list.
+Empty result lists are not cached: tools swallow errors and return ``[]``,
+and a transient outage must not be remembered as "no results".
+"""
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import threading
+
+from config.settings import settings
+from research_agent import metrics
+from research_agent.cache import DiskCache
+
+_RESULT_SETTINGS: dict[str, tuple[str, ...]] = {
+    "arxiv": ("arxiv_max_results",),
+    "web": ("web_max_results",),
+    "github": ("github_max_results",),
+    "wikipedia": ("wikipedia_max_results",),
+    "semantic_scholar": ("semantic_scholar_max_results",),
+    "huggingface": ("huggingface_max_results",),
+    "youtube": ("youtube_max_results",),
+}
+
+_lock = threading.Lock()
+_cache: DiskCache | None = None
+
+
+def get_tool_cache() -> DiskCache:
+    """Return the process-wide tool result cache."""
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = DiskCache(
+                settings.cache_dir / "tools.sqlite",
+                max_entries=settings.tool_cache_max_entries,
+            )
+        return _cache
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def cache_key(tool: str, query: str) -> str:
+    fields = {name: getattr(settings, name) for name in _RESULT_SETTINGS.get(tool, ())}
+    raw = json.dumps([tool, normalize_query(query), fields], sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _ttl(tool: str) -> int:
+    return settings.tool_cache_ttl.get(tool, settings.tool_cache_default_ttl)
+
+
+def cached_tool(name: str, fn):
+    """Wrap a sync tool so results are served from / stored in the cache."""
+
+    @functools.wraps(fn)
+    def wrapper(query: str) -> list[dict]:
+        cache = get_tool_cache()
+        key = cache_key(name, query)
+        hit = cache.get(key)
+        if hit is not None:
+            metrics.note_cache_hit()
+            return hit
+
+        results = fn(query)
+        if results:
+            cache.set(key, results, ttl=_ttl(name))
+        return results
+
+    return wrapper
+
+
+def acached_tool(name: str, fn):
+    """Async counterpart of :func:`cached_tool`."""
+
+    @functools.wraps(fn)
+    async def wrapper(query: str) -> list[dict]:
+        cache = get_tool_cache()
+        key = cache_key(name, query)
+        hit = cache.get(key)
+        if hit is not None:
+            metrics.note_cache_hit()
+            return hit
+
+        results = await fn(query)
+        if results:
+            cache.set(key, results, ttl=_ttl(name))
+        return results
+
+    return wrapper
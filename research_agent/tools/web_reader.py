@@ -1,26 +1,217 @@
+"""Web page reader with an HTTP-validator-aware content cache.
+
+Extracted text is cached together with the response's ``ETag`` and
+``Last-Modified`` headers.  Within ``settings.page_cache_fresh_seconds`` a
+cached page is served without any request; after that it is revalidated
+with a conditional GET, and a ``304 Not Modified`` reuses the cached text,
+skipping both the download and the trafilatura pass.  If revalidation
+fails with a timeout, connection error or server error, the cached text
+keeps being served and is retried after
+``settings.page_cache_negative_ttl`` seconds.  URLs that fail with no
+cached text, or yield no extractable text, are negatively cached for that
+long.
+
+Given a *query*, the returned excerpt is the page's most relevant passages
+(see :mod:`research_agent.passages`) rather than its first characters.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
 import httpx
 import trafilatura
 
+from config.settings import settings
+from research_agent import metrics
+from research_agent.cache import DiskCache
+from research_agent.cassette import get_cassette
+from research_agent.passages import select_passages, text_pieces
+from research_agent.tools import http_client
+
+_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    ),
+}
+
+# Full extracted text is cached (not just the returned excerpt) so callers
+# can select different passages from the same page; this caps huge pages.
+_MAX_CACHED_CHARS = 100_000
+_TIMEOUT = 5.0
+
+_lock = threading.Lock()
+_cache: DiskCache | None = None
+
+
+def get_page_cache() -> DiskCache:
+    """Return the process-wide page content cache."""
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = DiskCache(
+                settings.cache_dir / "pages.sqlite",
+                max_entries=settings.page_cache_max_entries,
+            )
+        return _cache
+
+
+# -- cache helpers ------------------------------------------------------------
+
+def _cache_enabled() -> bool:
+    # With a cassette installed every fetch must reach it.
+    return settings.page_cache_enabled and get_cassette() is None
+
+
+def _lookup(url: str) -> dict | None:
+    if not _cache_enabled():
+        return None
+    return get_page_cache().get(url)
+
+
+def _is_fresh(entry: dict) -> bool:
+    # Negative entries live exactly as long as their (short) cache TTL.
+    if entry["text"] is None:
+        return True
+    return time.time() - entry["checked_at"] < settings.page_cache_fresh_seconds
+
+
+def _request_headers(entry: dict | None) -> dict:
+    headers = dict(_HEADERS)
+    if entry and entry["text"] is not None:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def _store(url: str, text: str | None, resp: httpx.Response | None) -> dict:
+    entry = {
+        "text": text[:_MAX_CACHED_CHARS] if text else None,
+        "etag": resp.headers.get("etag") if resp is not None else None,
+        "last_modified": resp.headers.get("last-modified") if resp is not None else None,
+        "checked_at": time.time(),
+    }
+    if _cache_enabled():
+        ttl = settings.page_cache_ttl if entry["text"] else settings.page_cache_negative_ttl
+        get_page_cache().set(url, entry, ttl=ttl)
+    return entry
+
+
+def _revalidated(url: str, entry: dict) -> dict:
+    metrics.note_cache_hit()
+    entry = dict(entry, checked_at=time.time())
+    get_page_cache().set(url, entry, ttl=settings.page_cache_ttl)
+    return entry
+
+
+def _transient(error: Exception) -> bool:
+    """Whether *error* says nothing about the page itself (timeouts, 5xx, 429)."""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    return True
+
+
+def _serve_stale(url: str, entry: dict | None, error: Exception) -> dict | None:
+    """Keep a good cached page after a failed revalidation; None if there is none."""
+    if entry is None or entry["text"] is None or not _transient(error):
+        return None
+    retry_in = min(settings.page_cache_negative_ttl, settings.page_cache_fresh_seconds)
+    entry = dict(entry, checked_at=time.time() - settings.page_cache_fresh_seconds + retry_in)
+    get_page_cache().set(url, entry, ttl=settings.page_cache_ttl)
+    return entry
+
+
+def _excerpt(entry: dict, query: str | None) -> str | None:
+    text = entry["text"]
+    if not text:
+        return None
+    if query:
+        return select_passages(
+            text_pieces(text),
+            query,
+            budget=settings.passage_budget_chars,
+            chunk_chars=settings.passage_chunk_chars,
+        )
+    return text[:settings.passage_budget_chars]
+
+
+def _request_timeout(timeout: float | None) -> float:
+    return _TIMEOUT if timeout is None else min(_TIMEOUT, timeout)
+
 
-def read_webpage(url: str) -> str | None:
+# -- public API ---------------------------------------------------------------
+
+def read_webpage(
+    url: str, query: str | None = None, timeout: float | None = None
+) -> str | None:
     """Fetch a web page and extract its main text content.
 
-    Returns extracted text truncated to 2000 chars, or None on failure.
+    Returns up to ``settings.passage_budget_chars`` of extracted text (the
+    passages most relevant to *query*, if given), or None on failure.
+    *timeout* lowers the request timeout below its default of 5 seconds.
     """
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
-            "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        ),
-    }
+    entry = _lookup(url)
+    if entry is not None and _is_fresh(entry):
+        metrics.note_cache_hit()
+        return _excerpt(entry, query)
 
+    resp = None
+    text = None
     try:
-        resp = httpx.get(url, headers=headers, timeout=5, follow_redirects=True)
+        resp = http_client.get(
+            url,
+            headers=_request_headers(entry),
+            timeout=_request_timeout(timeout),
+            follow_redirects=True,
+        )
+        if resp.status_code == 304 and entry is not None:
+            return _excerpt(_revalidated(url, entry), query)
         resp.raise_for_status()
         text = trafilatura.extract(resp.text)
-        if text:
-            return text[:2000]
-    except Exception:
-        pass
+    except Exception as e:
+        metrics.note_error(e)
+        stale = _serve_stale(url, entry, e)
+        if stale is not None:
+            return _excerpt(stale, query)
+
+    return _excerpt(_store(url, text, resp), query)
+
+
+async def aread_webpage(
+    url: str, query: str | None = None, timeout: float | None = None
+) -> str | None:
+    """Async variant of :func:`read_webpage`.
+
+    The download goes through the shared AsyncClient; trafilatura extraction
+    is CPU-bound and runs in a worker thread to keep the event loop free.
+    """
+    entry = _lookup(url)
+    if entry is not None and _is_fresh(entry):
+        metrics.note_cache_hit()
+        return _excerpt(entry, query)
+
+    resp = None
+    text = None
+    try:
+        resp = await http_client.aget(
+            url,
+            headers=_request_headers(entry),
+            timeout=_request_timeout(timeout),
+            follow_redirects=True,
+        )
+        if resp.status_code == 304 and entry is not None:
+            return _excerpt(_revalidated(url, entry), query)
+        resp.raise_for_status()
+        text = await asyncio.to_thread(trafilatura.extract, resp.text)
+    except Exception as e:
+        metrics.note_error(e)
+        stale = _serve_stale(url, entry, e)
+        if stale is not None:
+            return _excerpt(stale, query)
 
-    return None
+    return _excerpt(_store(url, text, resp), query)
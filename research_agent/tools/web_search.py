@@ -1,6 +1,9 @@
+import asyncio
+
 from ddgs import DDGS
 
 from config.settings import settings
+from research_agent import metrics
 
 
 def search_web(query: str) -> list[dict]:
@@ -21,7 +24,15 @@ def search_web(query: str) -> list[dict]:
                 "url": r.get("href", ""),
                 "snippet": r.get("body", "")[:500],
             })
-    except Exception:
-        pass
+    except Exception as e:
+        metrics.note_error(e)
 
     return citations
+
+
+async def asearch_web(query: str) -> list[dict]:
+    """Async variant of :func:`search_web`.
+
+    DDGS is synchronous, so the call runs in a worker thread.
+    """
+    return await asyncio.to_thread(search_web, query)
@@ -1,6 +1,9 @@
+import asyncio
+
 from mediawiki import MediaWiki, DisambiguationError
 
 from config.settings import settings
+from research_agent import metrics
 
 
 def search_wikipedia(query: str) -> list[dict]:
@@ -26,7 +29,15 @@ def search_wikipedia(query: str) -> list[dict]:
                 continue
             except Exception:
                 continue
-    except Exception:
-        pass
+    except Exception as e:
+        metrics.note_error(e)
 
     return citations
+
+
+async def asearch_wikipedia(query: str) -> list[dict]:
+    """Async variant of :func:`search_wikipedia`.
+
+    pymediawiki is synchronous, so the call runs in a worker thread.
+    """
+    return await asyncio.to_thread(search_wikipedia, query)
@@ -1,9 +1,12 @@
+import asyncio
 import re
 
 from ddgs import DDGS
 from youtube_transcript_api import YouTubeTranscriptApi
 
 from config.settings import settings
+from research_agent import metrics
+from research_agent.passages import select_passages
 
 
 def _extract_video_id(url: str) -> str | None:
@@ -19,6 +22,55 @@ def _extract_video_id(url: str) -> str | None:
     return None
 
 
+def _discover_videos(query: str) -> list[dict]:
+    """Find candidate videos via DuckDuckGo, keeping only real video URLs."""
+    ddgs = DDGS()
+    results = ddgs.text(
+        keywords=f"{query} site:youtube.com",
+        max_results=settings.youtube_max_results,
+    )
+
+    videos = []
+    for r in results:
+        url = r.get("href", "")
+        video_id = _extract_video_id(url)
+        if not video_id:
+            continue
+        videos.append({
+            "video_id": video_id,
+            "url": url,
+            "title": r.get("title", "Untitled"),
+            "fallback_snippet": r.get("body", "")[:500],
+        })
+    return videos
+
+
+def _fetch_snippet(ytt_api: YouTubeTranscriptApi, video: dict, query: str) -> str:
+    """Return the transcript passages most relevant to *query*, or the search snippet."""
+    try:
+        transcript = ytt_api.fetch(video["video_id"])
+        text = select_passages(
+            (seg.text for seg in transcript),
+            query,
+            budget=settings.transcript_budget_chars,
+            chunk_chars=settings.passage_chunk_chars,
+        )
+        if text:
+            return text
+    except Exception:
+        pass
+    return video["fallback_snippet"]
+
+
+def _to_citation(video: dict, snippet: str) -> dict:
+    return {
+        "source_type": "youtube",
+        "title": video["title"],
+        "url": video["url"],
+        "snippet": snippet,
+    }
+
+
 def search_youtube(query: str) -> list[dict]:
     """Search YouTube videos and extract transcripts.
 
@@ -30,39 +82,31 @@ def search_youtube(query: str) -> list[dict]:
     """
     citations = []
     try:
-        ddgs = DDGS()
-        results = ddgs.text(
-            keywords=f"{query} site:youtube.com",
-            max_results=settings.youtube_max_results,
-        )
-
+        videos = _discover_videos(query)
         ytt_api = YouTubeTranscriptApi()
+        for video in videos:
+            citations.append(_to_citation(video, _fetch_snippet(ytt_api, video, query)))
+    except Exception as e:
+        metrics.note_error(e)
 
-        for r in results:
-            url = r.get("href", "")
-            title = r.get("title", "Untitled")
-            fallback_snippet = r.get("body", "")[:500]
-
-            video_id = _extract_video_id(url)
-            if not video_id:
-                continue
-
-            snippet = fallback_snippet
-            try:
-                transcript = ytt_api.fetch(video_id)
-                text = " ".join(seg.text for seg in transcript)
-                if text:
-                    snippet = text[:1500]
-            except Exception:
-                pass
-
-            citations.append({
-                "source_type": "youtube",
-                "title": title,
-                "url": url,
-                "snippet": snippet,
-            })
-    except Exception:
-        pass
+    return citations
+
+
+async def asearch_youtube(query: str) -> list[dict]:
+    """Async variant of :func:`search_youtube`.
+
+    Discovery and transcript fetches use synchronous libraries and run in
+    worker threads; transcripts for all videos are fetched concurrently.
+    """
+    citations = []
+    try:
+        videos = await asyncio.to_thread(_discover_videos, query)
+        ytt_api = YouTubeTranscriptApi()
+        snippets = await asyncio.gather(*(
+            asyncio.to_thread(_fetch_snippet, ytt_api, video, query) for video in videos
+        ))
+        citations = [_to_citation(v, s) for v, s in zip(videos, snippets)]
+    except Exception as e:
+        metrics.note_error(e)
 
     return citations
@@ -0,0 +1,383 @@
+"""
+Agentic Research Assistant - HTTP service
+Usage: python server.py [--host 127.0.0.1] [--port 8000] [--workers 4]
+                        [--queue-size 32] [--per-client 2] [--drain-timeout 60]
+
+Compiles the graph once and keeps the embedding model, LLM clients and
+HTTP pools warm (see :mod:`research_agent.runtime`), so a request pays only
+for its own research.
+
+    POST /research   {"query": "..."}
+        Waits for the run and returns the compact ``run_finished`` event.
+        With ``Accept: application/x-ndjson`` (or ``?stream=ndjson``) every
+        run event is streamed as one JSON line; with ``Accept:
+        text/event-stream`` (or ``?stream=sse``) as server-sent events.
+    GET /healthz     queue depth, running jobs, draining flag
+    GET /metrics     Prometheus text (see :mod:`research_agent.metrics`)
+
+Jobs wait in a bounded queue for one of ``--workers`` worker threads.  A
+full queue, or a client (``X-Client-Id`` header, else the remote address)
+already holding ``--per-client`` queued or running jobs, gets ``429`` with
+``Retry-After``.  On SIGTERM/SIGINT the service stops accepting jobs
+(``503``), lets queued and running ones finish for up to
+``--drain-timeout`` seconds, drops or cancels the rest, then exits.  A streaming client that
+disconnects abandons its run.
+"""
+import argparse
+import json
+import queue
+import signal
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from research_agent import metrics, runtime
+from research_agent.events import RunFinished, stream_run, to_dict
+from research_agent.graph import build_graph
+from research_agent.state import initial_state
+
+_MAX_BODY = 64 * 1024
+_DONE = object()
+
+
+class Rejected(Exception):
+    """A job was refused; *status* is the HTTP status to answer with."""
+
+    def __init__(self, status: int, reason: str, retry_after: int | None = None) -> None:
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass(eq=False)
+class Job:
+    query: str
+    client: str
+    events: queue.Queue = field(default_factory=queue.Queue)
+    cancelled: threading.Event = field(default_factory=threading.Event)
+
+    def iter_events(self):
+        """Yield the run's events; an exception raised by the run is re-raised."""
+        while True:
+            item = self.events.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+
+class ResearchService:
+    """Bounded job queue in front of a pool of graph workers."""
+
+    def __init__(self, graph, workers: int = 4, queue_size: int = 32, per_client: int = 2) -> None:
+        self.graph = graph
+        self.per_client = per_client
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._workers = [
+            threading.Thread(target=self._work, name=f"research-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._in_flight: dict[str, int] = {}
+        self._jobs: set[Job] = set()
+        self._running = 0
+        self._draining = False
+
+    def start(self) -> None:
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, query: str, client: str) -> Job:
+        """Queue a research job, or raise :class:`Rejected`."""
+        job = Job(query, client)
+        with self._lock:
+            if self._draining:
+                raise Rejected(503, "server is shutting down")
+            if self._in_flight.get(client, 0) >= self.per_client:
+                raise Rejected(429, "too many concurrent jobs for this client", retry_after=1)
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise Rejected(429, "job queue is full", retry_after=1) from None
+            self._in_flight[client] = self._in_flight.get(client, 0) + 1
+            self._jobs.add(job)
+        return job
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._stop_next_worker()
+                return
+            with self._lock:
+                self._running += 1
+            try:
+                if not job.cancelled.is_set():
+                    for event in stream_run(self.graph, initial_state(job.query)):
+                        job.events.put(event)
+                        if job.cancelled.is_set():
+                            break
+            except Exception as e:
+                job.events.put(e)
+            finally:
+                job.events.put(_DONE)
+                with self._lock:
+                    self._running -= 1
+                    self._finish(job)
+
+    def _finish(self, job: Job) -> None:
+        """Release *job*'s bookkeeping (lock held)."""
+        self._in_flight[job.client] -= 1
+        if not self._in_flight[job.client]:
+            del self._in_flight[job.client]
+        self._jobs.discard(job)
+        self._idle.notify_all()
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "queued": len(self._jobs) - self._running,
+                "running": self._running,
+                "draining": self._draining,
+            }
+
+    def drain(self, timeout: float) -> bool:
+        """Refuse new jobs and wait for accepted ones; True if all finished.
+
+        When *timeout* expires, jobs still queued are dropped (their callers
+        see the event stream end without a result) and running ones are
+        cancelled.  The workers are then told to stop and joined for
+        whatever is left of *timeout*; see :meth:`stopped`.
+        """
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            self._draining = True
+            while self._jobs:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._idle.wait(remaining)
+            drained = not self._jobs
+            while True:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not None:
+                    job.cancelled.set()
+                    job.events.put(_DONE)
+                    self._finish(job)
+            for job in self._jobs:
+                job.cancelled.set()
+            self._stop_next_worker()
+        for worker in self._workers:
+            if worker.is_alive():
+                worker.join(max(0.0, deadline - time.monotonic()))
+        return drained
+
+    def _stop_next_worker(self) -> None:
+        # Only sent while draining, when submissions are refused: a full
+        # queue then already holds the sentinel.  Each worker hands it on
+        # as it exits.
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def stopped(self) -> bool:
+        """True once every worker thread has exited."""
+        return not any(worker.is_alive() for worker in self._workers)
+
+    def render_metrics(self) -> str:
+        status = self.status()
+        lines = [
+            "# HELP research_agent_server_queued_jobs Jobs waiting for a worker.",
+            "# TYPE research_agent_server_queued_jobs gauge",
+            f"research_agent_server_queued_jobs {status['queued']}",
+            "# HELP research_agent_server_running_jobs Jobs being researched.",
+            "# TYPE research_agent_server_running_jobs gauge",
+            f"research_agent_server_running_jobs {status['running']}",
+        ]
+        return metrics.render_prometheus() + "\n".join(lines) + "\n"
+
+
+def make_handler(service: ResearchService):
+    class Handler(BaseHTTPRequestHandler):
+        server_version = "ResearchAgent/1.0"
+
+        # -- helpers --------------------------------------------------------
+
+        def _send_json(self, status: int, body: dict, headers: dict | None = None) -> None:
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _read_query(self) -> str | None:
+            length = int(self.headers.get("Content-Length") or 0)
+            if not 0 < length <= _MAX_BODY:
+                return None
+            try:
+                body = json.loads(self.rfile.read(length))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                return None
+            query = body.get("query") if isinstance(body, dict) else None
+            if not isinstance(query, str) or not query.strip():
+                return None
+            return query.strip()
+
+        def _stream_format(self, params: dict) -> str | None:
+            requested = params.get("stream", [None])[0]
+            if requested in ("ndjson", "sse"):
+                return requested
+            accept = self.headers.get("Accept", "")
+            if "application/x-ndjson" in accept:
+                return "ndjson"
+            if "text/event-stream" in accept:
+                return "sse"
+            return None
+
+        # -- routes ---------------------------------------------------------
+
+        def do_GET(self):
+            path = urlsplit(self.path).path
+            if path == "/healthz":
+                self._send_json(200, {"status": "ok", **service.status()})
+            elif path == "/metrics":
+                data = service.render_metrics().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            url = urlsplit(self.path)
+            if url.path != "/research":
+                self._send_json(404, {"error": "not found"})
+                return
+            query = self._read_query()
+            if query is None:
+                self._send_json(400, {"error": 'expected a JSON body {"query": "..."}'})
+                return
+
+            client = self.headers.get("X-Client-Id") or self.client_address[0]
+            try:
+                job = service.submit(query, client)
+            except Rejected as e:
+                headers = {"Retry-After": str(e.retry_after)} if e.retry_after else None
+                self._send_json(e.status, {"error": e.reason}, headers)
+                return
+
+            fmt = self._stream_format(parse_qs(url.query))
+            if fmt is None:
+                self._respond(job)
+            else:
+                self._stream(job, fmt)
+
+        def _respond(self, job: Job) -> None:
+            finished = None
+            try:
+                for event in job.iter_events():
+                    if isinstance(event, RunFinished):
+                        finished = event
+            except Exception as e:
+                self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+                return
+            if finished is None:
+                self._send_json(503, {"error": "run abandoned during shutdown"})
+                return
+            self._send_json(200, to_dict(finished))
+
+        def _stream(self, job: Job, fmt: str) -> None:
+            self.send_response(200)
+            if fmt == "sse":
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+            else:
+                self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            try:
+                try:
+                    for event in job.iter_events():
+                        self._write_event(fmt, to_dict(event))
+                except (BrokenPipeError, ConnectionResetError):
+                    raise
+                except Exception as e:
+                    self._write_event(fmt, {"type": "error", "error": f"{type(e).__name__}: {e}"})
+            except (BrokenPipeError, ConnectionResetError):
+                job.cancelled.set()
+                for _ in job.iter_events():
+                    pass  # wait for the worker to wind down
+
+        def _write_event(self, fmt: str, payload: dict) -> None:
+            data = json.dumps(payload, separators=(",", ":"))
+            if fmt == "sse":
+                self.wfile.write(f"event: {payload['type']}\ndata: {data}\n\n".encode())
+            else:
+                self.wfile.write(data.encode() + b"\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Agentic Research Assistant HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=4, help="research jobs run at once")
+    parser.add_argument("--queue-size", type=int, default=32, help="jobs waiting for a worker")
+    parser.add_argument("--per-client", type=int, default=2,
+                        help="queued plus running jobs allowed per client")
+    parser.add_argument("--drain-timeout", type=float, default=60.0,
+                        help="seconds to let accepted jobs finish on shutdown")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    runtime.warm_up()
+    service = ResearchService(build_graph(), args.workers, args.queue_size, args.per_client)
+    service.start()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    server.daemon_threads = True
+
+    def stop(signum, frame):
+        def drain_and_stop():
+            print("Draining...", file=sys.stderr)
+            if not service.drain(args.drain_timeout):
+                print("Drain timed out; abandoning remaining jobs", file=sys.stderr)
+            server.shutdown()
+
+        threading.Thread(target=drain_and_stop, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    print(f"Listening on http://{args.host}:{server.server_address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if service.stopped():
+            runtime.shutdown()
+        else:
+            # Abandoned runs may still be using the pooled clients; the
+            # process is exiting anyway, so leave them open.
+            print("Workers still running; skipping client shutdown", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
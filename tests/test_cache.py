@@ -0,0 +1,197 @@
+import multiprocessing
+import time
+
+import pytest
+
+import research_agent.llm_cache as llm_cache
+import research_agent.nodes.planner as planner
+import research_agent.tools.tool_cache as tool_cache
+from config.settings import settings
+from research_agent.cache import DiskCache
+from research_agent.embeddings import EmbeddingService
+from research_agent.prompts import PLANNER_PROMPT
+from tests.test_memory import FakeEncoder
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskCache(tmp_path / "cache.sqlite", max_entries=3)
+
+
+def test_round_trip_and_stats(cache):
+    assert cache.get("missing") is None
+    cache.set("k", [{"title": "x"}])
+    cache.set("raw", b"\x00\x01")
+
+    assert cache.get("k") == [{"title": "x"}]
+    assert cache.get("raw") == b"\x00\x01"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 1, 2)
+
+
+def test_ttl_expiry(cache):
+    cache.set("k", "v", ttl=0.05)
+    assert cache.get("k") == "v"
+    time.sleep(0.1)
+    assert cache.get("k") is None
+
+
+def test_lru_eviction(cache):
+    for key in "abc":
+        cache.set(key, key)
+        time.sleep(0.01)
+    cache.get("a")  # "b" is now least recently used
+    cache.set("d", "d")
+
+    assert len(cache) == 3
+    assert cache.get("b") is None
+    assert cache.get("a") == "a"
+
+
+def test_max_bytes_eviction(tmp_path):
+    cache = DiskCache(tmp_path / "cache.sqlite", max_entries=100, max_bytes=250)
+    for i in range(5):
+        cache.set(str(i), b"x" * 100)
+        time.sleep(0.01)
+    assert cache.stats()["bytes"] <= 250
+    assert cache.get("4") is not None
+
+
+def test_eviction_batches_down_to_low_water_mark(tmp_path):
+    cache = DiskCache(tmp_path / "cache.sqlite", max_entries=100)
+    for i in range(101):
+        cache.set(str(i), i)
+    assert len(cache) == 90
+    assert cache.get("0") is None and cache.get("100") == 100
+
+    # Totals stay exact across overwrites, deletes and expiry.
+    cache.set("100", "x" * 50)
+    cache.delete("99")
+    cache.set("gone", 1, ttl=-1)
+    cache.set("new", 2)
+    stats = cache.stats()
+    rows = cache._connect().execute("SELECT COUNT(*), SUM(size) FROM entries").fetchone()
+    assert (stats["entries"], stats["bytes"]) == rows
+    assert stats["entries"] == 90
+
+
+def _writer(path, start):
+    cache = DiskCache(path)
+    for i in range(start, start + 50):
+        cache.set(f"k{i}", i)
+
+
+def test_shared_between_processes(tmp_path):
+    path = tmp_path / "shared.sqlite"
+    procs = [multiprocessing.Process(target=_writer, args=(path, n * 50)) for n in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+    cache = DiskCache(path)
+    assert len(cache) == 200
+    assert cache.get("k199") == 199
+
+
+@pytest.fixture
+def tmp_tool_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(tool_cache, "_cache", DiskCache(tmp_path / "tools.sqlite"))
+
+
+def test_cached_tool_serves_hits_and_skips_empty(tmp_tool_cache):
+    calls = []
+
+    def tool(query):
+        calls.append(query)
+        return [{"title": query}] if query != "nothing" else []
+
+    cached = tool_cache.cached_tool("arxiv", tool)
+    assert cached("LoRA  Fine-Tuning") == [{"title": "LoRA  Fine-Tuning"}]
+    assert cached("lora fine-tuning") == [{"title": "LoRA  Fine-Tuning"}]
+    cached("nothing")
+    cached("nothing")
+    assert calls == ["LoRA  Fine-Tuning", "nothing", "nothing"]
+
+
+def test_cache_key_tracks_result_settings(monkeypatch):
+    before = tool_cache.cache_key("arxiv", "lora")
+    monkeypatch.setattr(settings, "github_max_results", settings.github_max_results + 1)
+    assert tool_cache.cache_key("arxiv", "LoRA ") == before
+
+    monkeypatch.setattr(settings, "arxiv_max_results", settings.arxiv_max_results + 1)
+    assert tool_cache.cache_key("arxiv", "lora") != before
+
+
+def _plan_messages(query):
+    return PLANNER_PROMPT.format_messages(query=query, past_context_block="")
+
+
+def test_llm_cache_exact_key_covers_prompt_and_model(tmp_path):
+    cache = llm_cache.LLMCache(DiskCache(tmp_path / "llm.sqlite"))
+    cache.update("planner", "model-a", _plan_messages("What is LoRA?"), {"sub_tasks": []})
+
+    assert cache.lookup("planner", "model-a", _plan_messages("What is LoRA?")) == {"sub_tasks": []}
+    assert cache.lookup("planner", "model-b", _plan_messages("What is LoRA?")) is None
+    assert cache.lookup("planner", "model-a", _plan_messages("What is QLoRA?")) is None
+    assert cache.lookup("synthesizer", "model-a", _plan_messages("What is LoRA?")) is None
+    assert cache.stats()["exact_hits"] == 1
+    assert cache.stats()["misses"] == 3
+
+
+def test_llm_cache_semantic_plan_reuse(tmp_path):
+    embedder = EmbeddingService("fake", model=FakeEncoder())
+    cache = llm_cache.LLMCache(
+        DiskCache(tmp_path / "llm.sqlite"), embedder=embedder, semantic_threshold=0.8
+    )
+    plan = {"sub_tasks": [{"query": "lora", "tool": "arxiv"}]}
+    question = "how does lora fine tuning work for large language models"
+    cache.update("planner", "m", _plan_messages(question), plan, question=question)
+
+    similar = "how does lora fine tuning work for small language models"
+    assert cache.lookup("planner", "m", _plan_messages(similar), question=similar) == plan
+    unrelated = "history of the roman empire"
+    assert cache.lookup("planner", "m", _plan_messages(unrelated), question=unrelated) is None
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_llm_cache_semantic_lookup_reuses_stored_vectors(tmp_path):
+    disk = DiskCache(tmp_path / "llm.sqlite")
+    writer = llm_cache.LLMCache(disk, embedder=EmbeddingService("fake", model=FakeEncoder()),
+                                semantic_threshold=0.8)
+    questions = [f"how does lora fine tuning work for model {i}" for i in range(5)]
+    for q in questions:
+        writer.update("planner", "m", _plan_messages(q), {"q": q}, question=q)
+    disk.set("semantic;other", "outside the prefix range")
+
+    # A fresh process embeds only the incoming question, never stored ones.
+    embedder = EmbeddingService("fake", model=FakeEncoder())
+    reader = llm_cache.LLMCache(disk, embedder=embedder, semantic_threshold=0.8)
+    q = questions[3]
+    assert reader.lookup("planner", "m", _plan_messages(q + "?"), question=q) == {"q": q}
+    assert reader.lookup("planner", "m", _plan_messages("x"), question="roman empire") is None
+    assert embedder.encoded == 2
+
+    # New questions from another writer are picked up.
+    writer.update("planner", "m", _plan_messages("what is qlora"), {"q": "qlora"},
+                  question="what is qlora")
+    assert reader.lookup("planner", "m", _plan_messages("y"), question="what is qlora") == {"q": "qlora"}
+
+
+def test_planner_node_reuses_cached_plan(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "_cache", llm_cache.LLMCache(DiskCache(tmp_path / "llm.sqlite")))
+    monkeypatch.setattr(llm_cache, "_configured", True)
+    calls = []
+
+    def fake_llm(messages):
+        calls.append(messages)
+        return '{"sub_tasks": [{"query": "lora", "tool": "arxiv"}]}'
+
+    monkeypatch.setattr(planner, "get_llm", lambda: fake_llm)
+    state = {"original_query": "What is LoRA?", "past_context": ""}
+    first = planner.planner_node(state)
+    second = planner.planner_node(state)
+
+    assert first == second
+    assert first["sub_tasks"][0]["tool"] == "arxiv"
+    assert len(calls) == 1
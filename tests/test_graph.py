@@ -1,4 +1,15 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
 from research_agent.graph import build_graph
+from research_agent.state import initial_state
 
 
 def test_graph_compiles():
@@ -8,17 +19,350 @@ def test_graph_compiles():
 
 def test_graph_end_to_end():
     graph = build_graph()
-    result = graph.invoke({
-        "original_query": "What is LoRA?",
-        "all_findings": [],
-        "errors": [],
-        "current_task_index": 0,
-        "sub_tasks": [],
-        "final_report": "",
-        "past_context": "",
-    })
+    result = graph.invoke(initial_state("What is LoRA?"))
 
     assert result["final_report"]
     assert len(result["all_findings"]) > 0
     assert len(result["sub_tasks"]) > 0
     assert all(t["status"] in ("done", "failed") for t in result["sub_tasks"])
+
+
+@pytest.fixture
+def offline_nodes(monkeypatch):
+    """Replace LLM, memory and tool calls with fast local fakes."""
+    import research_agent.graph as graph_mod
+    import research_agent.nodes.packer as packer_mod
+    import research_agent.nodes.researcher as researcher_mod
+
+    def fake_planner(state):
+        return {
+            "sub_tasks": [
+                {"id": i, "query": f"q{i}", "tool": tool, "status": "pending", "findings": []}
+                for i, tool in enumerate(["slow", "fast", "broken", "fast"])
+            ],
+            "current_task_index": 0,
+        }
+
+    def fake_tool(delay):
+        def tool(query):
+            time.sleep(delay)
+            return [{"source_type": "github", "title": query, "url": f"https://x/{query}", "snippet": ""}]
+        return tool
+
+    tools = {"slow": fake_tool(0.3), "fast": fake_tool(0.0)}
+
+    def fake_get_tool(name):
+        if name not in tools:
+            raise KeyError(f"Unknown tool: {name}")
+        return tools[name]
+
+    monkeypatch.setattr(graph_mod, "memory_retriever_node", lambda s: {"past_context": ""})
+    async def afake_planner(state):
+        return fake_planner(state)
+
+    async def afake_synthesizer(state):
+        return {"final_report": "report"}
+
+    monkeypatch.setattr(graph_mod, "planner_node", fake_planner)
+    monkeypatch.setattr(graph_mod, "aplanner_node", afake_planner)
+    monkeypatch.setattr(graph_mod, "synthesizer_node", lambda s: {"final_report": "report"})
+    monkeypatch.setattr(graph_mod, "asynthesizer_node", afake_synthesizer)
+    monkeypatch.setattr(graph_mod, "memory_saver_node", lambda s: {})
+    monkeypatch.setattr(researcher_mod, "get_tool", fake_get_tool)
+    monkeypatch.setattr(packer_mod, "get_embedding_service", lambda: None)
+
+
+@pytest.mark.parametrize("parallel", [True, False])
+def test_graph_merges_results_in_task_order(offline_nodes, parallel):
+    graph = build_graph(parallel=parallel)
+    result = graph.invoke(initial_state("anything"))
+
+    assert [f["title"] for f in result["all_findings"]] == ["q0", "q1", "q3"]
+    assert [t["status"] for t in result["sub_tasks"]] == ["done", "done", "failed", "done"]
+    assert len(result["errors"]) == 1
+    assert result["errors"][0].startswith("Task 2 (broken:q2)")
+
+
+def test_parallel_graph_runs_tasks_concurrently(offline_nodes, monkeypatch):
+    import research_agent.nodes.researcher as researcher_mod
+
+    monkeypatch.setattr(researcher_mod, "get_tool", lambda name: lambda q: time.sleep(0.3) or [])
+    graph = build_graph(parallel=True, max_concurrency=4)
+
+    start = time.perf_counter()
+    graph.invoke(initial_state("anything"))
+    assert time.perf_counter() - start < 0.9
+
+
+def test_parallel_graph_async_path(offline_nodes, monkeypatch):
+    import research_agent.nodes.researcher as researcher_mod
+
+    async def fake_tool(query):
+        await asyncio.sleep(0.3)
+        return [{"source_type": "github", "title": query, "url": f"https://x/{query}", "snippet": ""}]
+
+    monkeypatch.setattr(researcher_mod, "get_async_tool", lambda name: fake_tool)
+    graph = build_graph(parallel=True, max_concurrency=4)
+
+    start = time.perf_counter()
+    result = asyncio.run(graph.ainvoke(initial_state("anything")))
+    assert time.perf_counter() - start < 0.9
+    assert [f["title"] for f in result["all_findings"]] == ["q0", "q1", "q2", "q3"]
+
+
+@pytest.fixture
+def streaming_synthesizer(offline_nodes, monkeypatch):
+    """Use the real synthesizer nodes over a fake streaming chat model."""
+    from langchain_core.language_models import GenericFakeChatModel
+    from langchain_core.messages import AIMessage
+
+    import research_agent.graph as graph_mod
+    import research_agent.nodes.synthesizer as synthesizer_mod
+
+    monkeypatch.setattr(synthesizer_mod, "get_llm_cache", lambda: None)
+    monkeypatch.setattr(
+        synthesizer_mod,
+        "get_llm",
+        lambda: GenericFakeChatModel(messages=iter([AIMessage("LoRA adds low rank adapters.")])),
+    )
+    monkeypatch.setattr(graph_mod, "synthesizer_node", synthesizer_mod.synthesizer_node)
+    monkeypatch.setattr(graph_mod, "asynthesizer_node", synthesizer_mod.asynthesizer_node)
+
+
+def test_report_tokens_stream_before_run_finishes(streaming_synthesizer):
+    from research_agent.events import ReportChunk, RunFinished, stream_run
+
+    events = list(stream_run(build_graph(), initial_state("What is LoRA?")))
+    chunks = [e.text for e in events if isinstance(e, ReportChunk)]
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == "LoRA adds low rank adapters."
+    assert isinstance(events[-1], RunFinished)
+    assert events[-1].state["final_report"] == "LoRA adds low rank adapters."
+
+
+def test_report_streams_on_async_path(streaming_synthesizer):
+    from research_agent.events import ReportChunk, astream_run
+
+    async def collect():
+        return [e async for e in astream_run(build_graph(), initial_state("What is LoRA?"))]
+
+    chunks = [e.text for e in asyncio.run(collect()) if isinstance(e, ReportChunk)]
+    assert len(chunks) > 1
+    assert "".join(chunks) == "LoRA adds low rank adapters."
+
+
+def test_unstreamed_report_arrives_as_one_chunk(offline_nodes):
+    from research_agent.events import ReportChunk, stream_run
+
+    events = list(stream_run(build_graph(), initial_state("What is LoRA?")))
+    assert [e.text for e in events if isinstance(e, ReportChunk)] == ["report"]
+
+
+@pytest.mark.parametrize("parallel", [True, False])
+def test_run_events_report_plan_and_task_progress(offline_nodes, parallel):
+    from research_agent.events import (
+        EnrichmentDone, PlanReady, RunFinished, TaskDone, TaskFailed, TaskStarted,
+        stream_run, to_dict,
+    )
+
+    events = list(stream_run(build_graph(parallel=parallel), initial_state("q")))
+    kinds = [type(e) for e in events]
+
+    assert kinds[0] is PlanReady
+    assert [t["tool"] for t in events[0].sub_tasks] == ["slow", "fast", "broken", "fast"]
+    assert sum(k is TaskStarted for k in kinds) == 4
+    assert sum(k is EnrichmentDone for k in kinds) == 3
+    done = {e.task_id: e for e in events if isinstance(e, TaskDone)}
+    assert sorted(done) == [0, 1, 3]
+    assert done[0].findings == 1 and done[0].latency >= 0.3
+    failed = [e for e in events if isinstance(e, TaskFailed)]
+    assert [e.task_id for e in failed] == [2]
+    assert kinds[-1] is RunFinished
+
+    summary = to_dict(events[-1])
+    assert summary["final_report"] == "report"
+    assert [t["status"] for t in summary["sub_tasks"]] == ["done", "done", "failed", "done"]
+    assert to_dict(failed[0])["type"] == "task_failed"
+
+
+def test_run_events_on_async_path(offline_nodes, monkeypatch):
+    import research_agent.nodes.researcher as researcher_mod
+    from research_agent.events import TaskDone, astream_run
+
+    async def fake_tool(query):
+        return [{"source_type": "github", "title": query, "url": "", "snippet": ""}]
+
+    monkeypatch.setattr(researcher_mod, "get_async_tool", lambda name: fake_tool)
+
+    async def collect():
+        return [e async for e in astream_run(build_graph(), initial_state("q"))]
+
+    assert sum(isinstance(e, TaskDone) for e in asyncio.run(collect())) == 4
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_run_finished_carries_metrics_summary(offline_nodes, monkeypatch, use_async):
+    import research_agent.nodes.researcher as researcher_mod
+    from research_agent.events import RunFinished, astream_run, stream_run
+
+    async def fake_async_tool(query):
+        return [{"source_type": "github", "title": query, "url": "", "snippet": ""}]
+
+    monkeypatch.setattr(researcher_mod, "get_async_tool", lambda name: fake_async_tool)
+    graph = build_graph()
+
+    if use_async:
+        async def collect():
+            return [e async for e in astream_run(graph, initial_state("q"))]
+        events = asyncio.run(collect())
+    else:
+        events = list(stream_run(graph, initial_state("q")))
+
+    finished = events[-1]
+    assert isinstance(finished, RunFinished)
+    nodes = finished.metrics["spans"]["node"]
+    assert nodes["researcher"]["count"] == 4
+    assert nodes["planner"]["count"] == 1
+    assert nodes["synthesizer"]["count"] == 1
+    assert finished.metrics["duration_s"] >= nodes["synthesizer"]["total_s"]
+
+
+def test_profiler_writes_per_node_and_collapsed_stacks(offline_nodes, tmp_path):
+    import pstats
+
+    from research_agent.profiling import NodeProfiler
+
+    profiler = NodeProfiler(tmp_path, interval=0.002)
+    build_graph(profiler=profiler).invoke(initial_state("q"))
+    paths = profiler.stop()
+
+    names = {p.name for p in paths}
+    assert {"planner.prof", "researcher.prof", "stacks.collapsed"} <= names
+    assert pstats.Stats(str(tmp_path / "researcher.prof")).total_calls > 0
+
+    stacks = (tmp_path / "stacks.collapsed").read_text().splitlines()
+    researcher = [line for line in stacks if line.startswith("researcher;")]
+    assert researcher
+    # The slow fake tool's sleep dominates the researcher samples.
+    assert any("tool (test_graph.py)" in line for line in researcher)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in stacks)
+
+
+def test_profiler_handles_parallel_branches(offline_nodes, monkeypatch, tmp_path):
+    import cProfile
+
+    import research_agent.nodes.researcher as researcher_mod
+    import research_agent.profiling as profiling
+    from research_agent.profiling import NodeProfiler
+
+    class ExclusiveProfile(cProfile.Profile):
+        """Refuses to start while another is enabled, like cProfile on 3.12+."""
+        active: set = set()
+        lock = threading.Lock()
+
+        def enable(self, *args, **kwargs):
+            with self.lock:
+                if self.active:
+                    raise ValueError("Another profiling tool is already active")
+                self.active.add(id(self))
+            super().enable(*args, **kwargs)
+
+        def disable(self):
+            super().disable()
+            with self.lock:
+                self.active.discard(id(self))
+
+    def slow_tool(query):
+        time.sleep(0.1)
+        return [{"source_type": "github", "title": query, "url": f"https://x/{query}", "snippet": ""}]
+
+    monkeypatch.setattr(profiling.cProfile, "Profile", ExclusiveProfile)
+    monkeypatch.setattr(researcher_mod, "get_tool", lambda name: slow_tool)
+
+    profiler = NodeProfiler(tmp_path, interval=0.002)
+    graph = build_graph(parallel=True, max_concurrency=4, profiler=profiler)
+    result = graph.invoke(initial_state("q"))
+    profiler.stop()
+
+    assert [t["status"] for t in result["sub_tasks"]] == ["done"] * 4
+    assert (tmp_path / "researcher.prof").exists()
+    assert "researcher;" in (tmp_path / "stacks.collapsed").read_text()
+
+
+def test_batch_writes_jsonl_and_resumes(offline_nodes, monkeypatch, tmp_path):
+    import argparse
+    import json
+
+    import main
+    import research_agent.nodes.researcher as researcher_mod
+
+    async def fake_tool(query):
+        return [{"source_type": "github", "title": query, "url": f"https://x/{query}", "snippet": ""}]
+
+    monkeypatch.setattr(researcher_mod, "get_async_tool", lambda name: fake_tool)
+    monkeypatch.setattr(main.runtime, "warm_up", lambda: None)
+    monkeypatch.setattr(main.runtime, "shutdown", lambda: None)
+    loop_clients = []
+
+    async def fake_awarm_up():
+        from research_agent.tools import http_client
+
+        loop_clients.append(http_client.get_async_client())
+
+    monkeypatch.setattr(main.runtime, "awarm_up", fake_awarm_up)
+
+    questions = tmp_path / "questions.txt"
+    questions.write_text("first\n\n# skipped\nsecond\nthird\n")
+    output = tmp_path / "results.jsonl"
+    # An earlier run answered "first", failed "second" and was cut off mid-line.
+    output.write_text(
+        json.dumps({"index": 0, "query": "first", "report": "old"}) + "\n"
+        + json.dumps({"index": 1, "query": "second", "error": "RuntimeError: boom"}) + "\n"
+        + '{"index": 2, "que'
+    )
+    args = argparse.Namespace(batch=str(questions), output=str(output), concurrency=2)
+
+    assert main.main_batch(args, build_graph()) == 0
+
+    records = []
+    for line in output.read_text().splitlines():
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            pass
+    new = sorted(records[2:], key=lambda r: r["index"])
+    assert [(r["index"], r["query"]) for r in new] == [(1, "second"), (2, "third")]
+    assert new[0]["report"] == "report"
+    assert [f["title"] for f in new[0]["findings"]] == ["q0", "q1", "q2", "q3"]
+    assert new[0]["timings"]["duration_s"] >= 0
+    assert main.answered_questions(str(output)) == {"first", "second", "third"}
+    # The batch loop's pooled async client is closed before the loop ends.
+    assert loop_clients and loop_clients[0].is_closed
+
+
+# Cumulative import time of main.py, in µs; LangChain alone takes seconds.
+_MAIN_IMPORT_BUDGET_US = 1_000_000
+
+
+def test_cli_startup_defers_heavy_imports():
+    root = Path(__file__).resolve().parent.parent
+    env = {k: v for k, v in os.environ.items() if k != "GROQ_API_KEY"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True, text=True, env=env, cwd=root, check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    assert not {"langchain_core", "langgraph", "httpx", "research_agent.graph"} & set(modules)
+    assert modules["main"] < _MAIN_IMPORT_BUDGET_US
+
+    # Settings are only built on use, so --help needs no API key.
+    help_run = subprocess.run(
+        [sys.executable, "main.py", "--help"], capture_output=True, text=True, env=env, cwd=root,
+    )
+    assert help_run.returncode == 0
+    assert "--batch" in help_run.stdout
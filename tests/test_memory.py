@@ -1,15 +1,22 @@
 import json
+import multiprocessing
+import threading
+import zlib
 from pathlib import Path
 
+import numpy as np
 import pytest
 
+from config.settings import settings
+from research_agent.cache import DiskCache
+from research_agent.embeddings import EmbeddingService
 from research_agent.memory import MemoryStore
 
 
 @pytest.fixture
 def tmp_memory(tmp_path):
     """Provide a MemoryStore backed by a temporary file."""
-    return MemoryStore(path=tmp_path / "memory.json")
+    return MemoryStore(path=tmp_path / "memory")
 
 
 def test_add_and_len(tmp_memory):
@@ -23,7 +30,7 @@ def test_add_and_len(tmp_memory):
 
 
 def test_persistence(tmp_path):
-    path = tmp_path / "memory.json"
+    path = tmp_path / "memory"
     store = MemoryStore(path=path)
     store.add(
         query="What is LoRA?",
@@ -68,3 +75,347 @@ def test_search_respects_threshold(tmp_memory):
     # A completely unrelated query with high threshold should return nothing
     results = tmp_memory.search("quantum computing algorithms", threshold=0.9)
     assert results == []
+
+
+class FakeEncoder:
+    """Deterministic offline stand-in for SentenceTransformer."""
+
+    dim = 64
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, normalize_embeddings=True):
+        self.calls += 1
+        single = isinstance(texts, str)
+        out = []
+        for text in [texts] if single else texts:
+            vec = np.zeros(self.dim, dtype=np.float32)
+            for word in text.lower().split():
+                vec[zlib.crc32(word.encode()) % self.dim] += 1.0
+            norm = np.linalg.norm(vec)
+            out.append(vec / norm if norm else vec)
+        return out[0] if single else np.stack(out)
+
+
+def _fake_embedder(disk_cache=None):
+    return EmbeddingService("fake", model=FakeEncoder(), disk_cache=disk_cache)
+
+
+@pytest.fixture
+def fake_memory(tmp_path):
+    return MemoryStore(path=tmp_path / "memory", embedder=_fake_embedder())
+
+
+def test_vectorized_search_matches_brute_force(fake_memory):
+    rng = np.random.default_rng(0)
+    words = [f"w{i}" for i in range(40)]
+    for i in range(200):
+        fake_memory.add(
+            query=" ".join(rng.choice(words, 5)),
+            findings=[],
+            report_summary=" ".join(rng.choice(words, 10)),
+        )
+
+    query = "w1 w2 w3 w4"
+    results = fake_memory.search(query, top_k=5, threshold=0.0)
+
+    q = np.asarray(fake_memory._embed(query))
+    expected = sorted(
+        (float(np.dot(q, v)) for v in fake_memory._vectors), reverse=True
+    )[:5]
+    assert [r["similarity"] for r in results] == [round(s, 3) for s in expected]
+
+
+def test_search_many_uses_one_encode_call(fake_memory):
+    fake_memory.add("lora fine tuning", [], "low rank adaptation")
+    fake_memory.add("docker networking", [], "bridge host overlay")
+    encoder = fake_memory._get_embedder()._model
+    calls_before = encoder.calls
+
+    results = fake_memory.search_many(["lora adaptation", "docker bridge"], threshold=0.1)
+    assert encoder.calls == calls_before + 1
+    assert results[0][0]["query"] == "lora fine tuning"
+    assert results[1][0]["query"] == "docker networking"
+
+
+def test_matrix_survives_reload(fake_memory, tmp_path):
+    fake_memory.add("lora fine tuning", [], "low rank adaptation")
+    reloaded = MemoryStore(path=tmp_path / "memory", embedder=_fake_embedder())
+
+    assert reloaded._vectors.dtype == np.float32
+    assert reloaded.search("lora", threshold=0.1)[0]["query"] == "lora fine tuning"
+
+
+def _fake_store(path):
+    return MemoryStore(path=path, embedder=_fake_embedder())
+
+
+def test_migrates_legacy_json(tmp_path):
+    encoder = FakeEncoder()
+    legacy = [
+        {
+            "query": q,
+            "findings_count": 0,
+            "report_summary": q,
+            "embedding": encoder.encode(q).tolist(),
+            "timestamp": 0.0,
+        }
+        for q in ("lora fine tuning", "docker networking")
+    ]
+    (tmp_path / "memory.json").write_text(json.dumps(legacy))
+
+    store = _fake_store(tmp_path / "memory")
+    assert len(store) == 2
+    assert not (tmp_path / "memory.json").exists()
+    assert (tmp_path / "memory.json.migrated").exists()
+    assert store.search("docker", threshold=0.1)[0]["query"] == "docker networking"
+
+
+def test_torn_tail_is_ignored_and_repaired(tmp_path):
+    path = tmp_path / "memory"
+    store = _fake_store(path)
+    store.add("lora fine tuning", [], "low rank adaptation")
+
+    # Simulate a crash mid-append: a vector row without its journal line,
+    # followed by a partial journal line.
+    with open(path / "vectors-1.bin", "ab") as f:
+        f.write(b"\x00" * (FakeEncoder.dim * 4))
+    with open(path / "journal-1.jsonl", "ab") as f:
+        f.write(b'{"query": "half')
+
+    reopened = _fake_store(path)
+    assert len(reopened) == 1
+
+    reopened.add("docker networking", [], "bridge host overlay")
+    final = _fake_store(path)
+    assert [e["query"] for e in final._entries] == ["lora fine tuning", "docker networking"]
+    assert final.search("docker bridge", threshold=0.1)[0]["query"] == "docker networking"
+
+
+def _add_sessions(path, worker):
+    store = _fake_store(path)
+    for i in range(20):
+        store.add(f"worker {worker} session {i}", [], "summary")
+
+
+def test_concurrent_processes_do_not_clobber(tmp_path):
+    path = tmp_path / "memory"
+    procs = [multiprocessing.Process(target=_add_sessions, args=(path, w)) for w in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+    store = _fake_store(path)
+    assert len(store) == 80
+    assert len({e["query"] for e in store._entries}) == 80
+
+
+def test_refresh_sees_other_writers(tmp_path):
+    reader = _fake_store(tmp_path / "memory")
+    writer = _fake_store(tmp_path / "memory")
+    writer.add("lora fine tuning", [], "low rank adaptation")
+
+    assert reader.search("lora", threshold=0.1)[0]["query"] == "lora fine tuning"
+
+
+def test_float16_storage_and_retention(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "memory_vector_dtype", "float16")
+    monkeypatch.setattr(settings, "memory_max_entries", 10)
+    path = tmp_path / "memory"
+    store = _fake_store(path)
+    for i in range(12):
+        store.add(f"session {i}", [], "summary")
+
+    reloaded = _fake_store(path)
+    assert len(reloaded) == 10
+    assert reloaded._entries[0]["query"] == "session 2"
+    assert json.loads((path / "manifest.json").read_text())["dtype"] == "float16"
+    assert (path / f"vectors-{reloaded._manifest['generation']}.bin").stat().st_size == 10 * FakeEncoder.dim * 2
+    assert len(list(path.glob("journal-*.jsonl"))) == 1
+
+
+@pytest.fixture
+def fake_sentence_transformers(tmp_path, monkeypatch):
+    """Register a stub sentence_transformers module that counts loads."""
+    import sys
+    import types
+
+    import research_agent.embeddings as embeddings
+
+    loads = []
+
+    def SentenceTransformer(name):
+        loads.append(name)
+        return FakeEncoder()
+
+    module = types.SimpleNamespace(SentenceTransformer=SentenceTransformer)
+    monkeypatch.setitem(sys.modules, "sentence_transformers", module)
+    monkeypatch.setattr(embeddings, "_models", {})
+    monkeypatch.setattr(embeddings, "_services", {})
+    monkeypatch.setattr(settings, "cache_dir", tmp_path / "cache")
+    return loads
+
+
+def test_stores_share_one_embedding_model(tmp_path, fake_sentence_transformers):
+    first = MemoryStore(path=tmp_path / "a")
+    second = MemoryStore(path=tmp_path / "b")
+    first.add("lora fine tuning", [], "low rank adaptation")
+    second.search("lora")
+
+    assert first._get_embedder() is second._get_embedder()
+    assert len(fake_sentence_transformers) == 1
+
+
+def test_embedding_service_encodes_each_text_once(tmp_path):
+    disk = DiskCache(tmp_path / "embeddings.sqlite")
+    service = _fake_embedder(disk)
+
+    vecs = service.embed_many(["alpha beta", "gamma", "alpha beta"])
+    assert vecs.shape == (3, FakeEncoder.dim)
+    assert np.array_equal(vecs[0], vecs[2])
+    assert service.encoded == 2
+    assert service._model.calls == 1
+
+    service.embed_many(["gamma", "delta"])
+    assert service.encoded == 3
+
+    # A fresh process with the same disk cache needs no encoding at all.
+    restarted = _fake_embedder(disk)
+    assert np.array_equal(restarted.embed("gamma"), vecs[1])
+    assert restarted.encoded == 0
+
+
+def test_embedding_service_writes_misses_in_one_batch(tmp_path, monkeypatch):
+    disk = DiskCache(tmp_path / "embeddings.sqlite")
+    service = _fake_embedder(disk)
+    batches = []
+    set_many = disk.set_many
+    monkeypatch.setattr(disk, "set_many", lambda items: batches.append(len(items)) or set_many(items))
+
+    service.embed_many(["a", "b", "c"])
+    assert batches == [3]
+    assert len(disk) == 3
+
+    # One-off texts stay in memory only.
+    service.embed_many(["d", "e"], persist=False)
+    assert batches == [3]
+    assert len(disk) == 3
+    service.embed("d")
+    assert service.encoded == 5
+
+
+def test_embedding_service_uncached_batches_leave_caches_alone(tmp_path):
+    disk = DiskCache(tmp_path / "embeddings.sqlite")
+    service = _fake_embedder(disk)
+    service.embed_many(["a", "b"])
+    lru_order = list(service._memory)
+
+    vecs = service.embed_many(["b", "x", "y"], cache=False)
+    assert vecs.shape[0] == 3
+    assert service.encoded == 4
+    assert list(service._memory) == lru_order
+    assert len(disk) == 2
+
+
+def test_embedding_service_memory_lru_is_bounded():
+    service = EmbeddingService("fake", model=FakeEncoder(), memory_size=2)
+    service.embed_many(["a", "b", "c"])
+    assert len(service._memory) == 2
+    service.embed("a")
+    assert service.encoded == 4
+
+
+def test_get_memory_store_is_shared(tmp_path, monkeypatch):
+    import research_agent.memory as memory
+
+    monkeypatch.setattr(memory, "_stores", {})
+    store = memory.get_memory_store(tmp_path / "memory")
+    assert memory.get_memory_store(tmp_path / "memory") is store
+
+    memory.release_memory_stores()
+    assert memory.get_memory_store(tmp_path / "memory") is not store
+
+
+def _clustered_unit_vectors(n, dim=32, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vecs = centers[rng.integers(clusters, size=n)] + 0.3 * rng.normal(size=(n, dim))
+    return (vecs / np.linalg.norm(vecs, axis=1, keepdims=True)).astype(np.float32)
+
+
+def test_ivf_index_recall_and_round_trip(tmp_path):
+    from research_agent.ann import IVFIndex
+
+    vectors = _clustered_unit_vectors(3000)
+    queries = _clustered_unit_vectors(20, seed=1)
+    index = IVFIndex.train(vectors[:2000])
+    index.add(vectors[2000:])
+    assert index.size == 3000
+
+    exact = np.argsort(-(queries @ vectors.T), axis=1)[:, :5]
+    _, approx = index.search(queries, vectors, k=5, nprobe=index.n_lists)
+    assert np.array_equal(np.sort(approx, axis=1), np.sort(exact, axis=1))
+
+    _, probed = index.search(queries, vectors, k=5, nprobe=8)
+    recall = np.mean([len(set(a) & set(e)) / 5 for a, e in zip(probed, exact)])
+    assert recall > 0.8
+
+    index.save(tmp_path / "ann.npz")
+    loaded = IVFIndex.load(tmp_path / "ann.npz")
+    assert np.array_equal(loaded.assignments(), index.assignments())
+
+
+def test_store_builds_and_persists_ann_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ann_min_entries", 40)
+    monkeypatch.setattr(settings, "ann_nprobe", 64)
+    path = tmp_path / "memory"
+    store = _fake_store(path)
+    for i in range(30):
+        store.add(f"topic{i} alpha", [], f"summary{i}")
+    assert store._ann is None
+
+    for i in range(30, 50):
+        store.add(f"topic{i} beta", [], f"summary{i}")
+    store.rebuild_ann()
+    assert store._ann is not None and store._ann.size == 50
+    assert (path / "ann-1.npz").exists()
+    assert store.search("topic42 beta summary42", threshold=0.0)[0]["query"] == "topic42 beta"
+
+    reloaded = _fake_store(path)
+    assert reloaded._ann is not None and reloaded._ann.size == 50
+
+
+def test_ann_training_stays_off_add_and_readers(tmp_path, monkeypatch):
+    from research_agent.ann import IVFIndex
+
+    monkeypatch.setattr(settings, "ann_min_entries", 40)
+    trained_on = []
+    real_train = IVFIndex.train.__func__
+
+    def train(cls, vectors, **kwargs):
+        trained_on.append(threading.current_thread())
+        return real_train(cls, vectors, **kwargs)
+
+    monkeypatch.setattr(IVFIndex, "train", classmethod(train))
+    path = tmp_path / "memory"
+    store = _fake_store(path)
+    for i in range(39):
+        store.add(f"topic{i}", [], f"summary{i}")
+
+    # Hold the background rebuild back: until an index is saved, a reader
+    # searches exactly and never trains one itself.
+    with store._ann_build_lock:
+        store.add("topic39", [], "summary39")
+        assert store._ann is None and store._ann_thread.is_alive()
+        reader = _fake_store(path)
+        assert reader._ann is None and reader._ann_thread is None
+        assert reader.search("topic7 summary7", threshold=0.0)[0]["query"] == "topic7"
+
+    store._ann_thread.join(timeout=10)
+    assert trained_on and threading.main_thread() not in trained_on
+    assert store._ann is not None and store._ann.size == 40
+
+    store.add("topic40", [], "summary40")
+    assert len(trained_on) == 1 and store._ann.size == 41
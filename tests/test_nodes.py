@@ -0,0 +1,341 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+import research_agent.nodes.researcher as researcher_mod
+from config.settings import settings
+
+
+def _finding(source_type: str, n: int, host: str = "example.com") -> dict:
+    return {
+        "source_type": source_type,
+        "title": f"{source_type}-{n}",
+        "url": f"https://{host}/{source_type}/{n}",
+        "snippet": "original",
+    }
+
+
+@pytest.fixture
+def enrichment_settings(monkeypatch):
+    monkeypatch.setattr(settings, "enrichment_depth", {"github": 0, "web": 3})
+    monkeypatch.setattr(settings, "enrichment_default_depth", 1)
+    monkeypatch.setattr(settings, "enrichment_deadline", 0.5)
+    monkeypatch.setattr(settings, "enrichment_per_host_limit", 2)
+    monkeypatch.setattr(researcher_mod, "_enrich_limiter", None)
+
+
+def test_enrichment_depth_per_source_type(enrichment_settings):
+    results = (
+        [_finding("web", i) for i in range(5)]
+        + [_finding("arxiv", i) for i in range(3)]
+        + [_finding("github", i) for i in range(2)]
+    )
+    picked = [f["title"] for f in researcher_mod._enrichment_candidates(results)]
+    assert picked == ["web-0", "web-1", "web-2", "arxiv-0"]
+
+
+def test_enrichment_runs_concurrently_and_respects_deadline(enrichment_settings, monkeypatch):
+    def fake_read(url, query=None, timeout=None):
+        time.sleep(2.0 if url.endswith("/2") else 0.1)
+        return f"content of {url}"
+
+    monkeypatch.setattr(researcher_mod, "read_webpage", fake_read)
+    results = [_finding("web", i, host=f"h{i}.com") for i in range(3)]
+
+    start = time.perf_counter()
+    researcher_mod._enrich_findings(results)
+    assert time.perf_counter() - start < 1.0
+
+    assert results[0]["snippet"].startswith("content of")
+    assert results[1]["snippet"].startswith("content of")
+    assert results[2]["snippet"] == "original"
+
+
+def test_enrichment_caps_requests_per_host(enrichment_settings, monkeypatch):
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def fake_read(url, query=None, timeout=None):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+        return "x"
+
+    monkeypatch.setattr(settings, "enrichment_default_depth", 6)
+    monkeypatch.setattr(researcher_mod, "read_webpage", fake_read)
+    researcher_mod._enrich_findings([_finding("arxiv", i) for i in range(6)])
+    assert peak == 2
+
+
+def test_abandoned_fetches_release_host_slots_by_the_deadline(enrichment_settings, monkeypatch):
+    timeouts = []
+
+    def fake_read(url, query=None, timeout=None):
+        timeouts.append(timeout)
+        time.sleep(timeout + 0.05)
+        return "x"
+
+    monkeypatch.setattr(researcher_mod, "read_webpage", fake_read)
+    researcher_mod._enrich_findings([_finding("web", i) for i in range(3)])
+    # Two fetches took the host's slots; the third gave up waiting for one.
+    assert len(timeouts) == 2 and all(0 < t <= 0.5 for t in timeouts)
+
+    time.sleep(0.1)
+    slot = researcher_mod._limiter().slot("https://example.com/0")
+    assert slot.acquire(timeout=0.5)
+    slot.release()
+
+
+def test_async_enrichment_respects_deadline(enrichment_settings, monkeypatch):
+    async def fake_read(url, query=None, timeout=None):
+        await asyncio.sleep(2.0 if url.endswith("/1") else 0.05)
+        return "enriched"
+
+    monkeypatch.setattr(researcher_mod, "aread_webpage", fake_read)
+    results = [_finding("web", i, host=f"h{i}.com") for i in range(2)]
+
+    start = time.perf_counter()
+    asyncio.run(researcher_mod._aenrich_findings(results))
+    assert time.perf_counter() - start < 1.0
+    assert [f["snippet"] for f in results] == ["enriched", "original"]
+
+
+def test_sequential_enrichment_shares_one_run_deadline(enrichment_settings, monkeypatch):
+    def fake_read(url, query=None, timeout=None):
+        time.sleep(2.0)
+        return "enriched"
+
+    def fake_tool(query):
+        return [_finding("web", 0, host=f"{query}.com")]
+
+    monkeypatch.setattr(researcher_mod, "read_webpage", fake_read)
+    monkeypatch.setattr(researcher_mod, "get_tool", lambda name: fake_tool)
+    state = {
+        "sub_tasks": [
+            {"id": i, "query": f"q{i}", "tool": "web", "status": "pending", "findings": []}
+            for i in range(3)
+        ],
+        "current_task_index": 0,
+    }
+
+    start = time.perf_counter()
+    for _ in range(3):
+        update = researcher_mod.researcher_node(state)
+        state = dict(state, **update)
+    # One 0.5s budget for the whole run, not 0.5s per sub-task.
+    assert time.perf_counter() - start < 1.0
+    assert update["enrichment_deadline"] <= time.time()
+
+
+def test_llm_clients_are_pooled_per_loop(monkeypatch):
+    import research_agent.llm as llm_mod
+
+    llm_mod.release_llm_clients()
+    assert llm_mod.get_llm() is llm_mod.get_llm()
+    assert llm_mod.get_llm(temperature=0.0) is not llm_mod.get_llm()
+
+    async def in_loop():
+        return llm_mod.get_llm(), llm_mod.get_llm()
+
+    first, second = asyncio.run(in_loop())
+    assert first is second
+    assert first is not llm_mod.get_llm()
+    llm_mod.release_llm_clients()
+
+
+def test_llm_slots_cap_concurrent_calls(monkeypatch):
+    import research_agent.llm as llm_mod
+    import research_agent.nodes.synthesizer as synthesizer_mod
+
+    monkeypatch.setattr(settings, "llm_max_concurrency", 2)
+    monkeypatch.setattr(synthesizer_mod, "get_llm_cache", lambda: None)
+    llm_mod.release_llm_clients()
+    active = []
+    peak = []
+
+    class FakeLLM:
+        async def astream(self, messages):
+            active.append(1)
+            peak.append(len(active))
+            await asyncio.sleep(0.05)
+            active.pop()
+            yield type("Chunk", (), {"content": "report"})()
+
+    monkeypatch.setattr(synthesizer_mod, "get_llm", FakeLLM)
+    state = {"original_query": "q", "all_findings": [], "errors": []}
+
+    async def run():
+        return await asyncio.gather(
+            *(synthesizer_mod.asynthesizer_node(state) for _ in range(6))
+        )
+
+    assert all(r == {"final_report": "report"} for r in asyncio.run(run()))
+    assert max(peak) == 2
+    llm_mod.release_llm_clients()
+
+
+def test_llm_calls_record_and_replay(tmp_path, monkeypatch):
+    from langchain_core.language_models import GenericFakeChatModel
+    from langchain_core.messages import AIMessage
+
+    import research_agent.cassette as cassette_mod
+    import research_agent.llm as llm_mod
+    import research_agent.nodes.synthesizer as synthesizer_mod
+
+    monkeypatch.setattr(cassette_mod, "_cassette", None)
+    monkeypatch.setattr(cassette_mod, "_configured", True)
+    monkeypatch.setattr(
+        llm_mod,
+        "_build_llm",
+        lambda temperature: GenericFakeChatModel(messages=iter([AIMessage("LoRA report.")])),
+    )
+    state = {"original_query": "What is LoRA?", "all_findings": [], "errors": []}
+    path = tmp_path / "run.cassette"
+
+    recorder = cassette_mod.Cassette(path, "record")
+    cassette_mod.set_cassette(recorder)
+    llm_mod.release_llm_clients()
+    assert synthesizer_mod.synthesizer_node(state) == {"final_report": "LoRA report."}
+    recorder.save()
+
+    # The fake model is exhausted: only the cassette can answer now.
+    cassette_mod.set_cassette(cassette_mod.Cassette(path, "replay"))
+    llm_mod.release_llm_clients()
+    replayed = asyncio.run(synthesizer_mod.asynthesizer_node(state))
+    assert replayed == {"final_report": "LoRA report."}
+
+    with pytest.raises(cassette_mod.CassetteMiss):
+        synthesizer_mod.synthesizer_node(dict(state, original_query="What is QLoRA?"))
+    llm_mod.release_llm_clients()
+
+
+def test_canonical_urls_and_identifiers():
+    from research_agent.dedup import arxiv_id, canonical_url, doi
+
+    assert canonical_url("http://www.Example.com/a/?utm_source=x&b=1#top") == "https://example.com/a?b=1"
+    assert canonical_url("https://github.com/Microsoft/LoRA/tree/main/loralib") == "https://github.com/microsoft/lora"
+    assert arxiv_id("http://arxiv.org/abs/2106.09685v2") == "2106.09685"
+    assert arxiv_id("https://arxiv.org/pdf/2106.09685.pdf") == "2106.09685"
+    assert arxiv_id("https://arxiv.org/abs/solv-int/9901001v1") == "solv-int/9901001"
+    assert doi("https://doi.org/10.48550/arXiv.2106.09685") == "10.48550/arxiv.2106.09685"
+
+
+def test_deduplicate_merges_across_sources():
+    from research_agent.dedup import deduplicate
+
+    abstract = (
+        "We propose Low-Rank Adaptation, or LoRA, which freezes the pretrained model "
+        "weights and injects trainable rank decomposition matrices into each layer "
+        "of the Transformer architecture, greatly reducing trainable parameters."
+    )
+    findings = [
+        {"source_type": "arxiv", "title": "LoRA: Low-Rank Adaptation of Large Language Models",
+         "url": "http://arxiv.org/abs/2106.09685v2", "snippet": abstract,
+         "ids": {"arxiv": "2106.09685"}},
+        {"source_type": "github", "title": "microsoft/LoRA",
+         "url": "https://github.com/microsoft/LoRA", "snippet": "Code for loralib"},
+        {"source_type": "semantic_scholar", "title": "LoRA: Low-Rank Adaptation of Large Language Models",
+         "url": "https://www.semanticscholar.org/paper/abc", "snippet": abstract[:120],
+         "ids": {"arxiv": "2106.09685", "doi": "10.48550/arxiv.2106.09685"}},
+        {"source_type": "web", "title": "GitHub - microsoft/LoRA: Code for loralib",
+         "url": "https://github.com/microsoft/LoRA/blob/main/README.md?utm_source=ddg",
+         "snippet": "README"},
+        {"source_type": "web", "title": "A blog post about adapters",
+         "url": "https://blog.example.com/lora", "snippet": abstract + " Mirrored here."},
+        {"source_type": "wikipedia", "title": "Fine-tuning (deep learning)",
+         "url": "https://en.wikipedia.org/wiki/Fine-tuning_(deep_learning)",
+         "snippet": "In deep learning, fine-tuning is an approach to transfer learning."},
+    ]
+
+    unique = deduplicate(findings)
+
+    assert [f["title"] for f in unique] == [
+        "LoRA: Low-Rank Adaptation of Large Language Models",
+        "microsoft/LoRA",
+        "Fine-tuning (deep learning)",
+    ]
+    paper, repo, wiki = unique
+    assert paper["sources"] == ["arxiv", "semantic_scholar", "web"]
+    assert paper["ids"] == {"arxiv": "2106.09685", "doi": "10.48550/arxiv.2106.09685"}
+    assert paper["snippet"].endswith("Mirrored here.")
+    assert "https://blog.example.com/lora" in paper["alternate_urls"]
+    assert repo["sources"] == ["github", "web"]
+    assert "sources" not in wiki
+
+
+def _packing_embedder():
+    from research_agent.embeddings import EmbeddingService
+    from tests.test_memory import FakeEncoder
+
+    return EmbeddingService("fake", model=FakeEncoder())
+
+
+def test_pack_findings_respects_budget_and_ranks_by_query():
+    from research_agent.packing import estimate_tokens, pack_findings
+
+    relevant = "lora low rank adapters freeze pretrained weights."
+    filler = "the weather in paris was mild and sunny all week long."
+    findings = [
+        {"source_type": "web", "title": f"off topic {i}", "url": f"https://w/{i}",
+         "snippet": filler * 4}
+        for i in range(6)
+    ] + [
+        {"source_type": "arxiv", "title": "lora paper", "url": "https://a/1",
+         "snippet": relevant + " " + filler * 30},
+        {"source_type": "arxiv", "title": "unrelated arxiv", "url": "https://a/2",
+         "snippet": filler * 4},
+    ]
+
+    result = pack_findings(
+        "lora low rank adapters", findings, budget=400, max_finding_tokens=60,
+        embedder=_packing_embedder(),
+    )
+
+    assert result.tokens <= 400
+    assert len(result.findings) + len(result.dropped) == len(findings)
+    assert result.dropped
+    kept_titles = [f["title"] for f in result.findings]
+    assert "lora paper" in kept_titles
+    lora = next(f for f in result.findings if f["title"] == "lora paper")
+    assert lora["snippet"].startswith(relevant)
+    assert estimate_tokens(lora["snippet"]) <= 60
+    # Kept findings preserve their original relative order.
+    assert kept_titles == [f["title"] for f in findings if f["title"] in kept_titles]
+
+
+def test_pack_findings_splits_budget_by_source_weight():
+    from research_agent.packing import pack_findings
+
+    findings = [
+        {"source_type": source, "title": f"{source} {i}", "url": "", "snippet": "x" * 160}
+        for source in ("web", "arxiv")
+        for i in range(10)
+    ]
+    result = pack_findings(
+        "q", findings, budget=300, max_finding_tokens=100,
+        source_weights={"arxiv": 2.0},
+    )
+    kept = Counter(f["source_type"] for f in result.findings)
+    assert kept["arxiv"] > kept["web"] > 0
+
+
+def test_packer_node_reports_dropped(monkeypatch):
+    import research_agent.nodes.packer as packer_mod
+
+    monkeypatch.setattr(packer_mod, "get_embedding_service", lambda: None)
+    monkeypatch.setattr(settings, "context_token_budget", 50)
+    findings = [_finding("web", i) for i in range(10)]
+    update = packer_mod.packer_node(
+        {"original_query": "q", "all_findings": findings, "unique_findings": findings}
+    )
+    assert update["packed_findings"]
+    assert len(update["packed_findings"]) + len(update["dropped_findings"]) == 10
+    assert update["dropped_findings"]
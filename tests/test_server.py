@@ -0,0 +1,148 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from server import Rejected, ResearchService, make_handler
+
+
+class FakeGraph:
+    """Streams a plan and a report; holds runs until *gate* is set."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def stream(self, inputs, config=None, stream_mode=None):
+        self.gate.wait(5)
+        tasks = [{"id": 0, "query": "q", "tool": "arxiv", "status": "done", "findings": []}]
+        yield "updates", {"planner": {"sub_tasks": tasks}}
+        yield "values", dict(inputs, sub_tasks=tasks, final_report=f"report on {inputs['original_query']}")
+
+
+@pytest.fixture
+def service_url():
+    graph = FakeGraph()
+    service = ResearchService(graph, workers=1, queue_size=1, per_client=2)
+    service.start()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(service))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", service, graph
+    graph.gate.set()
+    service.drain(5)
+    server.shutdown()
+    server.server_close()
+
+
+def _post(url, query, headers=None):
+    request = urllib.request.Request(
+        f"{url}/research",
+        data=json.dumps({"query": query}).encode(),
+        headers={"Content-Type": "application/json", **(headers or {})},
+    )
+    return urllib.request.urlopen(request, timeout=10)
+
+
+def test_research_answers_with_final_event(service_url):
+    url, _, _ = service_url
+    with _post(url, "What is LoRA?") as resp:
+        body = json.loads(resp.read())
+    assert body["type"] == "run_finished"
+    assert body["final_report"] == "report on What is LoRA?"
+
+
+def test_research_streams_ndjson_and_sse(service_url):
+    url, _, _ = service_url
+    with _post(url, "What is LoRA?", {"Accept": "application/x-ndjson"}) as resp:
+        types = [json.loads(line)["type"] for line in resp.read().splitlines()]
+    assert types == ["plan_ready", "report_chunk", "run_finished"]
+
+    with _post(url, "What is LoRA?", {"Accept": "text/event-stream"}) as resp:
+        text = resp.read().decode()
+    assert text.startswith("event: plan_ready\ndata: ")
+    assert "event: run_finished\n" in text
+
+
+def test_saturated_service_answers_429(service_url):
+    url, service, graph = service_url
+    graph.gate.clear()
+    results = []
+
+    def submit(client):
+        try:
+            with _post(url, "slow", {"X-Client-Id": client}) as resp:
+                results.append(resp.status)
+        except urllib.error.HTTPError as e:
+            results.append(e.code)
+
+    # One running and one queued job fill a single worker with a queue of one.
+    running = threading.Thread(target=submit, args=("a",))
+    queued = threading.Thread(target=submit, args=("b",))
+    running.start()
+    _wait_for(lambda: service.status()["running"] == 1)
+    queued.start()
+    _wait_for(lambda: service.status()["queued"] == 1)
+
+    with pytest.raises(urllib.error.HTTPError) as full:
+        _post(url, "one more", {"X-Client-Id": "c"})
+    assert full.value.code == 429
+    assert full.value.headers["Retry-After"] == "1"
+
+    graph.gate.set()
+    running.join(5)
+    queued.join(5)
+    assert results == [200, 200]
+
+
+def test_per_client_limit_and_drain(service_url):
+    url, service, graph = service_url
+    service.per_client = 1
+    graph.gate.clear()
+    first = service.submit("slow", "a")
+    with pytest.raises(Rejected) as limited:
+        service.submit("again", "a")
+    assert limited.value.status == 429
+
+    graph.gate.set()
+    assert service.drain(5)
+    assert [e.type for e in first.iter_events()][-1] == "run_finished"
+    with pytest.raises(Rejected) as draining:
+        service.submit("late", "b")
+    assert draining.value.status == 503
+
+
+def test_drain_timeout_drops_queued_jobs(service_url):
+    url, service, graph = service_url
+    graph.gate.clear()
+    running = service.submit("slow", "a")
+    _wait_for(lambda: service.status()["running"] == 1)
+    queued = service.submit("queued", "b")
+
+    assert not service.drain(0.1)
+    assert list(queued.iter_events()) == []
+    assert queued.cancelled.is_set() and running.cancelled.is_set()
+    assert service.status()["queued"] == 0
+
+    graph.gate.set()
+    list(running.iter_events())
+    _wait_for(service.stopped)
+
+
+def test_metrics_endpoint(service_url):
+    url, _, _ = service_url
+    with urllib.request.urlopen(f"{url}/metrics", timeout=10) as resp:
+        text = resp.read().decode()
+    assert "research_agent_server_queued_jobs 0" in text
+
+
+def _wait_for(condition, timeout=5.0):
+    import time
+
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
@@ -6,7 +6,16 @@ from research_agent.tools.semantic_scholar_search import search_semantic_scholar
 from research_agent.tools.huggingface_search import search_huggingface
 from research_agent.tools.youtube_search import search_youtube
 from research_agent.tools.web_reader import read_webpage
-from research_agent.tools.registry import get_tool, TOOL_REGISTRY
+from research_agent.tools.registry import (
+    ASYNC_TOOL_REGISTRY,
+    TOOL_REGISTRY,
+    get_async_tool,
+    get_tool,
+)
+from research_agent.tools import http_client
+
+import asyncio
+import inspect
 
 import pytest
 
@@ -113,3 +122,279 @@ def test_get_tool_returns_callable():
 def test_get_tool_raises_on_unknown():
     with pytest.raises(KeyError, match="Unknown tool"):
         get_tool("nonexistent")
+
+
+def test_async_registry_covers_every_tool():
+    assert set(ASYNC_TOOL_REGISTRY) == set(TOOL_REGISTRY)
+    assert inspect.iscoroutinefunction(get_async_tool("github"))
+    with pytest.raises(KeyError, match="Unknown tool"):
+        get_async_tool("nonexistent")
+
+
+def test_http_clients_are_shared():
+    assert http_client.get_client() is http_client.get_client()
+
+    async def clients():
+        return http_client.get_async_client(), http_client.get_async_client()
+
+    first, second = asyncio.run(clients())
+    assert first is second
+
+
+@pytest.fixture
+def mock_pages(tmp_path, monkeypatch):
+    """Serve pages from a local handler and count downloads/extractions."""
+    import httpx
+
+    import research_agent.tools.web_reader as web_reader
+    from research_agent.cache import DiskCache
+
+    calls = {"requests": [], "extract": 0}
+
+    def handler(request):
+        calls["requests"].append(request)
+        if request.url.path == "/broken":
+            return httpx.Response(500)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text="<html>page</html>", headers={"ETag": '"v1"'})
+
+    def fake_extract(html):
+        calls["extract"] += 1
+        return "extracted text"
+
+    monkeypatch.setattr(http_client, "_client", httpx.Client(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(web_reader, "_cache", DiskCache(tmp_path / "pages.sqlite"))
+    monkeypatch.setattr(web_reader.trafilatura, "extract", fake_extract)
+    return calls
+
+
+def test_read_webpage_serves_fresh_pages_from_cache(mock_pages):
+    assert read_webpage("https://docs.example/a") == "extracted text"
+    assert read_webpage("https://docs.example/a") == "extracted text"
+    assert len(mock_pages["requests"]) == 1
+    assert mock_pages["extract"] == 1
+
+
+def test_read_webpage_revalidates_with_etag(mock_pages, monkeypatch):
+    from config.settings import settings
+
+    monkeypatch.setattr(settings, "page_cache_fresh_seconds", 0)
+    read_webpage("https://docs.example/a")
+    assert read_webpage("https://docs.example/a") == "extracted text"
+
+    assert mock_pages["requests"][1].headers["if-none-match"] == '"v1"'
+    assert mock_pages["extract"] == 1
+
+
+def test_read_webpage_negative_caches_failures(mock_pages):
+    assert read_webpage("https://docs.example/broken") is None
+    assert read_webpage("https://docs.example/broken") is None
+    assert len(mock_pages["requests"]) == 1
+
+
+def test_read_webpage_keeps_cached_text_when_revalidation_fails(mock_pages, monkeypatch):
+    import httpx
+
+    from config.settings import settings
+
+    read_webpage("https://docs.example/a")
+    monkeypatch.setattr(settings, "page_cache_fresh_seconds", 0)
+
+    def down(request):
+        raise httpx.ConnectTimeout("timed out", request=request)
+
+    monkeypatch.setattr(http_client, "_client", httpx.Client(transport=httpx.MockTransport(down)))
+    assert read_webpage("https://docs.example/a") == "extracted text"
+
+
+def _long_document(topic_line: str, position: int, lines: int = 400) -> list[str]:
+    doc = [f"Line {i} talks about cooking pasta and the weather." for i in range(lines)]
+    doc[position] = topic_line
+    return doc
+
+
+def test_select_passages_finds_topic_deep_in_document():
+    from research_agent.passages import select_passages
+
+    topic = "LoRA freezes the pretrained weights and trains low-rank adapter matrices."
+    doc = _long_document(topic, position=350)
+
+    excerpt = select_passages(doc, "how does LoRA use low-rank adapters", budget=600)
+    assert topic in excerpt
+    assert len(excerpt) <= 600
+
+    # No query term anywhere: fall back to the start of the document.
+    head = select_passages(doc, "quantum chromodynamics", budget=200)
+    assert head.startswith("Line 0 talks")
+    assert len(head) <= 200
+
+
+def test_select_passages_streams_large_transcripts():
+    import time as time_mod
+
+    from research_agent.passages import select_passages
+
+    def segments():
+        for i in range(300_000):
+            if i == 250_000:
+                yield "and that is why speculative decoding speeds up inference"
+            else:
+                yield f"segment {i} with unrelated chatter"
+
+    start = time_mod.perf_counter()
+    excerpt = select_passages(segments(), "speculative decoding", budget=1500)
+    assert "speculative decoding speeds up inference" in excerpt
+    assert time_mod.perf_counter() - start < 10
+
+
+def test_text_pieces_yields_stripped_lines():
+    from research_agent.passages import text_pieces
+
+    assert list(text_pieces("one\n\n  two \r\nthree")) == ["one", "two", "three"]
+    assert list(text_pieces("")) == []
+
+
+def test_read_webpage_selects_passages_for_query(mock_pages, monkeypatch):
+    import research_agent.tools.web_reader as web_reader
+
+    topic = "Flash attention tiles the softmax to avoid materialising the matrix."
+    text = "\n".join(_long_document(topic, position=300))
+    monkeypatch.setattr(web_reader.trafilatura, "extract", lambda html: text)
+
+    assert topic not in read_webpage("https://docs.example/long")
+    assert topic in read_webpage("https://docs.example/long", "flash attention softmax")
+    assert len(mock_pages["requests"]) == 1
+
+
+def test_tool_metrics_record_errors_bytes_and_prometheus(monkeypatch):
+    import httpx
+
+    from config.settings import settings
+    from research_agent import metrics
+
+    def handler(request):
+        return httpx.Response(503, text="unavailable")
+
+    monkeypatch.setattr(settings, "tool_cache_enabled", False)
+    monkeypatch.setattr(http_client, "_client", httpx.Client(transport=httpx.MockTransport(handler)))
+    metrics.reset()
+
+    with metrics.track_run() as run:
+        assert get_tool("semantic_scholar")("lora") == []
+
+    stats = run.summary()["spans"]["tool"]["semantic_scholar"]
+    assert stats["count"] == 1
+    assert stats["empty"] == 1
+    assert stats["errors"] == {"HTTPStatusError": 1}
+    assert stats["bytes"] == len("unavailable")
+
+    text = metrics.render_prometheus()
+    assert 'research_agent_span_duration_seconds_count{kind="tool",name="semantic_scholar"} 1' in text
+    assert (
+        'research_agent_errors_total{kind="tool",name="semantic_scholar",error="HTTPStatusError"} 1'
+        in text
+    )
+
+
+@pytest.fixture
+def no_cassette(monkeypatch):
+    """Start without a cassette; whatever a test installs is removed afterwards."""
+    from research_agent import cassette as cassette_mod
+
+    monkeypatch.setattr(cassette_mod, "_cassette", None)
+    monkeypatch.setattr(cassette_mod, "_configured", True)
+
+
+def test_cassette_replays_http_traffic_offline(no_cassette, tmp_path, monkeypatch):
+    import httpx
+
+    import research_agent.tools.web_reader as web_reader
+    from research_agent.cassette import Cassette, set_cassette
+
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.url.host == "api.github.com":
+            return httpx.Response(200, json={"items": [{
+                "full_name": "microsoft/LoRA",
+                "html_url": "https://github.com/microsoft/LoRA",
+                "description": "Low-rank adaptation",
+                "language": "Python",
+                "stargazers_count": 10000,
+            }]})
+        return httpx.Response(200, text="<html>LoRA page</html>")
+
+    monkeypatch.setattr(web_reader.trafilatura, "extract", lambda html: html[6:-7])
+    path = tmp_path / "run.cassette"
+
+    recorder = Cassette(path, "record")
+    set_cassette(recorder)
+    monkeypatch.setattr(
+        http_client, "_client", httpx.Client(transport=recorder.transport(httpx.MockTransport(handler)))
+    )
+    recorded = (search_github("lora"), read_webpage("https://docs.example/lora"))
+    recorder.save()
+    assert recorded[0][0]["title"] == "microsoft/LoRA"
+    assert recorded[1] == "LoRA page"
+
+    player = Cassette(path, "replay")
+    set_cassette(player)
+    monkeypatch.setattr(http_client, "_client", httpx.Client(**http_client._client_kwargs()))
+    assert (search_github("lora"), read_webpage("https://docs.example/lora")) == recorded
+    assert len(requests) == 2
+
+    # Unrecorded requests fail like a network error, without a network.
+    assert read_webpage("https://docs.example/other") is None
+    assert player.misses == 1
+
+
+def test_cassette_records_library_tools_per_call(no_cassette, tmp_path, monkeypatch):
+    from research_agent.cassette import Cassette, set_cassette
+    from research_agent.tools import registry
+
+    calls = []
+
+    def fake_arxiv(query):
+        calls.append(query)
+        return [{"source_type": "arxiv", "title": query, "url": "https://arxiv.org/abs/1", "snippet": "s"}]
+
+    monkeypatch.setitem(registry.TOOL_REGISTRY, "arxiv", fake_arxiv)
+    path = tmp_path / "run.cassette"
+
+    recorder = Cassette(path, "record")
+    set_cassette(recorder)
+    results = get_tool("arxiv")("LoRA adapters")
+    results[0]["snippet"] = "enriched later"  # must not leak into the recording
+    recorder.save()
+
+    set_cassette(Cassette(path, "replay"))
+    replayed = asyncio.run(get_async_tool("arxiv")("  lora   ADAPTERS"))
+    assert replayed[0]["title"] == "LoRA adapters"
+    assert replayed[0]["snippet"] == "s"
+    assert calls == ["LoRA adapters"]
+
+
+def test_registry_imports_tools_on_first_use():
+    import json
+    import os
+    import subprocess
+    import sys
+
+    code = (
+        "import json, sys\n"
+        "from research_agent.tools.registry import get_tool\n"
+        "get_tool('github')\n"
+        "print(json.dumps(sorted(sys.modules)))\n"
+    )
+    env = {**os.environ, "GROQ_API_KEY": os.environ.get("GROQ_API_KEY", "test")}
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+    modules = set(json.loads(result.stdout.splitlines()[-1]))
+
+    tools = {name for name in modules if name.startswith("research_agent.tools.") and name.endswith("_search")}
+    assert tools == {"research_agent.tools.github_search"}
+    heavy = {"arxiv", "ddgs", "mediawiki", "youtube_transcript_api", "huggingface_hub",
+             "langchain_core", "transformers", "torch"}
+    assert not heavy & modules
+    assert "research_agent.tools.huggingface_search" not in modules